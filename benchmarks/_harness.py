@@ -0,0 +1,237 @@
+"""Shared timing, JSON output and comparison for the benchmark scripts.
+
+Each script builds its fixtures in a temporary directory and yields `Case`s.
+A case runs once cold, after its fixture files are evicted from the page
+cache and Python's own caches are cleared, then `repeat` times warm.
+Results are one JSON document in the layout of `legacy.benchmark`, so runs
+can be compared by case name and size.
+"""
+
+import gc
+import json
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True, kw_only=True)
+class Case:
+    name: str
+    # The timed body, and what one call processes.
+    run: Callable[[], object]
+    count: int
+    unit: str
+    # Untimed, before every call: restores whatever the last call changed.
+    setup: Callable[[], None] | None = None
+    # Files the cold call should read from disk rather than memory.
+    files: Path | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class Suite:
+    # Builds the fixtures for a size and yields the cases over them.
+    build: Callable[[int], AbstractContextManager[list[Case]]]
+    # Default fixture size; --scale multiplies it.
+    size: int
+
+
+def measure(case: Case, *, size: int, repeat: int) -> dict[str, Any]:
+    _drop_caches(case.files)
+    cold = _time(case)
+    warm = [_time(case) for _ in range(repeat)]
+    median = statistics.median(warm) if warm else cold
+    return {
+        "name": case.name,
+        "size": size,
+        "unit": case.unit,
+        "count": case.count,
+        "cold": cold,
+        "seconds": median,
+        "min": min(warm, default=cold),
+        "rate": case.count / median if median > 0 else 0.0,
+    }
+
+
+def run_suites(
+    suites: dict[str, Suite], *, scale: float, repeat: int
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for suite in suites.values():
+        size = max(1, int(suite.size * scale))
+        with suite.build(size) as cases:
+            for case in cases:
+                result = measure(case, size=size, repeat=repeat)
+                print(
+                    f"{case.name}: {case.count} {case.unit}, "
+                    f"cold {result['cold']:.3f}s, warm {result['seconds']:.3f}s "
+                    f"({result['rate']:.0f}/s)",
+                    file=sys.stderr,
+                )
+                results.append(result)
+    return results
+
+
+def compare(
+    baseline: list[dict[str, Any]],
+    current: list[dict[str, Any]],
+    *,
+    threshold: float,
+) -> int:
+    """Print warm time changes per case; the number slower than `threshold`%."""
+    before = {(_["name"], _["size"]): _ for _ in baseline}
+    slower = 0
+    for result in current:
+        old = before.get((result["name"], result["size"]))
+        if old is None:
+            print(f"{result['name']} ({result['size']}): new")
+            continue
+        change = _change(old["seconds"], result["seconds"])
+        mark = ""
+        if change > threshold:
+            mark = "  SLOWER"
+            slower += 1
+        elif change < -threshold:
+            mark = "  faster"
+        print(
+            f"{result['name']} ({result['size']}): "
+            f"{old['seconds']:.3f}s -> {result['seconds']:.3f}s "
+            f"({change:+.1f}%){mark}"
+        )
+    return slower
+
+
+def load(path: Path) -> list[dict[str, Any]]:
+    with path.open() as fin:
+        return json.load(fin)["results"]
+
+
+def dump(results: list[dict[str, Any]], output: Path | None) -> None:
+    report = {"environment": _get_environment(), "results": results}
+    if output is None:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return
+    with output.open("w") as fout:
+        json.dump(report, fout, indent=2, ensure_ascii=False)
+        fout.write("\n")
+
+
+def main(suites: dict[str, Suite], args: list[str]) -> int:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--suite",
+        choices=list(suites),
+        nargs="+",
+        default=list(suites),
+        help="Tools to time (default: all)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiply every fixture size (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Warm runs per case (default: %(default)s)",
+    )
+    parser.add_argument("-o", "--output", type=str, help="Write JSON here")
+    parser.add_argument(
+        "--compare", type=str, help="Results of an earlier run to compare with"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percent slower that fails --compare (default: %(default)s)",
+    )
+    kwargs = parser.parse_args(args)
+    if kwargs.scale <= 0:
+        parser.error("--scale must be positive")
+    if kwargs.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    chosen = {_: suites[_] for _ in kwargs.suite}
+    results = run_suites(chosen, scale=kwargs.scale, repeat=kwargs.repeat)
+    dump(results, Path(kwargs.output) if kwargs.output else None)
+    if not kwargs.compare:
+        return 0
+    with redirect_stdout(sys.stderr):
+        slower = compare(
+            load(Path(kwargs.compare)), results, threshold=kwargs.threshold
+        )
+    return 1 if slower else 0
+
+
+def walk_files(root: Path) -> Iterator[Path]:
+    for folder, _dirs, files in root.walk():
+        for name in files:
+            yield folder / name
+
+
+@contextmanager
+def feed_stdin(text: str) -> Iterator[None]:
+    """Hand `text` to a tool that reads its manifest from stdin."""
+    saved = sys.stdin
+    sys.stdin = StringIO(text)
+    try:
+        yield
+    finally:
+        sys.stdin = saved
+
+
+def quiet() -> AbstractContextManager[object]:
+    """Swallow what a tool prints, so the terminal is not part of the timing."""
+    return redirect_stdout(StringIO())
+
+
+def _time(case: Case) -> float:
+    if case.setup is not None:
+        case.setup()
+    # A collection landing inside one run would skew that run only.
+    gc.collect()
+    started = time.perf_counter()
+    case.run()
+    return time.perf_counter() - started
+
+
+def _drop_caches(root: Path | None) -> None:
+    re.purge()
+    if root is None or not hasattr(os, "posix_fadvise"):
+        return
+    # Clean pages can be dropped without privileges; dirty ones are written
+    # back first.
+    os.sync()
+    for path in walk_files(root):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _change(old: float, new: float) -> float:
+    if old <= 0:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def _get_environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+    }
@@ -0,0 +1,53 @@
+"""Classification throughput for `app.cg` over a synthetic name corpus.
+
+Usage: PYTHONPATH=src python benchmarks/cg.py [--scale X] [-o FILE]
+"""
+
+import random
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from _harness import Case, Suite, main
+
+from app.cg._rules import DEFAULT_RULES, Classifier
+
+
+_TAGS = ["C99", "成年コミック", "オリジナル", "東方Project", "DL版", "Parody", ""]
+
+
+def make_names(count: int, *, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    names: list[str] = []
+    for index in range(count):
+        head = rng.choice(_TAGS)
+        tail = rng.choices(_TAGS, k=rng.randint(0, 3))
+        parts = [f"({head})" if head else "", f"[Circle{index % 97}] Title {index}"]
+        parts.extend(f"({_})" for _ in tail)
+        names.append(" ".join(parts) + ".zip")
+    return names
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    names = make_names(size)
+    classifier = Classifier(DEFAULT_RULES)
+
+    def compile_rules() -> None:
+        Classifier(DEFAULT_RULES)
+
+    def classify() -> None:
+        for name in names:
+            classifier.classify(name)
+
+    yield [
+        Case(name="cg/compile", run=compile_rules, count=1, unit="tables"),
+        Case(name="cg/classify", run=classify, count=size, unit="names"),
+    ]
+
+
+SUITE = Suite(build=cases, size=100_000)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"cg": SUITE}, sys.argv[1:]))
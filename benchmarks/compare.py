@@ -0,0 +1,37 @@
+"""Compare two benchmark results by case name and size.
+
+Usage: python benchmarks/compare.py BASELINE.json CURRENT.json [--threshold P]
+
+Works on the output of run.py, the per-tool scripts and legacy.benchmark.
+Exits 1 when any case got slower than the threshold.
+"""
+
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from _harness import compare, load
+
+
+def main(args: list[str]) -> int:
+    parser = ArgumentParser("compare")
+    parser.add_argument("baseline", help="Results to compare against")
+    parser.add_argument("current", help="Results to check")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percent slower that counts as a regression (default: %(default)s)",
+    )
+    kwargs = parser.parse_args(args)
+
+    slower = compare(
+        load(Path(kwargs.baseline)),
+        load(Path(kwargs.current)),
+        threshold=kwargs.threshold,
+    )
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,108 @@
+"""Scan and apply throughput for `app.dedup` over a folder of fake archives.
+
+Usage: PYTHONPATH=src python benchmarks/dedup.py [--scale X] [-o FILE]
+"""
+
+import os
+import random
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import yaml
+from _harness import Case, Suite, feed_stdin, main, quiet
+
+from app.dedup._analyze import analyze, build_manifest
+from app.dedup._apply import apply
+
+
+_WORDS = ["夏の", "記憶", "Summer", "放課後", "Memories", "総集編", "Vol.", "恋"]
+_EVENTS = ["(C99) ", "(C100) ", "(COMIC1☆20) ", ""]
+_SUFFIXES = ["", " [DL版]", " (オリジナル)"]
+
+
+def make_names(count: int, *, seed: int = 0) -> list[str]:
+    """Archive names, each creator owning about ten titles.
+
+    Most titles exist only as ZIP. Some have an exact 7z copy under other
+    event or release tags, some a 7z with a near-identical title for the
+    fuzzy pass, and some a 7z with nothing to match.
+    """
+    rng = random.Random(seed)
+    creators = max(1, count // 15)
+    names: list[str] = []
+    index = 0
+    while len(names) < count:
+        creator = f"サークル{index % creators}"
+        title = " ".join(rng.choices(_WORDS, k=rng.randint(3, 8))) + f" {index}"
+        names.append(f"{rng.choice(_EVENTS)}[{creator}] {title}.zip")
+        match rng.randrange(10):
+            case 0 | 1:
+                suffix = rng.choice(_SUFFIXES)
+                names.append(f"{rng.choice(_EVENTS)}[{creator}] {title}{suffix}.7z")
+            case 2:
+                names.append(f"[{creator}] {title}!.7z")
+            case 3:
+                names.append(f"[{creator}] Unmatched {index}.7z")
+        index += 1
+    return names[:count]
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for index, name in enumerate(make_names(size)):
+            (root / name).write_bytes(b"\0" * (index % 64))
+
+        manifest = build_manifest(root)
+        text = yaml.safe_dump(manifest, allow_unicode=True, sort_keys=False)
+        removed = [
+            candidate
+            for group in manifest["groups"]
+            for candidate in group["candidates"]
+            if candidate["remove"]
+        ]
+
+        def analyze_all() -> None:
+            with quiet():
+                analyze(root)
+
+        def restore() -> None:
+            # Put back what the last apply removed, unchanged to its eyes.
+            for candidate in removed:
+                path = Path(candidate["path"])
+                if not path.exists():
+                    path.write_bytes(b"\0" * candidate["size"])
+                    mtime = candidate["mtime_ns"]
+                    os.utime(path, ns=(mtime, mtime))
+
+        def apply_all() -> None:
+            with feed_stdin(text), quiet():
+                apply()
+
+        yield [
+            Case(
+                name="dedup/analyze",
+                run=analyze_all,
+                count=size,
+                unit="archives",
+                files=root,
+            ),
+            Case(
+                name="dedup/apply",
+                run=apply_all,
+                count=len(manifest["groups"]),
+                unit="groups",
+                setup=restore,
+            ),
+        ]
+
+
+SUITE = Suite(build=cases, size=5_000)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"dedup": SUITE}, sys.argv[1:]))
@@ -0,0 +1,118 @@
+"""Scan, script and cleanup throughput for `app.faststart`.
+
+The fixture is a tree of tiny MP4 skeletons, some with the index up front
+and some after the data, mixed with files that are not video. No media is
+decoded, so this times the walk, MIME sniffing, MediaInfo parsing and the
+manifest round trips rather than ffmpeg.
+
+Usage: PYTHONPATH=src python benchmarks/faststart.py [--scale X] [-o FILE]
+"""
+
+import asyncio
+import struct
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import yaml
+from _harness import Case, Suite, feed_stdin, main, quiet
+
+from app.faststart._cleanup import cleanup
+from app.faststart._operations import get_operation_paths, needs_processing
+from app.faststart._scanner import scan
+from app.faststart._scripter import script
+
+
+_FILES_PER_FOLDER = 10
+
+
+def _box(kind: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+_FTYP = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2avc1mp41")
+_MOOV = _box(b"moov", _box(b"mvhd", bytes(100)))
+_MDAT = _box(b"mdat", bytes(1024))
+_FASTSTART = _FTYP + _MOOV + _MDAT
+_SLOW_START = _FTYP + _MDAT + _MOOV
+_JPEG = b"\xff\xd8\xff\xe0" + bytes(256)
+
+
+def make_tree(root: Path, count: int) -> None:
+    for index in range(count):
+        folder = root / f"{index // 100:03}" / f"{index // _FILES_PER_FOLDER:05}"
+        folder.mkdir(parents=True, exist_ok=True)
+        match index % 4:
+            case 0:
+                (folder / f"clip{index}.mp4").write_bytes(_FASTSTART)
+            case 1 | 2:
+                (folder / f"clip{index}.mp4").write_bytes(_SLOW_START)
+            case _:
+                (folder / f"cover{index}.jpg").write_bytes(_JPEG)
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, size)
+
+        with quiet() as stdout:
+            asyncio.run(scan(root))
+        text = stdout.getvalue()
+        files = yaml.safe_load(text)["files"]
+        backups = [
+            get_operation_paths(Path(_["path"])).backup
+            for _ in files
+            if needs_processing(_)
+        ]
+
+        def scan_all() -> None:
+            with quiet():
+                asyncio.run(scan(root))
+
+        def script_all() -> None:
+            with feed_stdin(text), quiet():
+                asyncio.run(script())
+
+        def restore() -> None:
+            # As if each transcode had just finished and kept its original.
+            for backup in backups:
+                if not backup.exists():
+                    backup.write_bytes(_SLOW_START)
+
+        def cleanup_all() -> None:
+            with feed_stdin(text), quiet():
+                asyncio.run(cleanup())
+
+        yield [
+            Case(
+                name="faststart/scan",
+                run=scan_all,
+                count=size,
+                unit="files",
+                files=root,
+            ),
+            Case(
+                name="faststart/script",
+                run=script_all,
+                count=len(files),
+                unit="videos",
+            ),
+            Case(
+                name="faststart/cleanup",
+                run=cleanup_all,
+                count=len(backups),
+                unit="backups",
+                setup=restore,
+            ),
+        ]
+
+
+SUITE = Suite(build=cases, size=200)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"faststart": SUITE}, sys.argv[1:]))
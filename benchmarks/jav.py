@@ -0,0 +1,108 @@
+"""Manifest update and rename throughput for `app.jav`.
+
+`jav scan` looks every name up online, so it is left out; the fixture is
+the manifest a scan would have produced.
+
+Usage: PYTHONPATH=src python benchmarks/jav.py [--scale X] [-o FILE]
+"""
+
+import asyncio
+import random
+import sys
+from argparse import Namespace
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import yaml
+from _harness import Case, Suite, feed_stdin, main, quiet
+
+from app.jav import ManifestDict, _rename, _update
+
+
+_WORDS = "新人デビュー 美少女 温泉旅行 完全密着 ドキュメント 初めての 夏休み 特別編"
+_ACTRESSES = ["桜井あゆ", "佐藤美紀（鈴木美紀）", "Alice", "高橋りな", "中村ゆい"]
+_SAUCES = ["fanza", "mgstage", "carib", "1pondo", "heyzo"]
+
+
+def make_manifest(root: Path, count: int, *, seed: int = 0) -> list[ManifestDict]:
+    rng = random.Random(seed)
+    words = _WORDS.split()
+    manifest: list[ManifestDict] = []
+    for index in range(count):
+        product_id = f"ABC-{index:05}"
+        actresses = rng.sample(_ACTRESSES, k=rng.randint(0, 3))
+        # Long enough that a third of the names need truncating.
+        title = " ".join(rng.choices(words, k=rng.randint(4, 30)))
+        if actresses and rng.random() < 0.5:
+            title += " " + " ".join(actresses)
+        sauces = rng.sample(_SAUCES, k=rng.randint(1, 3))
+        manifest.append(
+            {
+                "id": str(root / product_id),
+                "name": product_id,
+                "need_review": False,
+                "products": {
+                    _: {
+                        "product_id": product_id,
+                        "title": title,
+                        "actresses": actresses,
+                    }
+                    for _ in sauces
+                },
+                "title": {},
+            }
+        )
+    return manifest
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        manifest = make_manifest(root, size)
+        for entry in manifest:
+            Path(entry["id"]).mkdir()
+        scanned = yaml.safe_dump(manifest, allow_unicode=True)
+
+        with feed_stdin(scanned), quiet() as stdout:
+            asyncio.run(_update(Namespace(pending=False)))
+        updated = stdout.getvalue()
+        renamed = {
+            Path(_["id"]): next(v for v in _["title"].values() if v)
+            for _ in yaml.safe_load(updated)
+            if not _["need_review"]
+        }
+
+        def update_all() -> None:
+            with feed_stdin(scanned), quiet():
+                asyncio.run(_update(Namespace(pending=False)))
+
+        def restore() -> None:
+            for path, name in renamed.items():
+                moved = path.with_name(name)
+                if moved.exists():
+                    moved.rename(path)
+
+        def rename_all() -> None:
+            with feed_stdin(updated), quiet():
+                asyncio.run(_rename(Namespace(ready=True)))
+
+        yield [
+            Case(name="jav/update", run=update_all, count=size, unit="entries"),
+            Case(
+                name="jav/rename",
+                run=rename_all,
+                count=len(renamed),
+                unit="folders",
+                setup=restore,
+            ),
+        ]
+
+
+SUITE = Suite(build=cases, size=1_000)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"jav": SUITE}, sys.argv[1:]))
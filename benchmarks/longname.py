@@ -0,0 +1,78 @@
+"""Validation, truncation and planning throughput for `app.longname`.
+
+Usage: PYTHONPATH=src python benchmarks/longname.py [--scale X] [-o FILE]
+"""
+
+import random
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from _harness import Case, Suite, main
+
+from app.longname._plan import plan_renames
+from app.longname._rules import is_valid_name, suggest_name
+
+
+_PIECES = ["a", "Z", "0", " ", "-", "長", "é", "😀"]
+_CJK = "夏の日の記憶と放課後の約束、そして君が残した最後の手紙について"
+
+_FOLDER_SIZE = 50
+
+
+def make_names(count: int, *, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    names: list[str] = []
+    for _ in range(count):
+        # Mostly short valid names, with a tail of long ones, long CJK
+        # titles whose bytes overflow well before their characters do, and
+        # a few SMB-illegal characters.
+        roll = rng.random()
+        if roll < 0.1:
+            stem = "".join(rng.choices(_PIECES, k=rng.randint(100, 300)))
+        elif roll < 0.2:
+            stem = "".join(rng.choices(_CJK, k=rng.randint(60, 120)))
+        else:
+            stem = "".join(rng.choices(_PIECES, k=rng.randint(8, 40)))
+        if rng.random() < 0.05:
+            stem += rng.choice(":?|")
+        names.append(stem + ".zip")
+    return names
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    names = make_names(size)
+    invalid = [_ for _ in names if not is_valid_name(_)]
+    # Folders of siblings, as analyze hands them to plan_renames.
+    folders = [names[_ : _ + _FOLDER_SIZE] for _ in range(0, len(names), _FOLDER_SIZE)]
+
+    def validate() -> None:
+        for name in names:
+            is_valid_name(name)
+
+    def suggest() -> None:
+        for name in invalid:
+            suggest_name(name)
+
+    def plan() -> None:
+        for siblings in folders:
+            found = [
+                (str(index), name)
+                for index, name in enumerate(siblings)
+                if not is_valid_name(name)
+            ]
+            plan_renames(found, siblings)
+
+    yield [
+        Case(name="longname/validate", run=validate, count=size, unit="names"),
+        Case(name="longname/suggest", run=suggest, count=len(invalid), unit="names"),
+        Case(name="longname/plan", run=plan, count=size, unit="names"),
+    ]
+
+
+SUITE = Suite(build=cases, size=100_000)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"longname": SUITE}, sys.argv[1:]))
@@ -0,0 +1,94 @@
+"""Scan and compress throughput for `app.pack` over folders of small files.
+
+Compression is only timed when 7z is installed.
+
+Usage: PYTHONPATH=src python benchmarks/pack.py [--scale X] [-o FILE]
+"""
+
+import asyncio
+import shutil
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import yaml
+from _harness import Case, Suite, feed_stdin, main, quiet
+
+from app.pack._compress import compress
+from app.pack._scan import scan
+
+
+_PAGES = 12
+
+_JPEG = b"\xff\xd8\xff\xe0" + bytes(2048)
+_PNG = b"\x89PNG\r\n\x1a\n" + bytes(2048)
+
+
+def make_tree(root: Path, count: int) -> None:
+    """`count` folders of scanned pages, as pack expects to find them."""
+    for index in range(count):
+        folder = root / f"[作者{index % 50}] 作品 {index}"
+        folder.mkdir()
+        for page in range(_PAGES):
+            data = _PNG if page % 3 == 0 else _JPEG
+            suffix = ".png" if page % 3 == 0 else ".jpg"
+            (folder / f"{page:03}{suffix}").write_bytes(data)
+        (folder / "info.txt").write_text(f"作品 {index}\n")
+
+
+@contextmanager
+def cases(size: int) -> Iterator[list[Case]]:
+    with TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, size)
+
+        def scan_all() -> None:
+            with quiet():
+                asyncio.run(scan([root]))
+
+        found = [
+            Case(
+                name="pack/scan",
+                run=scan_all,
+                count=size * (_PAGES + 1),
+                unit="files",
+                files=root,
+            )
+        ]
+
+        if shutil.which("7z") is not None:
+            # A handful of folders: 7z dominates and scales linearly.
+            folders = sorted(_ for _ in root.iterdir() if _.is_dir())[:10]
+            text = yaml.safe_dump([{"path": str(_)} for _ in folders])
+
+            def remove_archives() -> None:
+                for folder in folders:
+                    folder.with_name(f"{folder.name}.7z").unlink(missing_ok=True)
+
+            def compress_all() -> None:
+                with feed_stdin(text), quiet():
+                    asyncio.run(compress())
+
+            found.append(
+                Case(
+                    name="pack/compress",
+                    run=compress_all,
+                    count=len(folders),
+                    unit="folders",
+                    setup=remove_archives,
+                    files=root,
+                )
+            )
+        else:
+            print("7z not found, skipped pack/compress", file=sys.stderr)
+
+        yield found
+
+
+SUITE = Suite(build=cases, size=200)
+
+
+if __name__ == "__main__":
+    sys.exit(main({"pack": SUITE}, sys.argv[1:]))
@@ -0,0 +1,34 @@
+"""Run every benchmark suite and emit one JSON document.
+
+Usage:
+    PYTHONPATH=src python benchmarks/run.py [--suite NAME ...] [-o FILE]
+    PYTHONPATH=src python benchmarks/run.py --compare BASELINE.json
+
+With --compare, the change of each warm median against the baseline goes
+to stderr, and the exit status is 1 when any case got slower than
+--threshold percent.
+"""
+
+import sys
+
+import cg
+import dedup
+import faststart
+import jav
+import longname
+import pack
+from _harness import main
+
+
+SUITES = {
+    "dedup": dedup.SUITE,
+    "faststart": faststart.SUITE,
+    "pack": pack.SUITE,
+    "longname": longname.SUITE,
+    "jav": jav.SUITE,
+    "cg": cg.SUITE,
+}
+
+
+if __name__ == "__main__":
+    sys.exit(main(SUITES, sys.argv[1:]))
@@ -0,0 +1,3 @@
+#! /bin/sh
+
+exec uv run -m app.fsck "$@"
@@ -1,78 +1,48 @@
-import re
 import sys
-from pathlib import PurePath
+from pathlib import Path, PurePath
 
-import yaml
+from ..lib import (
+    create_default_drive,
+    iter_children,
+    iter_descendants,
+    open_snapshot,
+    open_yaml_list,
+)
+from ._rules import DEFAULT_RULES, Classifier, load_rules
+from ._types import AnalyzedData
 
-from ..lib import create_default_drive
-from ._types import AnalyzedData, DataType
 
+async def analyze(
+    root_path: PurePath, *, recursive: bool = False, rules_path: Path | None = None
+) -> None:
+    classifier = _create_classifier(rules_path)
 
-async def analyze(root_path: PurePath) -> None:
     async with create_default_drive() as drive:
         root = await drive.get_node_by_path(root_path)
-        children = await drive.get_children(root)
 
-        for child in children:
-            if child.is_trashed:
-                continue
+        with open_snapshot(drive) as db, open_yaml_list(sys.stdout) as writer:
+            iter_rows = iter_descendants if recursive else iter_children
+            for child in iter_rows(db, root.id):
+                rv = classifier.classify(child.name)
+                if not rv:
+                    continue
 
-            rv = _parse_name(child.name)
-            if not rv:
-                continue
+                data: AnalyzedData = {
+                    "id": child.id,
+                    "name": child.name,
+                    "type": rv,
+                }
+                writer.write(data)
 
-            rv = _analyze_name(*rv)
-            if not rv:
-                continue
 
-            data: AnalyzedData = {
-                "id": child.id,
-                "name": child.name,
-                "type": rv,
-            }
-
-            yaml.dump(
-                [data],
-                default_flow_style=False,
-                encoding="utf-8",
-                stream=sys.stdout,
-                allow_unicode=True,
-            )
-
-
-async def debug(name: str) -> None:
-    rv = _parse_name(name)
-    if not rv:
-        return
-
-    rv = _analyze_name(*rv)
+async def debug(name: str, *, rules_path: Path | None = None) -> None:
+    rv = _create_classifier(rules_path).classify(name)
     if not rv:
         return
 
     print(rv)
 
 
-def _parse_name(name: str) -> tuple[str, list[str]] | None:
-    rv = re.search(r"^\(([^\)]+)\)", name)
-    if rv is None:
-        return
-
-    publisher = rv.group(1)
-
-    rv = re.findall(r"\(([^\)]+)\)", name)
-
-    return publisher, rv[1:]
-
-
-def _analyze_name(publisher: str, tags: list[str]) -> DataType | None:
-    if publisher == "成年コミック":
-        return "comic"
-
-    if not tags:
-        return None
-
-    parody = tags[-1]
-    if parody == "オリジナル":
-        return "original"
-
-    return None
+def _create_classifier(rules_path: Path | None) -> Classifier:
+    rules = DEFAULT_RULES if rules_path is None else load_rules(rules_path)
+    return Classifier(rules)
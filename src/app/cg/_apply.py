@@ -1,32 +1,60 @@
 import sys
+import time
 from pathlib import PurePath
 
 import yaml
 from wcpan.drive.core.exceptions import DriveError
 from wcpan.drive.core.types import Drive, Node
 
-from ..lib import create_default_drive
-from ._types import AnalyzedData
+from ..lib import (
+    create_default_drive,
+    gather_bounded,
+    print_throughput,
+    try_drive_change,
+)
+from ._types import AnalyzedData, DataType
 
 
-async def apply(*, comic_path: PurePath, original_path: PurePath) -> None:
+type _Target = tuple[Node, PurePath]
+
+
+async def apply(*, destinations: dict[DataType, PurePath], jobs: int = 4) -> None:
     async with create_default_drive() as drive:
-        comic = await drive.get_node_by_path(comic_path)
-        original = await drive.get_node_by_path(original_path)
-
-        data_list: list[AnalyzedData] = yaml.safe_load(stream=sys.stdin)
-        for data in data_list:
-            try:
-                node = await drive.get_node_by_id(data["id"])
-                match data["type"]:
-                    case "comic":
-                        await _move(node, comic, drive=drive, dst_path=comic_path)
-                    case "original":
-                        await _move(node, original, drive=drive, dst_path=original_path)
-            except DriveError as e:
-                print(e, file=sys.stderr)
-
-
-async def _move(src: Node, dst: Node, /, *, drive: Drive, dst_path: PurePath) -> None:
+        targets: dict[DataType, _Target] = {
+            type_: (await drive.get_node_by_path(path), path)
+            for type_, path in destinations.items()
+        }
+
+        data_list: list[AnalyzedData] = yaml.safe_load(stream=sys.stdin) or []
+        started = time.monotonic()
+
+        nodes = await gather_bounded(
+            lambda data: _resolve(data, drive=drive), data_list, jobs=jobs
+        )
+        moved = await gather_bounded(
+            lambda pair: _move(*pair, drive=drive),
+            [
+                (node, targets[data["type"]])
+                for data, node in zip(data_list, nodes)
+                if node and data["type"] in targets
+            ],
+            jobs=jobs,
+        )
+
+        print_throughput("moved", sum(moved), len(data_list), started)
+
+
+async def _resolve(data: AnalyzedData, /, *, drive: Drive) -> Node | None:
+    try:
+        return await drive.get_node_by_id(data["id"])
+    except DriveError as e:
+        print(e, file=sys.stderr)
+        return None
+
+
+async def _move(src: Node, target: _Target, /, *, drive: Drive) -> bool:
+    dst, dst_path = target
+    if not await try_drive_change(lambda: drive.move(src, new_parent=dst)):
+        return False
     print(f"move: {src.name} -> {dst_path}")
-    await drive.move(src, new_parent=dst)
+    return True
@@ -1,10 +1,12 @@
 from argparse import ArgumentParser
 from collections.abc import Awaitable, Callable
-from pathlib import PurePath
+from pathlib import Path, PurePath
 from typing import Literal
 
+from ..lib import get_default_config_path
 from ._analyze import analyze, debug
 from ._apply import apply
+from ._types import DataType
 
 
 type Action = Callable[[], Awaitable[None]]
@@ -12,29 +14,67 @@ type Action = Callable[[], Awaitable[None]]
 
 def parse_args(args: list[str]) -> Action:
     parser = ArgumentParser()
+    parser.add_argument(
+        "--rules",
+        default=str(get_default_config_path() / "cg.yaml"),
+        help="Classification rules; built-in rules if missing (default: %(default)s)",
+    )
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     analyze_parser = subparsers.add_parser("analyze", help="Analyze a given path")
     analyze_parser.add_argument("path", help="Path to analyze")
+    analyze_parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        default=False,
+        help="Also analyze nested folders",
+    )
 
     apply_parser = subparsers.add_parser(
         "apply", help="Apply sheet to stdout from stdin"
     )
-    apply_parser.add_argument("--comic", required=True, help="Path to comic")
-    apply_parser.add_argument("--original", required=True, help="Path to original")
+    apply_parser.add_argument(
+        "--to",
+        action="append",
+        default=[],
+        metavar="TYPE=PATH",
+        help="Destination for a type, may be repeated",
+    )
+    apply_parser.add_argument("--comic", help="Path to comic, same as --to comic=PATH")
+    apply_parser.add_argument(
+        "--original", help="Path to original, same as --to original=PATH"
+    )
+    apply_parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Concurrent moves (default: 4)"
+    )
 
     debug_parser = subparsers.add_parser("debug", help="Debug name")
     debug_parser.add_argument("name", help="File name")
 
     kwargs = parser.parse_args(args)
     command: Literal["analyze", "apply", "debug"] = kwargs.command
+    rules_path = Path(kwargs.rules).expanduser()
     match command:
         case "analyze":
-            return lambda: analyze(PurePath(kwargs.path))
-        case "apply":
-            return lambda: apply(
-                comic_path=PurePath(kwargs.comic),
-                original_path=PurePath(kwargs.original),
+            return lambda: analyze(
+                PurePath(kwargs.path),
+                recursive=kwargs.recursive,
+                rules_path=rules_path,
             )
+        case "apply":
+            destinations: dict[DataType, PurePath] = {}
+            for value in kwargs.to:
+                type_, sep, path = value.partition("=")
+                if not sep or not type_ or not path:
+                    parser.error(f"invalid --to value: {value}")
+                destinations[type_] = PurePath(path)
+            if kwargs.comic:
+                destinations["comic"] = PurePath(kwargs.comic)
+            if kwargs.original:
+                destinations["original"] = PurePath(kwargs.original)
+            if not destinations:
+                parser.error("apply needs at least one destination")
+            return lambda: apply(destinations=destinations, jobs=kwargs.jobs)
         case "debug":
-            return lambda: debug(kwargs.name)
+            return lambda: debug(kwargs.name, rules_path=rules_path)
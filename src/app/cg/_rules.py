@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import yaml
+
+from ._types import DataType
+
+
+type MatchKind = Literal["publisher", "last_tag", "regex"]
+
+
+@dataclass(frozen=True, kw_only=True)
+class Rule:
+    type: DataType
+    kind: MatchKind
+    value: str
+
+
+DEFAULT_RULES = [
+    Rule(type="comic", kind="publisher", value="成年コミック"),
+    Rule(type="original", kind="last_tag", value="オリジナル"),
+]
+
+# Text between tags: a "(" can only appear here as an empty "()".
+_GAP = r"[^(]*(?:\(\)[^(]*)*"
+# A leading tag is the publisher. The repeated group then steps over the
+# remaining tags exactly like re.findall(r"\(([^\)]+)\)") and keeps the last.
+_TAGS = (
+    r"(?:\((?P<publisher>[^)]+)\)"
+    r"(?:" + _GAP + r"\((?P<last_tag>[^)]+)\))*)?"
+)
+# A backslash and digit not itself escaped: a numbered backreference, which
+# would count the groups of every rule spliced in before it.
+_BACKREF = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]")
+
+
+class Classifier:
+    def __init__(self, rules: list[Rule]) -> None:
+        self._types = [rule.type for rule in rules]
+        self._publishers: dict[str, int] = {}
+        self._last_tags: dict[str, int] = {}
+        self._regex_groups: list[tuple[str, int]] = []
+
+        lookaheads: list[str] = []
+        for index, rule in enumerate(rules):
+            match rule.kind:
+                case "publisher":
+                    self._publishers.setdefault(rule.value, index)
+                case "last_tag":
+                    self._last_tags.setdefault(rule.value, index)
+                case "regex":
+                    self._regex_groups.append((f"_{index}", index))
+                    lookaheads.append(_lookahead(index, rule.value))
+        self._pattern = re.compile(_combine(lookaheads))
+
+    def classify(self, name: str) -> DataType | None:
+        rv = self._pattern.match(name)
+        assert rv is not None
+
+        best = len(self._types)
+        for group, index in self._regex_groups:
+            if rv[group] is not None:
+                best = index
+                break
+        publisher, last_tag = rv.group("publisher", "last_tag")
+        if publisher is not None:
+            best = min(best, self._publishers.get(publisher, best))
+        if last_tag is not None:
+            best = min(best, self._last_tags.get(last_tag, best))
+
+        if best >= len(self._types):
+            return None
+        return self._types[best]
+
+
+def _lookahead(index: int, regex: str) -> str:
+    return rf"(?=(?P<_{index}>[\s\S]*?(?:{regex})))"
+
+
+def _combine(lookaheads: list[str]) -> str:
+    # Regex rules are tried in order as zero-width alternatives at the
+    # start, so one match() both picks the first regex hit and scans tags.
+    prefix = f"(?:{'|'.join(lookaheads)})?" if lookaheads else ""
+    return prefix + _TAGS
+
+
+def load_rules(path: Path) -> list[Rule]:
+    if not path.exists():
+        return DEFAULT_RULES
+    with path.open("r", encoding="utf-8") as fin:
+        return _validate_rules(yaml.safe_load(fin))
+
+
+def _validate_rules(value: Any) -> list[Rule]:
+    if not isinstance(value, dict):
+        raise ValueError("rules must be a mapping")
+    if type(value.get("version")) is not int or value["version"] != 1:
+        raise ValueError("unsupported rules version")
+    entries = value.get("rules")
+    if not isinstance(entries, list):
+        raise ValueError("rules must be a list")
+
+    rules: list[Rule] = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"rule {index} must be a mapping")
+        if not isinstance(entry.get("type"), str) or not entry["type"]:
+            raise ValueError(f"rule {index} has invalid type")
+        kinds = [kind for kind in ("publisher", "last_tag", "regex") if kind in entry]
+        if len(kinds) != 1:
+            raise ValueError(
+                f"rule {index} needs exactly one of publisher, last_tag, regex"
+            )
+        kind: MatchKind = kinds[0]
+        if not isinstance(entry[kind], str) or not entry[kind]:
+            raise ValueError(f"rule {index} has invalid {kind}")
+        rules.append(Rule(type=entry["type"], kind=kind, value=entry[kind]))
+    _validate_regexes(rules)
+    return rules
+
+
+def _validate_regexes(rules: list[Rule]) -> None:
+    # A regex can compile alone and still break the combined pattern: inline
+    # global flags are no longer at the start, and group names can clash with
+    # the tag groups or another rule. Growing the pattern one rule at a time
+    # names the rule that broke it.
+    lookaheads: list[str] = []
+    for index, rule in enumerate(rules):
+        if rule.kind != "regex":
+            continue
+        if _BACKREF.search(rule.value):
+            raise ValueError(
+                f"rule {index} has invalid regex: "
+                "numbered backreferences are not supported, use (?P=name)"
+            )
+        lookaheads.append(_lookahead(index, rule.value))
+        try:
+            re.compile(_combine(lookaheads))
+        except re.error as e:
+            raise ValueError(f"rule {index} has invalid regex: {e}") from e
@@ -1,7 +1,8 @@
-from typing import Literal, TypedDict
+from typing import TypedDict
 
 
-type DataType = Literal["comic", "original"]
+# Destination type, as named by the classification rules.
+type DataType = str
 
 
 class AnalyzedData(TypedDict):
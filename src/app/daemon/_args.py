@@ -0,0 +1,52 @@
+from argparse import REMAINDER, ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+from ._client import run
+from ._protocol import TOOLS, get_default_socket_path
+
+
+type Action = Callable[[], int]
+
+
+def parse_args(args: list[str]) -> Action:
+    parser = ArgumentParser("daemon")
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=get_default_socket_path(),
+        help="Unix socket path (default: %(default)s)",
+    )
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    subparsers.add_parser("serve", help="Keep one drive open and serve tools")
+
+    run_parser = subparsers.add_parser("run", help="Run a tool in the daemon")
+    run_parser.add_argument("tool", help=", ".join(TOOLS))
+    run_parser.add_argument("args", nargs=REMAINDER, help="Tool arguments")
+
+    kwargs = parser.parse_args(args)
+    command: Literal["serve", "run"] | None = kwargs.command
+    socket_path: Path = kwargs.socket.expanduser()
+    match command:
+        case "serve":
+            return lambda: _serve(socket_path)
+        case "run":
+            return lambda: run(socket_path, kwargs.tool, kwargs.args)
+        case _:
+            parser.print_help()
+            raise SystemExit(1)
+
+
+def _serve(socket_path: Path) -> int:
+    # Imported here so `run` starts without loading asyncio or the drive stack.
+    import asyncio
+
+    from ._server import serve
+
+    try:
+        asyncio.run(serve(socket_path))
+    except KeyboardInterrupt:
+        pass
+    return 0
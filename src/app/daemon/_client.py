@@ -0,0 +1,48 @@
+import json
+import socket
+import sys
+from pathlib import Path
+from typing import BinaryIO
+
+from ._protocol import EXIT, FRAME_HEADER, STDERR, STDOUT
+
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def run(socket_path: Path, tool: str, args: list[str]) -> int:
+    outputs = {STDOUT: sys.stdout.buffer, STDERR: sys.stderr.buffer}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"daemon is not running at {socket_path}", file=sys.stderr)
+            return 1
+
+        header = json.dumps({"tool": tool, "args": args}) + "\n"
+        sock.sendall(header.encode("utf-8"))
+        if not sys.stdin.isatty():
+            _send_all(sock, sys.stdin.buffer)
+        sock.shutdown(socket.SHUT_WR)
+
+        with sock.makefile("rb") as fin:
+            return _receive(fin, outputs)
+
+
+def _send_all(sock: socket.socket, stream: BinaryIO) -> None:
+    while chunk := stream.read(_CHUNK_SIZE):
+        sock.sendall(chunk)
+
+
+def _receive(fin: BinaryIO, outputs: dict[bytes, BinaryIO]) -> int:
+    while header := fin.read(FRAME_HEADER.size):
+        channel, size = FRAME_HEADER.unpack(header)
+        payload = fin.read(size)
+        if channel == EXIT:
+            return int(payload)
+        output = outputs[channel]
+        output.write(payload)
+        output.flush()
+
+    print("daemon closed the connection", file=sys.stderr)
+    return 1
@@ -0,0 +1,37 @@
+"""Wire format shared by the daemon and its client.
+
+The client sends one JSON line, {"tool": ..., "args": [...]}, then its
+stdin until it shuts down writing. The daemon answers with frames: a
+one-byte channel, a 4-byte big-endian length and the payload. The last
+frame is EXIT, whose payload is the exit status in ASCII. "tool" is one of
+the names in TOOLS.
+"""
+
+import struct
+from pathlib import Path
+
+
+STDOUT = b"o"
+STDERR = b"e"
+EXIT = b"x"
+
+FRAME_HEADER = struct.Struct("!cI")
+
+# Tools the daemon can run, as (module, entry point taking argv).
+TOOLS = {
+    "cg": ("app.cg._main", "_main"),
+    "finddup": ("app.finddup._main", "_main"),
+    "longname": ("app.longname._main", "_main"),
+    "lseh": ("app.lseh", "main"),
+    "nu": ("app.normalize_unicode._main", "_main"),
+}
+
+
+def pack_frame(channel: bytes, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(channel, len(payload)) + payload
+
+
+def get_default_socket_path() -> Path:
+    # Same place as app.lib.get_default_cache_path(), without importing the
+    # drive stack into the client.
+    return Path("~/.cache/wcpan.drive/daemon.sock").expanduser()
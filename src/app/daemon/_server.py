@@ -0,0 +1,116 @@
+import asyncio
+import io
+import json
+import os
+import sys
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+
+from wcpan.drive.core.types import Drive
+
+from ..lib import create_default_drive, share_drive
+from ._protocol import EXIT, STDERR, STDOUT, TOOLS, pack_frame
+
+
+type _Entry = Callable[[list[str]], Awaitable[int]]
+
+
+async def serve(socket_path: Path) -> None:
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+
+    async with create_default_drive() as drive:
+        # Tools share one drive and the process-wide stdio, so they take
+        # turns; clients still upload their stdin while they wait.
+        lock = asyncio.Lock()
+        handler = partial(_handle, drive=drive, lock=lock)
+        with _umask(0o177):
+            # Owner-only from the moment it exists: whoever can connect can
+            # run tools against the drive.
+            server = await asyncio.start_unix_server(handler, path=socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+async def _handle(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    *,
+    drive: Drive,
+    lock: asyncio.Lock,
+) -> None:
+    try:
+        request = json.loads(await reader.readline())
+        stdin = (await reader.read()).decode("utf-8")
+
+        async with lock:
+            share_drive(drive)
+            stdout = _FrameStream(writer, STDOUT)
+            stderr = _FrameStream(writer, STDERR)
+            with redirect_stdout(stdout), redirect_stderr(stderr), _stdin(stdin):
+                status = await _run(request["tool"], request["args"])
+
+        writer.write(pack_frame(EXIT, str(status).encode("ascii")))
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _run(tool: str, args: list[str]) -> int:
+    if tool not in TOOLS:
+        print(f"unknown tool: {tool}", file=sys.stderr)
+        return 1
+
+    module, name = TOOLS[tool]
+    entry: _Entry = getattr(import_module(module), name)
+    try:
+        return await entry(args)
+    except SystemExit as e:
+        # argparse exits on --help and on usage errors.
+        return e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
+@contextmanager
+def _umask(mask: int) -> Iterator[None]:
+    saved = os.umask(mask)
+    try:
+        yield
+    finally:
+        os.umask(saved)
+
+
+@contextmanager
+def _stdin(text: str) -> Iterator[None]:
+    saved = sys.stdin
+    sys.stdin = io.StringIO(text)
+    try:
+        yield
+    finally:
+        sys.stdin = saved
+
+
+class _FrameStream(io.TextIOBase):
+    """A text stream that forwards each write as a frame on one channel."""
+
+    def __init__(self, writer: asyncio.StreamWriter, channel: bytes) -> None:
+        self._writer = writer
+        self._channel = channel
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        if s and not self._writer.is_closing():
+            self._writer.write(pack_frame(self._channel, s.encode("utf-8")))
+        return len(s)
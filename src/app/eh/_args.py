@@ -1,11 +1,63 @@
 from argparse import ArgumentParser
 from collections.abc import Sequence
+from datetime import timedelta
 from pathlib import Path
 
+from ..lib import get_default_cache_path
+from ._crawl import DEFAULT_HOST
+from ._types import Arguments
 
-def parse_args(args: Sequence[str]) -> Path:
+
+def parse_args(args: Sequence[str]) -> Arguments:
     parser = ArgumentParser("eh")
     parser.add_argument("path", type=str)
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help="search endpoint, e.g. a local stub for offline runs",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=4,
+        help="maximum concurrent requests (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1.0,
+        help="maximum requests per second, 0 for unlimited (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=str(get_default_cache_path() / "eh.sqlite"),
+        help="search cache database (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=7.0,
+        help="days before a cached search is revalidated (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        default=False,
+        help="crawl every archive, not only those newer than the last run",
+    )
 
     kwargs = parser.parse_args(args)
-    return Path(kwargs.path)
+    if kwargs.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return Arguments(
+        path=Path(kwargs.path),
+        host=kwargs.host,
+        jobs=kwargs.jobs,
+        rate=kwargs.rate,
+        cache=Path(kwargs.cache).expanduser(),
+        max_age=timedelta(days=kwargs.max_age),
+        full=kwargs.full,
+    )
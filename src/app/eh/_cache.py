@@ -0,0 +1,97 @@
+import json
+import sqlite3
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from dataclasses import asdict
+from datetime import UTC, datetime
+from pathlib import Path
+
+from ._types import CachedSearch, CrawledData
+
+
+_SQL_CREATE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS searches (
+        query TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        results TEXT NOT NULL,
+        fetched_at INTEGER NOT NULL,
+        PRIMARY KEY (query)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS watermarks (
+        path TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        PRIMARY KEY (path)
+    );
+    """,
+]
+
+
+class CrawlCache:
+    def __init__(self, db: sqlite3.Connection, /) -> None:
+        self._db = db
+
+    def get(self, query: str) -> CachedSearch | None:
+        row = self._db.execute(
+            "SELECT etag, last_modified, results, fetched_at "
+            "FROM searches WHERE query = ?;",
+            (query,),
+        ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, results, fetched_at = row
+        return CachedSearch(
+            etag=etag,
+            last_modified=last_modified,
+            results=[CrawledData(**_) for _ in json.loads(results)],
+            fetched_at=datetime.fromtimestamp(fetched_at, UTC),
+        )
+
+    def put(self, query: str, search: CachedSearch) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches "
+                "(query, etag, last_modified, results, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?);",
+                (
+                    query,
+                    search.etag,
+                    search.last_modified,
+                    json.dumps(
+                        [asdict(_) for _ in search.results],
+                        ensure_ascii=False,
+                        separators=(",", ":"),
+                    ),
+                    int(search.fetched_at.timestamp()),
+                ),
+            )
+
+    def get_watermark(self, path: Path) -> int | None:
+        row = self._db.execute(
+            "SELECT item_id FROM watermarks WHERE path = ?;", (str(path),)
+        ).fetchone()
+        if not row:
+            return None
+        return row[0]
+
+    def set_watermark(self, path: Path, item_id: int) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT INTO watermarks (path, item_id) VALUES (?, ?) "
+                "ON CONFLICT (path) DO UPDATE "
+                "SET item_id = MAX(item_id, excluded.item_id);",
+                (str(path), item_id),
+            )
+
+
+@contextmanager
+def open_cache(path: Path) -> Iterator[CrawlCache]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path)) as db:
+        with db:
+            for sql in _SQL_CREATE_TABLES:
+                db.execute(sql)
+        yield CrawlCache(db)
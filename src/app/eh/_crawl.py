@@ -1,41 +1,138 @@
+import asyncio
+import codecs
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
 from urllib.parse import urljoin
 
-from aiohttp import ClientSession
-from bs4 import BeautifulSoup
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 
-from ._types import AnalyzedData, CrawledData
+from ._cache import CrawlCache
+from ._extract import AnchorExtractor
+from ._types import AnalyzedData, CachedSearch, CrawledData, SearchPage
 
 
-_HOST = "https://sukebei.nyaa.si/"
+DEFAULT_HOST = "https://sukebei.nyaa.si/"
+_CHUNK_SIZE = 64 * 1024
 
 
-async def crawl(analyzed: AnalyzedData) -> list[CrawledData]:
-    html = await _get_from_nyaa(analyzed.title)
+class NyaaSession:
+    def __init__(self, session: ClientSession, /, *, host: str, rate: float) -> None:
+        self._session = session
+        self._host = host
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
 
-    anchors = html.select("tr > td:nth-child(2) > a:nth-child(1)")
-    pairs = ((a.get("title"), a.get("href")) for a in anchors)
-    return [
-        CrawledData(title=title.strip(), url=urljoin(_HOST, href))
-        for title, href in pairs
-        if isinstance(title, str) and isinstance(href, str) and _is_allowed(title)
-    ]
+    @property
+    def host(self) -> str:
+        return self._host
 
+    async def search(
+        self, text: str, *, etag: str | None = None, last_modified: str | None = None
+    ) -> SearchPage | None:
+        """Return the result rows, or None if the validators still match."""
+        headers: dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
 
-async def _get_from_nyaa(text: str) -> BeautifulSoup:
-    async with (
-        ClientSession() as session,
-        session.get(
-            _HOST,
+        await self._wait_for_slot()
+        async with self._session.get(
+            self._host,
             params={
                 "f": "0",
                 "c": "1_0",
                 "q": text,
             },
-        ) as response,
-    ):
-        response.raise_for_status()
-        html = await response.text(errors="ignore")
-    return BeautifulSoup(html, "html.parser")
+            headers=headers,
+        ) as response:
+            if response.status == 304 and headers:
+                return None
+            response.raise_for_status()
+            # get_encoding() would sniff the body, which is not read yet.
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(
+                errors="ignore"
+            )
+            parser = AnchorExtractor()
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                parser.feed(decoder.decode(chunk))
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            return SearchPage(
+                anchors=parser.anchors,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+    async def _wait_for_slot(self) -> None:
+        # Space out request starts evenly instead of sleeping after each one,
+        # so concurrent requests share one rate budget.
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+@asynccontextmanager
+async def open_session(
+    *, host: str = DEFAULT_HOST, jobs: int, rate: float
+) -> AsyncIterator[NyaaSession]:
+    connector = TCPConnector(limit=jobs, keepalive_timeout=60)
+    async with ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(total=60),
+    ) as session:
+        yield NyaaSession(session, host=host, rate=rate)
+
+
+async def crawl(
+    analyzed: AnalyzedData,
+    *,
+    session: NyaaSession,
+    cache: CrawlCache,
+    max_age: timedelta,
+) -> list[CrawledData]:
+    query = analyzed.title
+    cached = cache.get(query)
+    now = datetime.now(UTC)
+    if cached and now - cached.fetched_at < max_age:
+        return cached.results
+
+    page = await session.search(
+        query,
+        etag=cached.etag if cached else None,
+        last_modified=cached.last_modified if cached else None,
+    )
+    if page is None:
+        assert cached is not None
+        cache.put(
+            query,
+            CachedSearch(
+                etag=cached.etag,
+                last_modified=cached.last_modified,
+                results=cached.results,
+                fetched_at=now,
+            ),
+        )
+        return cached.results
+
+    results = [
+        CrawledData(title=title.strip(), url=urljoin(session.host, href))
+        for title, href in page.anchors
+        if _is_allowed(title)
+    ]
+    cache.put(
+        query,
+        CachedSearch(
+            etag=page.etag,
+            last_modified=page.last_modified,
+            results=results,
+            fetched_at=now,
+        ),
+    )
+    return results
 
 
 def _is_allowed(title: str) -> bool:
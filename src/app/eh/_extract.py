@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+
+# Elements that never hold children, so they are counted but not opened.
+_VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "basefont",
+        "bgsound",
+        "br",
+        "col",
+        "command",
+        "embed",
+        "frame",
+        "hr",
+        "image",
+        "img",
+        "input",
+        "isindex",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "nextid",
+        "param",
+        "source",
+        "spacer",
+        "track",
+        "wbr",
+    }
+)
+
+
+@dataclass(kw_only=True)
+class _Element:
+    tag: str
+    index: int
+    children: int = field(default=0)
+
+
+class AnchorExtractor(HTMLParser):
+    """Streaming equivalent of `tr > td:nth-child(2) > a:nth-child(1)`."""
+
+    # Only the chain of open elements is kept, with each element's position
+    # among its siblings. Nesting follows BeautifulSoup's html.parser builder:
+    # void elements never open, and an end tag closes the nearest open element
+    # of the same name.
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._stack = [_Element(tag="", index=0)]
+        self.anchors: list[tuple[str, str]] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        parent = self._stack[-1]
+        parent.children += 1
+        element = _Element(tag=tag, index=parent.children)
+        if self._is_match(element):
+            self._collect(attrs)
+        if tag not in _VOID_ELEMENTS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        parent = self._stack[-1]
+        parent.children += 1
+        if self._is_match(_Element(tag=tag, index=parent.children)):
+            self._collect(attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                return
+
+    def _is_match(self, element: _Element) -> bool:
+        if element.tag != "a" or element.index != 1 or len(self._stack) < 3:
+            return False
+        td = self._stack[-1]
+        tr = self._stack[-2]
+        return td.tag == "td" and td.index == 2 and tr.tag == "tr"
+
+    def _collect(self, attrs: list[tuple[str, str | None]]) -> None:
+        # Repeated attributes keep the last value, missing values are empty.
+        values = {key: value or "" for key, value in attrs}
+        title = values.get("title")
+        href = values.get("href")
+        if title is not None and href is not None:
+            self.anchors.append((title, href))
+
+
+def extract_anchors(html: str) -> list[tuple[str, str]]:
+    parser = AnchorExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.anchors
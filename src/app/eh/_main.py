@@ -1,6 +1,9 @@
 import asyncio
 import sys
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
 from dataclasses import asdict
+from datetime import timedelta
 from pathlib import Path
 from typing import NoReturn
 
@@ -8,38 +11,88 @@ import yaml
 
 from ._analyze import analyze
 from ._args import parse_args
-from ._crawl import crawl
+from ._cache import CrawlCache, open_cache
+from ._crawl import NyaaSession, crawl, open_session
+from ._types import AnalyzedData, CrawledData
 
 
 async def _main(args: list[str]) -> int:
-    path = _require_directory(parse_args(args))
+    kwargs = parse_args(args)
+    path = _require_directory(kwargs.path)
 
     analyzed = ((entry, analyze(entry.name)) for entry in path.iterdir())
     sorted_ = sorted(
         ((entry, data) for entry, data in analyzed if data),
         key=lambda pair: -1 * pair[1].item_id,
     )
-    crawled = ((entry, await crawl(data)) for entry, data in sorted_)
-    async for entry, data in crawled:
-        if not data:
-            continue
-        yaml.dump(
-            [
-                {
-                    "name": entry.name,
-                    "nyaa": [asdict(_) for _ in data],
-                }
-            ],
-            stream=sys.stdout,
-            default_flow_style=False,
-            allow_unicode=True,
-            encoding="utf-8",
-        )
-        await asyncio.sleep(1)
+
+    with open_cache(kwargs.cache) as cache:
+        watermark = None if kwargs.full else cache.get_watermark(path)
+        if watermark is not None:
+            sorted_ = [pair for pair in sorted_ if pair[1].item_id > watermark]
+
+        async with open_session(
+            host=kwargs.host, jobs=kwargs.jobs, rate=kwargs.rate
+        ) as session:
+            crawled = _crawl_in_order(
+                sorted_,
+                session=session,
+                cache=cache,
+                max_age=kwargs.max_age,
+                jobs=kwargs.jobs,
+            )
+            async for entry, data in crawled:
+                if not data:
+                    continue
+                yaml.dump(
+                    [
+                        {
+                            "name": entry.name,
+                            "nyaa": [asdict(_) for _ in data],
+                        }
+                    ],
+                    stream=sys.stdout,
+                    default_flow_style=False,
+                    allow_unicode=True,
+                    encoding="utf-8",
+                )
+
+        # Only advance after a complete pass, so an interrupted run retries
+        # the archives it did not reach.
+        if sorted_:
+            cache.set_watermark(path, sorted_[0][1].item_id)
 
     return 0
 
 
+async def _crawl_in_order(
+    pairs: Iterable[tuple[Path, AnalyzedData]],
+    *,
+    session: NyaaSession,
+    cache: CrawlCache,
+    max_age: timedelta,
+    jobs: int,
+) -> AsyncIterator[tuple[Path, list[CrawledData]]]:
+    # Keep at most `jobs` crawls in flight and yield them in submission order,
+    # so the output stays sorted while later requests overlap earlier ones.
+    pending: deque[tuple[Path, asyncio.Task[list[CrawledData]]]] = deque()
+    try:
+        for entry, data in pairs:
+            task = asyncio.create_task(
+                crawl(data, session=session, cache=cache, max_age=max_age)
+            )
+            pending.append((entry, task))
+            if len(pending) >= jobs:
+                entry, task = pending.popleft()
+                yield entry, await task
+        while pending:
+            entry, task = pending.popleft()
+            yield entry, await task
+    finally:
+        for _entry, task in pending:
+            task.cancel()
+
+
 def _require_directory(path: Path) -> Path:
     path = path.expanduser().resolve(strict=True)
     if not path.is_dir():
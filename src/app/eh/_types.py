@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -12,3 +14,29 @@ class AnalyzedData:
 class CrawledData:
     title: str
     url: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class SearchPage:
+    anchors: list[tuple[str, str]]
+    etag: str | None
+    last_modified: str | None
+
+
+@dataclass(frozen=True, kw_only=True)
+class CachedSearch:
+    etag: str | None
+    last_modified: str | None
+    results: list[CrawledData]
+    fetched_at: datetime
+
+
+@dataclass(frozen=True, kw_only=True)
+class Arguments:
+    path: Path
+    host: str
+    jobs: int
+    rate: float
+    cache: Path
+    max_age: timedelta
+    full: bool
@@ -0,0 +1,77 @@
+import sqlite3
+import sys
+from pathlib import PurePath
+
+from ..lib import (
+    NodeRow,
+    create_default_drive,
+    humanize,
+    iter_duplicates,
+    open_snapshot,
+    open_yaml_list,
+)
+from ._types import ManifestEntry, ManifestFile
+
+
+async def analyze() -> None:
+    async with create_default_drive() as drive:
+        sets = copies = reclaimable = 0
+        with open_snapshot(drive) as db, open_yaml_list(sys.stdout) as writer:
+            paths = _PathResolver(db)
+            for keep, *trash in iter_duplicates(db):
+                # The oldest copy stays; move entries around to keep another.
+                entry: ManifestEntry = {
+                    "hash": keep.hash or "",
+                    "size": keep.size or 0,
+                    "keep": _to_file(keep, paths),
+                    "trash": [_to_file(_, paths) for _ in trash],
+                }
+                writer.write(entry)
+                sets += 1
+                copies += len(trash)
+                reclaimable += (keep.size or 0) * len(trash)
+
+    print(
+        f"{sets} duplicate sets, {copies} extra copies, "
+        f"{humanize(reclaimable)} reclaimable",
+        file=sys.stderr,
+    )
+
+
+def _to_file(row: NodeRow, paths: "_PathResolver") -> ManifestFile:
+    return {"id": row.id, "path": str(paths.get(row.parent_id) / row.name)}
+
+
+class _PathResolver:
+    """Folder paths from the node cache, each folder looked up once."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+        self._paths: dict[str, PurePath] = {}
+
+    def get(self, node_id: str | None) -> PurePath:
+        if node_id is None:
+            return PurePath("/")
+
+        # Climb to the nearest known folder, then fill in the way back.
+        missing: list[tuple[str, str]] = []
+        while node_id is not None and node_id not in self._paths:
+            row = self._db.execute(
+                "SELECT nodes.name, parents.parent_id "
+                "FROM nodes LEFT JOIN parents ON nodes.id = parents.id "
+                "WHERE nodes.id = ?;",
+                (node_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(node_id)
+            name, parent_id = row
+            missing.append((node_id, name))
+            node_id = parent_id
+
+        path = self._paths[node_id] if node_id is not None else None
+        for missing_id, name in reversed(missing):
+            # The root is the one without a parent.
+            path = PurePath("/") if path is None else path / name
+            self._paths[missing_id] = path
+        assert path is not None
+        return path
@@ -0,0 +1,73 @@
+import sys
+import time
+
+import yaml
+from wcpan.drive.core.exceptions import DriveError
+from wcpan.drive.core.types import Drive, Node
+
+from ..lib import (
+    create_default_drive,
+    gather_bounded,
+    humanize,
+    print_throughput,
+    try_drive_change,
+)
+from ._types import ManifestEntry, ManifestFile
+
+
+async def apply(*, jobs: int = 4) -> None:
+    entries: list[ManifestEntry] = yaml.safe_load(sys.stdin) or []
+
+    async with create_default_drive() as drive:
+        started = time.monotonic()
+
+        # Never trash the last copy: the keeper must still be there, unchanged.
+        keepers = await gather_bounded(
+            lambda entry: _check_keeper(entry, drive=drive), entries, jobs=jobs
+        )
+        pending = [
+            (entry, file_)
+            for entry, ok in zip(entries, keepers)
+            if ok
+            for file_ in entry["trash"]
+        ]
+        trashed = await gather_bounded(
+            lambda pair: _trash(*pair, drive=drive), pending, jobs=jobs
+        )
+
+        total = sum(len(_["trash"]) for _ in entries)
+        size = sum(entry["size"] for (entry, _), ok in zip(pending, trashed) if ok)
+        print_throughput("trashed", sum(trashed), total, started, detail=humanize(size))
+
+
+async def _check_keeper(entry: ManifestEntry, /, *, drive: Drive) -> bool:
+    if await _get_unchanged(entry, entry["keep"], drive=drive) is None:
+        print(f"keeper changed, skipped: {entry['keep']['path']}", file=sys.stderr)
+        return False
+    return True
+
+
+async def _trash(entry: ManifestEntry, file_: ManifestFile, /, *, drive: Drive) -> bool:
+    if file_["id"] == entry["keep"]["id"]:
+        print(f"keeper listed for trash, skipped: {file_['path']}", file=sys.stderr)
+        return False
+    node = await _get_unchanged(entry, file_, drive=drive)
+    if node is None:
+        print(f"changed, skipped: {file_['path']}", file=sys.stderr)
+        return False
+    if not await try_drive_change(lambda: drive.delete(node)):
+        return False
+    print(f"trash: {file_['path']}")
+    return True
+
+
+async def _get_unchanged(
+    entry: ManifestEntry, file_: ManifestFile, /, *, drive: Drive
+) -> Node | None:
+    try:
+        node = await drive.get_node_by_id(file_["id"])
+    except DriveError:
+        return None
+    if node.is_trashed or node.hash != entry["hash"] or node.size != entry["size"]:
+        return None
+    return node
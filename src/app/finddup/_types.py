@@ -0,0 +1,13 @@
+from typing import TypedDict
+
+
+class ManifestFile(TypedDict):
+    id: str
+    path: str
+
+
+class ManifestEntry(TypedDict):
+    hash: str
+    size: int
+    keep: ManifestFile
+    trash: list[ManifestFile]
@@ -0,0 +1,57 @@
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from pathlib import Path, PurePath
+
+from ..lib import get_default_data_path
+from ._fsck import run
+
+
+type Action = Callable[[], Awaitable[None]]
+
+
+def parse_args(args: list[str]) -> Action:
+    parser = ArgumentParser("fsck")
+    parser.add_argument("path", help="Remote folder to check")
+    parser.add_argument(
+        "--remote",
+        type=str,
+        required=True,
+        help="Config of a freshly built snapshot of the same drive",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=str(get_default_data_path() / "fsck.sqlite"),
+        help="Folders already verified (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=8,
+        help="Concurrent folder listings (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Forget the folders verified by earlier runs",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Only report divergent nodes, do not repair the cache",
+    )
+
+    kwargs = parser.parse_args(args)
+    if kwargs.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    return lambda: run(
+        PurePath(kwargs.path),
+        remote_config=Path(kwargs.remote).expanduser(),
+        checkpoint_path=Path(kwargs.checkpoint).expanduser(),
+        jobs=kwargs.jobs,
+        restart=kwargs.restart,
+        dry_run=kwargs.dry_run,
+    )
@@ -0,0 +1,75 @@
+import sqlite3
+import time
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, closing
+from pathlib import Path
+
+from ..lib import WriteBehind
+
+
+_SQL_CREATE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS verified (
+        id INTEGER PRIMARY KEY,
+        node_id TEXT NOT NULL UNIQUE,
+        verified_at INTEGER NOT NULL
+    );
+    """,
+]
+
+_SQL_INSERT_VERIFIED = (
+    "INSERT OR IGNORE INTO verified (node_id, verified_at) VALUES (?, ?);"
+)
+
+
+class Checkpoint:
+    """Folders whose cached children already matched the remote.
+
+    Every id is loaded once, so lookups never touch the disk. New ones are
+    queued and written behind in batches, so an interrupted run resumes
+    where it stopped without committing a row per folder.
+    """
+
+    def __init__(self, db: sqlite3.Connection, *, delay: float = 1.0) -> None:
+        self._writer = WriteBehind(db, delay=delay)
+
+        with closing(db.cursor()) as query:
+            query.execute("SELECT node_id FROM verified;")
+            self._verified = {node_id for (node_id,) in query}
+
+    def __len__(self) -> int:
+        return len(self._verified)
+
+    def is_verified(self, folder_id: str) -> bool:
+        return folder_id in self._verified
+
+    def set_verified(self, folder_id: str) -> None:
+        if folder_id in self._verified:
+            return
+        self._verified.add(folder_id)
+        self._writer.put(_SQL_INSERT_VERIFIED, (folder_id, int(time.time())))
+
+    async def flush(self) -> None:
+        await self._writer.flush()
+
+    def write_behind(self) -> AbstractAsyncContextManager[None]:
+        return self._writer.running()
+
+
+@asynccontextmanager
+async def open_checkpoint(
+    path: Path, *, delay: float = 1.0, restart: bool = False
+) -> AsyncIterator[Checkpoint]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path)) as db:
+        db.execute("PRAGMA journal_mode = WAL;")
+        db.execute("PRAGMA synchronous = NORMAL;")
+        with db:
+            for sql in _SQL_CREATE_TABLES:
+                db.execute(sql)
+            if restart:
+                db.execute("DELETE FROM verified;")
+
+        checkpoint = Checkpoint(db, delay=delay)
+        async with checkpoint.write_behind():
+            yield checkpoint
@@ -0,0 +1,224 @@
+import asyncio
+import sqlite3
+import sys
+import time
+from pathlib import Path, PurePath
+
+from wcpan.drive.cli.lib import create_drive_from_config
+from wcpan.drive.core.exceptions import NodeNotFoundError
+from wcpan.drive.core.types import Drive, Node
+
+from ..lib import (
+    NodeRow,
+    create_default_drive,
+    drain_queue,
+    iter_children,
+    open_snapshot,
+    repair_snapshot,
+    retry_rate_limited,
+)
+from ._checkpoint import Checkpoint, open_checkpoint
+from ._types import Report
+
+
+_REPAIR_BATCH = 512
+
+
+async def run(
+    path: PurePath,
+    *,
+    remote_config: Path,
+    checkpoint_path: Path,
+    jobs: int,
+    restart: bool,
+    dry_run: bool,
+) -> None:
+    async with (
+        create_default_drive() as drive,
+        create_drive_from_config(remote_config) as remote,
+        open_checkpoint(checkpoint_path, restart=restart) as checkpoint,
+    ):
+        async for _change in drive.sync():
+            pass
+        async for _change in remote.sync():
+            pass
+
+        root = await remote.get_node_by_path(path)
+        started = time.monotonic()
+        report = await fsck(
+            drive,
+            remote,
+            root,
+            jobs=jobs,
+            checkpoint=checkpoint,
+            repair=not dry_run,
+        )
+        elapsed = time.monotonic() - started
+        folders = report.checked + report.skipped
+        rate = folders / elapsed if elapsed > 0 else 0.0
+        print(
+            f"checked {report.checked} folders, skipped {report.skipped} verified, "
+            f"failed {report.failed} in {elapsed:.1f}s ({rate:.1f} folders/s)",
+            file=sys.stderr,
+        )
+        print(
+            f"{report.diverged} nodes diverged, {report.repaired} repaired",
+            file=sys.stderr,
+        )
+
+
+async def fsck(
+    drive: Drive,
+    remote: Drive,
+    root: Node,
+    *,
+    jobs: int,
+    checkpoint: Checkpoint,
+    repair: bool = True,
+) -> Report:
+    """Compare the cached children of every folder under `root` with `remote`.
+
+    `remote` lists the same account from a freshly built snapshot. Folders
+    share one queue across `jobs` workers, each reading the local cache with
+    a single query per folder. Divergent nodes are written back in batches,
+    and folders whose children matched go to the checkpoint, so a later run
+    walks them from the cache without listing them again.
+    """
+    pending: asyncio.Queue[str] = asyncio.Queue()
+    pending.put_nowait(root.id)
+    report = Report()
+
+    with open_snapshot(drive) as db:
+        repairs = _Repairs(drive, checkpoint=checkpoint, report=report)
+
+        async def check(folder_id: str) -> None:
+            await _check_folder(
+                folder_id,
+                db=db,
+                remote=remote,
+                queue=pending,
+                checkpoint=checkpoint,
+                repairs=repairs if repair else None,
+                report=report,
+            )
+
+        # Any error, such as a server error from the remote, fails one folder.
+        def fail(folder_id: str, error: Exception) -> None:
+            report.failed += 1
+            print(f"{folder_id}: {error}", file=sys.stderr)
+
+        await drain_queue(pending, check, jobs=jobs, on_error=fail)
+
+        repairs.write()
+
+    return report
+
+
+async def _check_folder(
+    folder_id: str,
+    /,
+    *,
+    db: sqlite3.Connection,
+    remote: Drive,
+    queue: asyncio.Queue[str],
+    checkpoint: Checkpoint,
+    repairs: "_Repairs | None",
+    report: Report,
+) -> None:
+    if checkpoint.is_verified(folder_id):
+        report.skipped += 1
+        for row in iter_children(db, folder_id):
+            if row.is_directory:
+                queue.put_nowait(row.id)
+        return
+
+    folder = await remote.get_node_by_id(folder_id)
+    children = await retry_rate_limited(lambda: remote.get_children(folder))
+    local = {_.id: _ for _ in iter_children(db, folder_id, include_trashed=True)}
+    report.checked += 1
+
+    for child in children:
+        if child.is_directory and not child.is_trashed:
+            queue.put_nowait(child.id)
+
+    found: list[tuple[str, str, Node | None]] = []
+    for child in children:
+        row = local.pop(child.id, None)
+        if row is None:
+            found.append(("missing", child.name, child))
+        elif _differs(row, child):
+            found.append(("changed", child.name, child))
+    # Whatever is left is cached here but no longer listed by the remote.
+    removed: list[str] = []
+    for row in local.values():
+        try:
+            moved = await remote.get_node_by_id(row.id)
+        except NodeNotFoundError:
+            found.append(("removed", row.name, None))
+            removed.append(row.id)
+            continue
+        found.append(("moved", row.name, moved))
+
+    if not found:
+        checkpoint.set_verified(folder_id)
+        return
+
+    report.diverged += len(found)
+    path = await remote.resolve_path(folder)
+    for kind, name, _node in found:
+        print(f"{kind}: {path / name}")
+
+    if repairs is not None:
+        updated = [node for _kind, _name, node in found if node is not None]
+        repairs.add(folder_id, updated=updated, removed=removed)
+
+
+def _differs(row: NodeRow, node: Node) -> bool:
+    if (row.name, row.is_directory, row.is_trashed) != (
+        node.name,
+        node.is_directory,
+        node.is_trashed,
+    ):
+        return True
+    return not node.is_directory and (row.size, row.hash) != (node.size, node.hash)
+
+
+class _Repairs:
+    """Divergent nodes waiting to be written to the cache in one transaction."""
+
+    def __init__(
+        self, drive: Drive, /, *, checkpoint: Checkpoint, report: Report
+    ) -> None:
+        self._drive = drive
+        self._checkpoint = checkpoint
+        self._report = report
+        self._updated: dict[str, Node] = {}
+        self._removed: set[str] = set()
+        self._folders: list[str] = []
+
+    def add(
+        self, folder_id: str, /, *, updated: list[Node], removed: list[str]
+    ) -> None:
+        # Nodes moved in from elsewhere turn up twice; the last listing wins.
+        for node in updated:
+            self._updated[node.id] = node
+        self._removed.update(_ for _ in removed if _ not in self._updated)
+        self._folders.append(folder_id)
+        if len(self._updated) + len(self._removed) >= _REPAIR_BATCH:
+            self.write()
+
+    def write(self) -> None:
+        if not self._folders:
+            return
+        repair_snapshot(
+            self._drive,
+            updated=list(self._updated.values()),
+            removed=list(self._removed),
+        )
+        self._report.repaired += len(self._updated) + len(self._removed)
+        # Repaired folders now match, so the next run can skip them.
+        for folder_id in self._folders:
+            self._checkpoint.set_verified(folder_id)
+        self._updated.clear()
+        self._removed.clear()
+        self._folders.clear()
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+
+@dataclass(kw_only=True)
+class Report:
+    checked: int = 0
+    # Folders verified by an earlier run, descended without a listing.
+    skipped: int = 0
+    diverged: int = 0
+    repaired: int = 0
+    failed: int = 0
@@ -0,0 +1,302 @@
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from contextlib import asynccontextmanager, closing, contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, TextIO, TypedDict
+
+import yaml
+from wcpan.drive.cli.lib import create_drive_from_config
+from wcpan.drive.core.exceptions import DriveError
+from wcpan.drive.core.types import Drive, Node
+from wcpan.drive.sqlite.lib import get_uploaded_size
+from yaml.events import (
+    DocumentEndEvent,
+    DocumentStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+)
+
+from ._snapshot import (
+    NameMatch,
+    NodeRow,
+    delete_nodes,
+    get_subtree_sizes,
+    iter_children,
+    iter_descendants,
+    iter_duplicates,
+    iter_nodes,
+    iter_uploads,
+    write_nodes,
+)
+from ._throttle import WINDOW, UploadThrottle
+from ._write_behind import WriteBehind
+
+
+def get_daily_usage(drive: Drive) -> int:
+    now = datetime.now(UTC)
+    yesterday = now - timedelta(days=1)
+    dsn = _get_dsn(drive)
+    return get_uploaded_size(dsn, yesterday, now)
+
+
+# HTTP statuses that mean "slow down" rather than "this will never work".
+_RATE_LIMITED_STATUS = frozenset({429, 503})
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return getattr(error, "status", None) in _RATE_LIMITED_STATUS
+
+
+async def retry_rate_limited[T](
+    fn: Callable[[], Awaitable[T]],
+    /,
+    *,
+    attempts: int = 5,
+    delay: float = 1.0,
+) -> T:
+    attempt = 1
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= attempts or not is_rate_limited(e):
+                raise
+        # Exponential backoff with jitter, so parallel workers spread out.
+        backoff = delay * 2 ** (attempt - 1)
+        await asyncio.sleep(backoff + random.uniform(0, delay))
+        attempt += 1
+
+
+def humanize(n: int) -> str:
+    if n < 1024:
+        return f"{n}B"
+    size = float(n)
+    for unit in ("KiB", "MiB", "GiB", "TiB"):
+        size /= 1024
+        if size < 1024:
+            break
+    return f"{size:.1f}{unit}"
+
+
+async def gather_bounded[T, R](
+    fn: Callable[[T], Awaitable[R]], items: Iterable[T], /, *, jobs: int
+) -> list[R]:
+    """Run fn over items with at most jobs in flight, results in item order."""
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await fn(item)
+
+    return await asyncio.gather(*(run(_) for _ in items))
+
+
+async def drain_queue[T](
+    queue: asyncio.Queue[T],
+    fn: Callable[[T], Awaitable[None]],
+    /,
+    *,
+    jobs: int,
+    on_error: Callable[[T, Exception], None] | None = None,
+) -> None:
+    """Run fn on queued items with jobs workers until none are left.
+
+    fn may queue more items, so trees are walked without a barrier per level.
+    With on_error, an item that raises is handed to it and the rest go on;
+    without, the first error stops every worker and propagates.
+    """
+
+    async def work() -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await fn(item)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(item, e)
+            # Only after fn queued what it found, or join() could return early.
+            queue.task_done()
+
+    async with asyncio.TaskGroup() as group:
+        workers = [group.create_task(work()) for _ in range(jobs)]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+
+
+async def try_drive_change(fn: Callable[[], Awaitable[object]], /) -> bool:
+    """Apply one change with rate-limit retries.
+
+    A DriveError is reported and counts as a skip, so one stale manifest entry
+    does not stop the rest of the batch.
+    """
+    try:
+        await retry_rate_limited(fn)
+    except DriveError as e:
+        print(e, file=sys.stderr)
+        return False
+    return True
+
+
+class RenameEntry(TypedDict):
+    id: str
+    name: str
+    new_name: str
+
+
+async def rename_nodes(
+    drive: Drive, entries: list[RenameEntry], /, *, jobs: int
+) -> int:
+    """Rename nodes in place, printing each rename. Returns how many succeeded."""
+
+    async def rename(entry: RenameEntry) -> bool:
+        async def move() -> None:
+            node = await drive.get_node_by_id(entry["id"])
+            await drive.move(node, new_parent=None, new_name=entry["new_name"])
+
+        if not await try_drive_change(move):
+            return False
+        print(f"rename: {entry['name']} → {entry['new_name']}")
+        return True
+
+    return sum(await gather_bounded(rename, entries, jobs=jobs))
+
+
+def print_throughput(
+    verb: str, count: int, total: int, started: float, /, *, detail: str = ""
+) -> None:
+    """The closing summary of an apply, timed from a time.monotonic() start."""
+    elapsed = time.monotonic() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    detail = f" ({detail})" if detail else ""
+    print(
+        f"{verb} {count} of {total}{detail} in {elapsed:.1f}s ({rate:.1f}/s)",
+        file=sys.stderr,
+    )
+
+
+def _get_dsn(drive: Drive) -> str:
+    return drive._ss._bg._dsn  # type: ignore
+
+
+@contextmanager
+def open_snapshot(drive: Drive) -> Iterator[sqlite3.Connection]:
+    """Open the local node cache read-only, so it cannot race the syncer."""
+    uri = f"{Path(_get_dsn(drive)).resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as db:
+        yield db
+
+
+def repair_snapshot(
+    drive: Drive, /, *, updated: list[Node], removed: list[str]
+) -> None:
+    """Overwrite and drop cached nodes in one transaction.
+
+    This bypasses the syncer, so it must not run while the drive syncs.
+    """
+    with closing(sqlite3.connect(_get_dsn(drive))) as db, db:
+        delete_nodes(db, removed)
+        write_nodes(db, updated)
+
+
+def create_upload_throttle(
+    drive: Drive, /, *, quota: int, burst: int | None = None
+) -> UploadThrottle:
+    """A throttle that already counts the uploads of the last 24 hours."""
+    since = datetime.now(UTC) - WINDOW
+    with open_snapshot(drive) as db:
+        usage = list(iter_uploads(db, since))
+    return UploadThrottle(quota=quota, burst=burst, usage=usage)
+
+
+def get_default_config_path() -> Path:
+    path = Path("~/.config")
+    path = path.expanduser()
+    path = path / "wcpan.drive"
+    return path
+
+
+def get_default_data_path() -> Path:
+    path = Path("~/.local/share")
+    path = path.expanduser()
+    path = path / "wcpan.drive"
+    return path
+
+
+def get_default_cache_path() -> Path:
+    path = Path("~/.cache")
+    path = path.expanduser()
+    path = path / "wcpan.drive"
+    return path
+
+
+# Set by the daemon, so tools it runs reuse its open drive.
+_shared_drive: ContextVar[Drive | None] = ContextVar("_shared_drive", default=None)
+
+
+def share_drive(drive: Drive) -> None:
+    """Make create_default_drive() yield this drive in the current context."""
+    _shared_drive.set(drive)
+
+
+@asynccontextmanager
+async def create_default_drive() -> AsyncIterator[Drive]:
+    shared = _shared_drive.get()
+    if shared is not None:
+        yield shared
+        return
+
+    config_path = get_default_config_path()
+    drive_path = config_path / "cli.yaml"
+    async with create_drive_from_config(drive_path) as drive:
+        yield drive
+
+
+class YamlListWriter:
+    """Writes one YAML sequence item by item, with a single emitter."""
+
+    def __init__(self, dumper: yaml.SafeDumper, stream: TextIO) -> None:
+        self._dumper = dumper
+        self._stream = stream
+
+    def write(self, item: Any) -> None:
+        dumper = self._dumper
+        node = dumper.represent_data(item)
+        dumper.anchor_node(node)
+        dumper.serialize_node(node, None, None)
+        # Forget this item, as SafeDumper.dump() does after each document.
+        dumper.represented_objects = {}
+        dumper.object_keeper = []
+        dumper.alias_key = None
+        dumper.serialized_nodes = {}
+        dumper.anchors = {}
+        self._stream.flush()
+
+
+@contextmanager
+def open_yaml_list(stream: TextIO) -> Iterator[YamlListWriter]:
+    dumper = yaml.SafeDumper(
+        stream,
+        default_flow_style=False,
+        allow_unicode=True,
+        sort_keys=False,
+    )
+    dumper.open()
+    dumper.emit(DocumentStartEvent(explicit=False))
+    dumper.emit(
+        SequenceStartEvent(anchor=None, tag=None, implicit=True, flow_style=False)
+    )
+    try:
+        yield YamlListWriter(dumper, stream)
+    finally:
+        dumper.emit(SequenceEndEvent())
+        dumper.emit(DocumentEndEvent(explicit=False))
+        dumper.close()
+        dumper.dispose()
@@ -0,0 +1,387 @@
+"""Queries over the wcpan.drive.sqlite node cache.
+
+These return `NodeRow` tuples rather than full `Node` objects, and push the
+filtering into SQL so callers can stream large result sets. The only writes
+are the batched repairs at the end, which fsck uses to mend a cache that
+drifted from its remote.
+"""
+
+import json
+import sqlite3
+from collections.abc import Callable, Iterator
+from contextlib import closing
+from datetime import datetime
+from itertools import count
+from typing import NamedTuple
+
+from wcpan.drive.core.types import Node
+
+
+class NodeRow(NamedTuple):
+    id: str
+    parent_id: str | None
+    name: str
+    is_directory: bool
+    is_trashed: bool
+    size: int | None
+    hash: str | None
+
+
+type NameMatch = Callable[[str], bool]
+
+
+_SQL_SELECT_ROWS = """
+SELECT
+    nodes.id,
+    {parent_id},
+    nodes.name,
+    files.id IS NULL,
+    nodes.trashed,
+    files.size,
+    files.hash
+"""
+
+# A node can have several parents. Scans over nodes report one of them, so
+# each node comes back once rather than once per parent.
+_SQL_ONE_PARENT = (
+    "(SELECT MIN(parents.parent_id) FROM parents WHERE parents.id = nodes.id)"
+)
+
+# Live (or all) descendants of a folder, excluding itself. Trashed folders
+# are only descended with include_trashed, like `drive.walk`. UNION rather
+# than UNION ALL guards against revisits, and CROSS JOIN pins the join
+# order so each step is a parent_id index lookup.
+_SQL_DESCENDANTS = """
+WITH RECURSIVE tree(id) AS (
+    SELECT ?
+    UNION
+    SELECT parents.id
+    FROM tree
+    CROSS JOIN parents ON parents.parent_id = tree.id
+    CROSS JOIN nodes ON parents.id = nodes.id
+    WHERE {trashed}
+)
+"""
+
+# SQLite cannot replace a function while a query on the connection still
+# runs, so each connection gets one `_match(key, name)`, and every query
+# passes the key of its own filter. Filters are forgotten once done.
+_matches: dict[int, NameMatch] = {}
+_match_keys = count()
+
+
+def iter_children(
+    db: sqlite3.Connection,
+    parent_id: str,
+    /,
+    *,
+    include_trashed: bool = False,
+    glob: str | None = None,
+    match: NameMatch | None = None,
+) -> Iterator[NodeRow]:
+    sql = (
+        _SQL_SELECT_ROWS.format(parent_id="parents.parent_id") + "FROM parents "
+        "CROSS JOIN nodes ON parents.id = nodes.id "
+        "LEFT JOIN files ON nodes.id = files.id "
+        "WHERE parents.parent_id = ?"
+    )
+    yield from _query(
+        db,
+        sql,
+        [parent_id],
+        include_trashed=include_trashed,
+        glob=glob,
+        match=match,
+    )
+
+
+def iter_descendants(
+    db: sqlite3.Connection,
+    root_id: str,
+    /,
+    *,
+    include_trashed: bool = False,
+    glob: str | None = None,
+    match: NameMatch | None = None,
+) -> Iterator[NodeRow]:
+    trashed = "1" if include_trashed else "nodes.trashed = 0"
+    sql = (
+        _SQL_DESCENDANTS.format(trashed=trashed)
+        + _SQL_SELECT_ROWS.format(parent_id=_SQL_ONE_PARENT)
+        + "FROM tree "
+        "CROSS JOIN nodes ON tree.id = nodes.id "
+        "LEFT JOIN files ON nodes.id = files.id "
+        "WHERE tree.id != ?"
+    )
+    # The tree itself already leaves trashed nodes out.
+    yield from _query(
+        db,
+        sql,
+        [root_id, root_id],
+        include_trashed=True,
+        glob=glob,
+        match=match,
+    )
+
+
+def iter_nodes(
+    db: sqlite3.Connection,
+    /,
+    *,
+    include_trashed: bool = False,
+    glob: str | None = None,
+    match: NameMatch | None = None,
+) -> Iterator[NodeRow]:
+    """Every node in the cache, regardless of where it lives."""
+    sql = (
+        _SQL_SELECT_ROWS.format(parent_id=_SQL_ONE_PARENT) + "FROM nodes "
+        "LEFT JOIN files ON nodes.id = files.id "
+        "WHERE 1"
+    )
+    yield from _query(
+        db,
+        sql,
+        [],
+        include_trashed=include_trashed,
+        glob=glob,
+        match=match,
+    )
+
+
+# Live descendants of a folder, each tagged with the child of the folder it
+# lies under, so one GROUP BY sums every child's subtree at once.
+_SQL_SUBTREE_SIZES = """
+WITH RECURSIVE tree(id, top) AS (
+    SELECT parents.id, parents.id
+    FROM parents
+    CROSS JOIN nodes ON parents.id = nodes.id
+    WHERE parents.parent_id = ? AND nodes.trashed = 0
+    UNION
+    SELECT parents.id, tree.top
+    FROM tree
+    CROSS JOIN parents ON parents.parent_id = tree.id
+    CROSS JOIN nodes ON parents.id = nodes.id
+    WHERE nodes.trashed = 0
+)
+SELECT tree.top, COALESCE(SUM(files.size), 0)
+FROM tree
+LEFT JOIN files ON tree.id = files.id
+GROUP BY tree.top;
+"""
+
+
+def get_subtree_sizes(db: sqlite3.Connection, parent_id: str, /) -> dict[str, int]:
+    """Total file size under each live child of a folder, keyed by child id."""
+    with closing(db.cursor()) as query:
+        query.execute(_SQL_SUBTREE_SIZES, (parent_id,))
+        return dict(query.fetchall())
+
+
+# Live files sharing content with another, oldest of each set first. Files
+# are one row per id, so a file with several parents is one candidate. Only
+# candidates climb to the root, so a copy under a trashed folder drops out
+# without walking the whole tree; a candidate is live when one of its ways
+# up reaches a live root, and is reported under the parent that way starts
+# from. The windows count copies in the same sort that orders the output,
+# so the whole cache is grouped in one pass.
+_SQL_DUPLICATES = """
+WITH RECURSIVE candidates(id) AS (
+    SELECT id
+    FROM (
+        SELECT
+            files.id AS id,
+            COUNT(*) OVER (PARTITION BY files.hash, files.size) AS copies
+        FROM files
+        CROSS JOIN nodes ON files.id = nodes.id
+        WHERE nodes.trashed = 0 AND files.hash != ''
+    )
+    WHERE copies > 1
+),
+up(id, parent_id, ancestor) AS (
+    SELECT candidates.id, parents.parent_id, parents.parent_id
+    FROM candidates
+    CROSS JOIN parents ON parents.id = candidates.id
+    UNION
+    SELECT up.id, up.parent_id, parents.parent_id
+    FROM up
+    CROSS JOIN nodes ON up.ancestor = nodes.id
+    CROSS JOIN parents ON parents.id = up.ancestor
+    WHERE nodes.trashed = 0
+),
+live(id, parent_id) AS (
+    SELECT up.id, MIN(up.parent_id)
+    FROM up
+    CROSS JOIN nodes ON up.ancestor = nodes.id
+    WHERE nodes.trashed = 0
+    AND NOT EXISTS (SELECT 1 FROM parents WHERE parents.id = up.ancestor)
+    GROUP BY up.id
+)
+SELECT id, parent_id, name, 0, 0, size, hash
+FROM (
+    SELECT
+        nodes.id AS id,
+        live.parent_id AS parent_id,
+        nodes.name AS name,
+        files.size AS size,
+        files.hash AS hash,
+        nodes.created_time AS created_time,
+        COUNT(*) OVER (PARTITION BY files.hash, files.size) AS copies
+    FROM live
+    CROSS JOIN files ON live.id = files.id
+    CROSS JOIN nodes ON files.id = nodes.id
+)
+WHERE copies > 1
+ORDER BY hash, size, created_time, id;
+"""
+
+
+def iter_duplicates(db: sqlite3.Connection, /) -> Iterator[list[NodeRow]]:
+    """Sets of live files with the same hash and size, across the cache."""
+    group: list[NodeRow] = []
+    for row in _iter_rows(db, _SQL_DUPLICATES, []):
+        if group and (row.hash, row.size) != (group[0].hash, group[0].size):
+            yield group
+            group = []
+        group.append(row)
+    if group:
+        yield group
+
+
+def iter_uploads(
+    db: sqlite3.Connection, since: datetime, /
+) -> Iterator[tuple[float, int]]:
+    """(timestamp, size) of files created since then, oldest first."""
+    with closing(db.cursor()) as query:
+        query.execute(
+            "SELECT nodes.created_time, files.size "
+            "FROM nodes "
+            "INNER JOIN files ON nodes.id = files.id "
+            "WHERE nodes.created_time >= ? "
+            "ORDER BY nodes.created_time;",
+            (int(since.timestamp() * 1_000_000),),
+        )
+        for created_time, size in query:
+            yield created_time / 1_000_000, size or 0
+
+
+def write_nodes(db: sqlite3.Connection, nodes: list[Node], /) -> None:
+    """Insert or overwrite nodes, one statement per table for the batch.
+
+    Rows are laid out as wcpan.drive.sqlite writes them, so the cache stays
+    readable by the drive. The caller owns the transaction.
+    """
+    files = [_ for _ in nodes if not _.is_directory]
+    images = [_ for _ in nodes if _.is_image or _.is_video]
+    videos = [_ for _ in nodes if _.is_video]
+    extras = [_ for _ in nodes if _.private]
+
+    db.executemany(
+        "INSERT OR REPLACE INTO nodes "
+        "(id, name, trashed, created_time, modified_time, changed_time) "
+        "VALUES (?, ?, ?, ?, ?, ?);",
+        [
+            (
+                _.id,
+                _.name,
+                _.is_trashed,
+                _to_us(_.created_time),
+                _to_us(_.modified_time),
+                _to_us(_.changed_time),
+            )
+            for _ in nodes
+        ],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO files (id, mime_type, hash, size) VALUES (?, ?, ?, ?);",
+        [(_.id, _.mime_type, _.hash, _.size) for _ in files],
+    )
+    db.executemany("DELETE FROM parents WHERE id = ?;", [(_.id,) for _ in nodes])
+    db.executemany(
+        "INSERT INTO parents (id, parent_id) VALUES (?, ?);",
+        [(_.id, _.parent_id) for _ in nodes if _.parent_id],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO images (id, width, height) VALUES (?, ?, ?);",
+        [(_.id, _.width, _.height) for _ in images],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO audios (id, ms_duration) VALUES (?, ?);",
+        [(_.id, _.ms_duration) for _ in videos],
+    )
+    db.executemany(
+        "INSERT OR REPLACE INTO extras (id, json) VALUES (?, ?);",
+        [(_.id, json.dumps(_.private, separators=(",", ":"))) for _ in extras],
+    )
+
+
+def delete_nodes(db: sqlite3.Connection, node_ids: list[str], /) -> None:
+    """Remove nodes and detach their children. The caller owns the transaction."""
+    rows = [(_,) for _ in node_ids]
+    for table in ("extras", "audios", "images", "files"):
+        db.executemany(f"DELETE FROM {table} WHERE id = ?;", rows)
+    db.executemany(
+        "DELETE FROM parents WHERE id = ? OR parent_id = ?;",
+        [(_, _) for _ in node_ids],
+    )
+    db.executemany("DELETE FROM nodes WHERE id = ?;", rows)
+
+
+def _to_us(value: datetime) -> int:
+    return int(value.timestamp() * 1_000_000)
+
+
+def _query(
+    db: sqlite3.Connection,
+    sql: str,
+    params: list[str],
+    *,
+    include_trashed: bool,
+    glob: str | None,
+    match: NameMatch | None,
+) -> Iterator[NodeRow]:
+    if not include_trashed:
+        sql += " AND nodes.trashed = 0"
+    if glob is not None:
+        sql += " AND nodes.name GLOB ?"
+        params.append(glob)
+    if match is None:
+        yield from _iter_rows(db, sql + ";", params)
+        return
+
+    if not _has_match(db):
+        db.create_function("_match", 2, _call_match, deterministic=True)
+    key = next(_match_keys)
+    _matches[key] = match
+    try:
+        yield from _iter_rows(db, sql + " AND _match(?, nodes.name);", [*params, key])
+    finally:
+        del _matches[key]
+
+
+def _has_match(db: sqlite3.Connection) -> bool:
+    with closing(db.cursor()) as query:
+        query.execute(
+            "SELECT 1 FROM pragma_function_list WHERE name = '_match' AND narg = 2;"
+        )
+        return query.fetchone() is not None
+
+
+def _call_match(key: int, name: str) -> bool:
+    return _matches[key](name)
+
+
+def _iter_rows(
+    db: sqlite3.Connection, sql: str, params: list[str | int]
+) -> Iterator[NodeRow]:
+    with closing(db.cursor()) as query:
+        query.execute(sql, params)
+        for node_id, parent_id, name, is_directory, is_trashed, size, hash_ in query:
+            yield NodeRow(
+                node_id,
+                parent_id,
+                name,
+                bool(is_directory),
+                bool(is_trashed),
+                size,
+                hash_,
+            )
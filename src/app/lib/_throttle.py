@@ -0,0 +1,113 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+
+
+# Providers count the daily cap over a rolling 24 hours, not a calendar day.
+WINDOW = timedelta(days=1)
+# How far back `rate` looks.
+_RATE_PERIOD = 60.0
+
+
+class UploadThrottle:
+    """Paces uploads to stay under a byte quota per rolling 24 hours.
+
+    A token bucket refilled at quota/24h spreads uploads evenly, and the
+    window itself is a hard cap: bytes admitted in the last 24 hours never
+    exceed the quota. `usage` seeds the window with (timestamp, size) pairs
+    of earlier uploads, e.g. from the node cache.
+    """
+
+    def __init__(
+        self,
+        *,
+        quota: int,
+        burst: int | None = None,
+        usage: Iterable[tuple[float, int]] = (),
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._quota = quota
+        self._window = WINDOW.total_seconds()
+        self._pace = quota / self._window
+        # An hour's worth by default, so a fresh start cannot eat the quota.
+        self._burst = burst if burst is not None else quota // 24
+        self._clock = clock
+        self._lock = asyncio.Lock()
+
+        now = clock()
+        self._history = deque(
+            (at, size) for at, size in sorted(usage) if at > now - self._window
+        )
+        self._used = sum(size for _at, size in self._history)
+        self._tokens = float(min(self._burst, max(0, quota - self._used)))
+        self._refilled_at = now
+
+    @property
+    def usage(self) -> int:
+        """Bytes admitted within the current window."""
+        self._expire(self._clock())
+        return self._used
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self._quota - self.usage)
+
+    @property
+    def rate(self) -> float:
+        """Bytes per second admitted over the last minute."""
+        since = self._clock() - _RATE_PERIOD
+        recent = 0
+        for at, size in reversed(self._history):
+            if at <= since:
+                break
+            recent += size
+        return recent / _RATE_PERIOD
+
+    def time_until_available(self, size: int = 1) -> timedelta:
+        """Projected wait before `size` more bytes can be admitted."""
+        return timedelta(seconds=self._get_wait(size, self._clock()))
+
+    async def acquire(self, size: int) -> None:
+        """Wait until `size` bytes fit, then count them as uploaded."""
+        # The lock keeps waiters in order, so a large upload is not starved.
+        async with self._lock:
+            while True:
+                now = self._clock()
+                wait = self._get_wait(size, now)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            self._tokens -= size
+            self._history.append((now, size))
+            self._used += size
+
+    def _get_wait(self, size: int, now: float) -> float:
+        self._expire(now)
+        self._refill(now)
+
+        # Uploads larger than the burst wait for a full bucket and go into
+        # debt; larger than the quota, they wait for an empty window.
+        need = min(size, self._burst)
+        bucket_wait = max(0.0, (need - self._tokens) / self._pace)
+        cap = self._quota - min(size, self._quota)
+        window_wait = 0.0
+        used = self._used
+        for at, used_size in self._history:
+            if used <= cap:
+                break
+            used -= used_size
+            window_wait = at + self._window - now
+        return max(bucket_wait, window_wait)
+
+    def _expire(self, now: float) -> None:
+        while self._history and self._history[0][0] <= now - self._window:
+            _at, size = self._history.popleft()
+            self._used -= size
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._refilled_at)
+        self._tokens = min(self._burst, self._tokens + elapsed * self._pace)
+        self._refilled_at = now
@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+
+_BATCH_SIZE = 256
+
+
+type _Row = tuple[str, tuple[Any, ...], Callable[[], None] | None]
+
+
+class WriteBehind:
+    """Statements queued and written by one task, a batch per transaction.
+
+    Callers that finish around the same time share a commit instead of
+    committing a row each. Each row can carry a callback, run once its
+    transaction has committed.
+    """
+
+    def __init__(
+        self,
+        db: sqlite3.Connection,
+        *,
+        delay: float = 1.0,
+        batch_size: int = _BATCH_SIZE,
+    ) -> None:
+        self._db = db
+        self._delay = delay
+        self._batch_size = batch_size
+        self._queue: asyncio.Queue[_Row] = asyncio.Queue()
+
+    def put(
+        self,
+        sql: str,
+        params: tuple[Any, ...],
+        /,
+        *,
+        written: Callable[[], None] | None = None,
+    ) -> None:
+        self._queue.put_nowait((sql, params, written))
+
+    async def flush(self) -> None:
+        await self._queue.join()
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator[None]:
+        """Write in the background, and whatever is left when the block ends."""
+        writer = asyncio.create_task(self._write())
+        try:
+            yield
+        finally:
+            # Keep what was queued even if the run stopped early.
+            flushed = asyncio.create_task(self.flush())
+            await asyncio.wait([flushed, writer], return_when=asyncio.FIRST_COMPLETED)
+            flushed.cancel()
+            writer.cancel()
+        if writer.done() and not writer.cancelled():
+            # The writer only stops by failing.
+            writer.result()
+
+    async def _write(self) -> None:
+        while True:
+            rows = [await self._queue.get()]
+            await asyncio.sleep(self._delay)
+            while len(rows) < self._batch_size and not self._queue.empty():
+                rows.append(self._queue.get_nowait())
+
+            batches: dict[str, list[tuple[Any, ...]]] = {}
+            for sql, params, _written in rows:
+                batches.setdefault(sql, []).append(params)
+            with self._db:
+                for sql, batch in batches.items():
+                    self._db.executemany(sql, batch)
+
+            for _sql, _params, written in rows:
+                if written is not None:
+                    written()
+                self._queue.task_done()
@@ -1,37 +1,70 @@
+import asyncio
 import sys
+from collections.abc import Iterator
 from pathlib import PurePath
 
-import yaml
+from wcpan.drive.core.types import Drive, Node
 
-from ..lib import create_default_drive
-from ._rules import is_valid_name, suggest_name
-from ._types import ManifestEntry
+from ..lib import (
+    create_default_drive,
+    drain_queue,
+    iter_children,
+    iter_descendants,
+    open_snapshot,
+    open_yaml_list,
+)
+from ._plan import plan_renames
+from ._rules import is_valid_name
 
 
-async def analyze(path: PurePath) -> None:
+# The invalid (id, name) pairs in one folder, and all its live child names.
+type _Folder = tuple[list[tuple[str, str]], list[str]]
+
+
+async def analyze(path: PurePath, *, walk: bool = False, jobs: int = 8) -> None:
     async with create_default_drive() as drive:
         root = await drive.get_node_by_path(path)
-        entries: list[ManifestEntry] = []
-
-        async for _parent, dirs, files in drive.walk(root):
-            for node in dirs + files:
-                if node.is_trashed:
-                    continue
-                if is_valid_name(node.name):
-                    continue
-                entries.append(
-                    {
-                        "id": node.id,
-                        "name": node.name,
-                        "new_name": suggest_name(node.name),
-                    }
-                )
-
-        if entries:
-            yaml.dump(
-                entries,
-                default_flow_style=False,
-                encoding=None,
-                stream=sys.stdout,
-                allow_unicode=True,
-            )
+
+        if walk:
+            folders = await _walk_invalid(drive, root, jobs=jobs)
+        else:
+            folders = _query_invalid(drive, root)
+
+        with open_yaml_list(sys.stdout) as writer:
+            for invalid, siblings in folders:
+                for entry in plan_renames(invalid, siblings):
+                    writer.write(entry)
+
+
+def _query_invalid(drive: Drive, root: Node) -> Iterator[_Folder]:
+    with open_snapshot(drive) as db:
+        groups: dict[str, list[tuple[str, str]]] = {}
+        for row in iter_descendants(db, root.id, match=_is_invalid):
+            groups.setdefault(row.parent_id or "", []).append((row.id, row.name))
+
+        for parent_id, invalid in groups.items():
+            siblings = [_.name for _ in iter_children(db, parent_id)]
+            yield invalid, siblings
+
+
+def _is_invalid(name: str) -> bool:
+    return not is_valid_name(name)
+
+
+async def _walk_invalid(drive: Drive, root: Node, *, jobs: int) -> list[_Folder]:
+    pending: asyncio.Queue[Node] = asyncio.Queue()
+    pending.put_nowait(root)
+    found: list[_Folder] = []
+
+    async def visit(parent: Node) -> None:
+        children = await drive.get_children(parent)
+        live = [_ for _ in children if not _.is_trashed]
+        for node in live:
+            if node.is_directory:
+                pending.put_nowait(node)
+        invalid = [(_.id, _.name) for _ in live if not is_valid_name(_.name)]
+        if invalid:
+            found.append((invalid, [_.name for _ in live]))
+
+    await drain_queue(pending, visit, jobs=jobs)
+    return found
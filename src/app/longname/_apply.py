@@ -1,20 +1,16 @@
 import sys
+import time
 
 import yaml
-from wcpan.drive.core.exceptions import DriveError
 
-from ..lib import create_default_drive
+from ..lib import create_default_drive, print_throughput, rename_nodes
 from ._types import ManifestEntry
 
 
-async def apply() -> None:
-    entries: list[ManifestEntry] = yaml.safe_load(sys.stdin)
+async def apply(*, jobs: int = 4) -> None:
+    entries: list[ManifestEntry] = yaml.safe_load(sys.stdin) or []
 
     async with create_default_drive() as drive:
-        for entry in entries:
-            try:
-                node = await drive.get_node_by_id(entry["id"])
-                await drive.move(node, new_parent=None, new_name=entry["new_name"])
-                print(f"rename: {entry['name']} → {entry['new_name']}")
-            except DriveError as e:
-                print(e, file=sys.stderr)
+        started = time.monotonic()
+        count = await rename_nodes(drive, entries, jobs=jobs)
+        print_throughput("renamed", count, len(entries), started)
@@ -19,23 +19,46 @@ def parse_args(args: list[str]) -> Action:
         "analyze", help="Scan remote path and emit rename manifest"
     )
     analyze_parser.add_argument("path", help="Remote path to scan")
+    analyze_parser.add_argument(
+        "--walk",
+        action="store_true",
+        help="Walk the drive instead of querying the local node cache",
+    )
+    analyze_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=8,
+        help="Folders listed concurrently with --walk (default: 8)",
+    )
 
     subparsers.add_parser(
         "verify", help="Validate new_name entries from manifest on stdin"
     )
 
-    subparsers.add_parser("apply", help="Apply renames from manifest on stdin")
+    apply_parser = subparsers.add_parser(
+        "apply", help="Apply renames from manifest on stdin"
+    )
+    apply_parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Concurrent renames (default: 4)"
+    )
 
     kwargs = parser.parse_args(args)
     command: Literal["analyze", "verify", "apply"] = kwargs.command
 
     match command:
         case "analyze":
-            return lambda: analyze(PurePath(kwargs.path))
+            if kwargs.jobs < 1:
+                parser.error("--jobs must be at least 1")
+            return lambda: analyze(
+                PurePath(kwargs.path), walk=kwargs.walk, jobs=kwargs.jobs
+            )
         case "verify":
             return verify
         case "apply":
-            return apply
+            if kwargs.jobs < 1:
+                parser.error("--jobs must be at least 1")
+            return lambda: apply(jobs=kwargs.jobs)
         case _:
             parser.print_help()
             raise SystemExit(1)
@@ -0,0 +1,38 @@
+from collections import Counter
+from collections.abc import Iterable
+
+from ._rules import disambiguate, suggest_name
+from ._types import ManifestEntry
+
+
+def plan_renames(
+    invalid: Iterable[tuple[str, str]], siblings: Iterable[str]
+) -> list[ManifestEntry]:
+    """Suggest new names for the invalid children of one folder.
+
+    `invalid` holds (id, name) pairs to rename, `siblings` the names of all
+    live children, including the invalid ones. Suggestions that would collide
+    with a remaining name or with each other get a " (n)" suffix, assigned in
+    (name, id) order so reruns produce the same manifest.
+    """
+    renames = sorted(invalid, key=lambda _: (_[1], _[0]))
+    taken = Counter(_key(_) for _ in siblings)
+    # Renamed nodes give their old names up.
+    taken.subtract(_key(name) for _id, name in renames)
+
+    entries: list[ManifestEntry] = []
+    for node_id, name in renames:
+        suggested = suggest_name(name)
+        new_name = suggested
+        index = 2
+        while taken[_key(new_name)] > 0:
+            new_name = disambiguate(suggested, index)
+            index += 1
+        taken[_key(new_name)] += 1
+        entries.append({"id": node_id, "name": name, "new_name": new_name})
+    return entries
+
+
+def _key(name: str) -> str:
+    # SMB compares names case-insensitively.
+    return name.casefold()
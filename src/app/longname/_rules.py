@@ -1,3 +1,6 @@
+import re
+
+
 _RESERVED_NAMES = {
     "CON",
     "PRN",
@@ -20,25 +23,29 @@ _SMB_ILLEGAL = str.maketrans(
     }
 )
 
+# Linux VFS forbids NUL and "/", SMB forbids the rest.
+_ILLEGAL = re.compile(r'[\0/\\:*?"<>|]')
+# str.translate looks up every character; this only visits the hits.
+_SMB_ILLEGAL_CHARS = re.compile(r'[\\:*?"<>|]')
+
+_ELLIPSIS = "\u2026"
+
 
 def is_valid_name(name: str) -> bool:
     # Linux VFS
     if len(name.encode("utf-8")) > 255:
         return False
-    if "\0" in name or "/" in name:
-        return False
 
-    # SMB
-    if len(name.encode("utf-16-le")) // 2 > 255:
+    # SMB; a name of at most 127 characters cannot exceed 255 code units.
+    if len(name) > 127 and len(name.encode("utf-16-le")) // 2 > 255:
+        return False
+    if _ILLEGAL.search(name):
         return False
-    for c in '\\/:*?"<>|':
-        if c in name:
-            return False
-    if name.endswith(".") or name.endswith(" "):
+    if name.endswith((".", " ")):
         return False
 
     stem, _ = _split_name(name)
-    if stem.upper() in _RESERVED_NAMES:
+    if len(stem) <= 4 and stem.upper() in _RESERVED_NAMES:
         return False
 
     return True
@@ -48,7 +55,7 @@ def suggest_name(name: str) -> str:
     stem, ext = _split_name(name)
 
     # Replace SMB-illegal chars in stem
-    stem = stem.translate(_SMB_ILLEGAL)
+    stem = _SMB_ILLEGAL_CHARS.sub(lambda m: m[0].translate(_SMB_ILLEGAL), stem)
 
     # Strip trailing dots and spaces from stem
     stem = stem.rstrip(". ")
@@ -57,15 +64,39 @@ def suggest_name(name: str) -> str:
     if is_valid_name(candidate):
         return candidate
 
-    # Truncate stem, appending ellipsis until valid
-    ellipsis = "\u2026"
-    while stem:
-        stem = stem[:-1]
-        candidate = stem + ellipsis + ext
-        if is_valid_name(candidate):
-            return candidate
+    # Truncate stem to a proper prefix, appending ellipsis.
+    return _fit(stem[:-1], _ELLIPSIS + ext)
+
+
+def disambiguate(name: str, index: int) -> str:
+    """Append " (index)" to the stem, truncating it to stay valid."""
+    stem, ext = _split_name(name)
+    return _fit(stem, f" ({index}){ext}")
+
+
+def _fit(stem: str, tail: str) -> str:
+    """Return the longest prefix of stem plus tail that is a valid name."""
+    # Only the stem prefix varies between candidates, so if the shortest one
+    # is invalid, all of them are.
+    if not is_valid_name(tail):
+        return tail
 
-    return ellipsis + ext
+    # Keep the longest prefix that fits both budgets and stops before any
+    # character the SMB translation leaves illegal. Cutting the encoded stem
+    # and dropping the partial character finds each limit in one pass.
+    utf8_budget = 255 - len(tail.encode("utf-8"))
+    utf16_budget = 255 - len(tail.encode("utf-16-le")) // 2
+    utf8_prefix = stem.encode("utf-8")[:utf8_budget].decode("utf-8", "ignore")
+    utf16_prefix = stem.encode("utf-16-le")[: utf16_budget * 2].decode(
+        "utf-16-le", "ignore"
+    )
+    bad = _ILLEGAL.search(stem)
+    length = min(
+        len(utf8_prefix),
+        len(utf16_prefix),
+        bad.start() if bad else len(stem),
+    )
+    return stem[:length] + tail
 
 
 def _split_name(name: str) -> tuple[str, str]:
@@ -12,10 +12,10 @@ async def verify() -> None:
 
     for entry in entries:
         name = entry["name"]
-        if is_valid_name(name):
-            new_name = name
-        else:
-            new_name = suggest_name(name)
+        # Keep planned (possibly disambiguated) names that are still valid.
+        new_name = entry.get("new_name") or name
+        if not is_valid_name(new_name):
+            new_name = suggest_name(new_name)
         output.append({"id": entry["id"], "name": name, "new_name": new_name})
 
     yaml.dump(
@@ -1,24 +1,41 @@
 import asyncio
+import heapq
 import re
 import sys
 from argparse import ArgumentParser
+from collections.abc import Iterator
 from pathlib import Path
 
-from .lib import create_default_drive
+from wcpan.drive.core.types import Drive
+
+from .lib import create_default_drive, iter_children, open_snapshot
+
+
+# Cheap prefilter for the index scan; to_eid() still has the final word.
+_ARCHIVE_GLOB = "*[[][0-9]*[]].7z"
 
 
 async def main(args: list[str]) -> int:
     parser = ArgumentParser("listeh")
     parser.add_argument("path", type=str)
+    parser.add_argument(
+        "-n", "--limit", type=int, default=None, help="only list the newest N"
+    )
     kwargs = parser.parse_args(args)
     path = Path(kwargs.path)
+    limit: int | None = kwargs.limit
+    if limit is not None and limit < 1:
+        parser.error("--limit must be at least 1")
 
     async with create_default_drive() as drive:
         parent = await drive.get_node_by_path(path)
-        children = await drive.get_children(parent)
-        g = ((to_eid(_.name), _.name) for _ in children if not _.is_trashed)
-        pair_list = [(eid, name) for eid, name in g if eid is not None]
-        pair_list.sort(reverse=True)
+        names = _iter_archive_names(drive, parent.id)
+        g = ((to_eid(_), _) for _ in names)
+        pairs = ((eid, name) for eid, name in g if eid is not None)
+        if limit is None:
+            pair_list = sorted(pairs, reverse=True)
+        else:
+            pair_list = heapq.nlargest(limit, pairs)
         name_list = (name for _eid, name in pair_list)
         for name in name_list:
             print(name)
@@ -34,5 +51,11 @@ def to_eid(name: str) -> int | None:
     return eid
 
 
+def _iter_archive_names(drive: Drive, parent_id: str) -> Iterator[str]:
+    with open_snapshot(drive) as db:
+        for row in iter_children(db, parent_id, glob=_ARCHIVE_GLOB):
+            yield row.name
+
+
 if __name__ == "__main__":
     sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,4 @@
+from ._main import run_as_module
+
+
+run_as_module()
@@ -0,0 +1,136 @@
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from pathlib import Path, PurePath
+from typing import Literal
+
+from ..lib import get_default_config_path, get_default_data_path
+from ._migrate import run
+from ._progress import progress
+from ._stats import stats
+
+
+type Action = Callable[[], Awaitable[None]]
+
+_GiB = 1024**3
+
+
+def parse_args(args: list[str]) -> Action:
+    ledger = ArgumentParser(add_help=False)
+    ledger.add_argument(
+        "--ledger",
+        type=str,
+        default=str(get_default_data_path() / "migrated.sqlite"),
+        help="Files already migrated (default: %(default)s)",
+    )
+
+    drives = ArgumentParser(add_help=False, parents=[ledger])
+    drives.add_argument(
+        "--src",
+        type=str,
+        default=str(get_default_config_path() / "cli.yaml"),
+        help="Source drive config (default: %(default)s)",
+    )
+    drives.add_argument(
+        "--dst", type=str, required=True, help="Destination drive config"
+    )
+
+    parser = ArgumentParser("migrate")
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    copy_parser = subparsers.add_parser(
+        "copy", parents=[drives], help="Copy remote paths to the destination"
+    )
+    copy_parser.add_argument("path", nargs="+", help="Remote paths to copy")
+    copy_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=4,
+        help="Concurrent transfers (default: %(default)s)",
+    )
+    copy_parser.add_argument(
+        "--quota",
+        type=float,
+        default=750,
+        help="GiB uploaded per rolling 24 hours (default: %(default)s)",
+    )
+    copy_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="Seconds a chunk may stall before the transfer resumes, "
+        "0 to wait forever (default: %(default)s)",
+    )
+
+    progress_parser = subparsers.add_parser(
+        "progress", parents=[drives], help="Compare folder sizes on both drives"
+    )
+    progress_parser.add_argument("path", help="Remote folder to compare")
+
+    stats_parser = subparsers.add_parser(
+        "stats", parents=[ledger], help="Show transfer throughput from the ledger"
+    )
+    stats_parser.add_argument(
+        "--hours",
+        type=float,
+        default=24,
+        help="Hours to look back (default: %(default)s)",
+    )
+    stats_parser.add_argument(
+        "--bucket",
+        type=float,
+        default=60,
+        help="Histogram bucket in minutes (default: %(default)s)",
+    )
+    stats_parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Keep printing transfers as they are recorded",
+    )
+    stats_parser.add_argument(
+        "--interval",
+        type=float,
+        default=5,
+        help="Seconds between checks with --follow (default: %(default)s)",
+    )
+
+    kwargs = parser.parse_args(args)
+    command: Literal["copy", "progress", "stats"] = kwargs.command
+
+    match command:
+        case "copy":
+            if kwargs.jobs < 1:
+                parser.error("--jobs must be at least 1")
+            if kwargs.quota <= 0:
+                parser.error("--quota must be positive")
+            return lambda: run(
+                [PurePath(_) for _ in kwargs.path],
+                src_config=Path(kwargs.src).expanduser(),
+                dst_config=Path(kwargs.dst).expanduser(),
+                ledger_path=Path(kwargs.ledger).expanduser(),
+                jobs=kwargs.jobs,
+                quota=int(kwargs.quota * _GiB),
+                timeout=kwargs.timeout or None,
+            )
+        case "progress":
+            return lambda: progress(
+                PurePath(kwargs.path),
+                src_config=Path(kwargs.src).expanduser(),
+                dst_config=Path(kwargs.dst).expanduser(),
+                ledger_path=Path(kwargs.ledger).expanduser(),
+            )
+        case "stats":
+            if kwargs.bucket <= 0:
+                parser.error("--bucket must be positive")
+            return lambda: stats(
+                Path(kwargs.ledger).expanduser(),
+                period=timedelta(hours=kwargs.hours),
+                bucket=timedelta(minutes=kwargs.bucket),
+                follow=kwargs.follow,
+                interval=kwargs.interval,
+            )
+        case _:
+            parser.print_help()
+            raise SystemExit(1)
@@ -0,0 +1,229 @@
+import asyncio
+import random
+import sys
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Coroutine
+from contextlib import aclosing
+from typing import Any, Self
+
+from wcpan.drive.core.types import (
+    Drive,
+    Hasher,
+    MediaInfo,
+    Node,
+    ReadableFile,
+    WritableFile,
+)
+
+from ..lib import is_rate_limited
+
+
+_CHUNK_SIZE = 256 * 1024
+# Chunks downloaded ahead of the upload, per transfer.
+_READ_AHEAD = 16
+# How often the hasher state is saved, and how many saves are kept.
+_CHECKPOINT_SIZE = 64 * 1024 * 1024
+_CHECKPOINT_COUNT = 4
+
+
+class VerifyError(Exception):
+    """The uploaded file does not match its source."""
+
+
+async def copy_file(
+    src_drive: Drive,
+    src: Node,
+    dst_drive: Drive,
+    parent: Node,
+    *,
+    timeout: float | None = None,
+    attempts: int = 5,
+) -> Node:
+    """Stream a file between drives, hashing each chunk on its way through.
+
+    The hash is computed with the destination's algorithm, so one pass over
+    the data is enough to check what the destination received. An
+    interrupted transfer resumes within the same upload session from the
+    offset the destination acknowledged, rather than from byte 0.
+    """
+    create_hasher = await dst_drive.get_hasher_factory(parent)
+    hasher = await create_hasher()
+
+    async with dst_drive.upload_file(
+        src.name,
+        parent,
+        size=src.size,
+        mime_type=src.mime_type,
+        media_info=get_media_info(src),
+    ) as fout:
+        if src.size > 0:
+            async with src_drive.download_file(src) as fin:
+                hasher = await _transfer(
+                    fin, fout, hasher, timeout=timeout, attempts=attempts
+                )
+        await fout.flush()
+        node = await fout.node()
+
+    if node.size != src.size:
+        raise VerifyError(f"size mismatch: {src.name} ({node.size} != {src.size})")
+    digest = await hasher.hexdigest()
+    if node.hash != digest:
+        raise VerifyError(f"hash mismatch: {src.name} ({node.hash} != {digest})")
+    return node
+
+
+def get_media_info(node: Node) -> MediaInfo | None:
+    if node.is_image:
+        return MediaInfo.image(node.width, node.height)
+    if node.is_video:
+        return MediaInfo.video(node.width, node.height, node.ms_duration)
+    return None
+
+
+async def _transfer(
+    fin: ReadableFile,
+    fout: WritableFile,
+    hasher: Hasher,
+    *,
+    timeout: float | None,
+    attempts: int,
+) -> Hasher:
+    """Copy `fin` to `fout`, returning the hasher that saw every byte once."""
+    with _HashThread() as hashing:
+        # (offset, hasher state) pairs; the one at 0 is never dropped.
+        origin = (0, await hashing.run(hasher.copy()))
+        checkpoints: deque[tuple[int, Hasher]] = deque(maxlen=_CHECKPOINT_COUNT)
+        offset = 0
+        failures = 0
+        failed_at = -1
+
+        while True:
+            try:
+                if failures:
+                    offset, hasher = await _rewind(
+                        fin, fout, hashing, [origin, *checkpoints]
+                    )
+                async with aclosing(_read_ahead(fin, timeout=timeout)) as chunks:
+                    async for chunk in chunks:
+                        # The next chunks download while this one is hashed
+                        # and uploaded.
+                        await asyncio.gather(
+                            hashing.run(hasher.update(chunk)),
+                            _write(fout, chunk, timeout=timeout),
+                        )
+                        offset += len(chunk)
+                        saved = checkpoints[-1][0] if checkpoints else 0
+                        if offset - saved >= _CHECKPOINT_SIZE:
+                            saved_hasher = await hashing.run(hasher.copy())
+                            checkpoints.append((offset, saved_hasher))
+                return hasher
+            except Exception as e:
+                if not _is_resumable(e):
+                    raise
+                # Only failures without progress in between count as attempts.
+                failures = failures + 1 if offset <= failed_at else 1
+                failed_at = offset
+                if failures >= attempts:
+                    raise
+                print(f"resume after {offset} bytes: {e!r}", file=sys.stderr)
+
+            backoff = 2 ** (failures - 1)
+            await asyncio.sleep(backoff + random.uniform(0, 1))
+
+
+async def _read_ahead(
+    fin: ReadableFile, *, timeout: float | None
+) -> AsyncIterator[bytes]:
+    """Yield chunks of `fin` while a reader task keeps downloading ahead.
+
+    The queue holds the chunks the reader returns as they are, so memory
+    stays bounded at _READ_AHEAD chunks and nothing is copied on the way.
+    """
+    chunks: asyncio.Queue[bytes | Exception] = asyncio.Queue(_READ_AHEAD)
+
+    async def read() -> None:
+        try:
+            while True:
+                async with asyncio.timeout(timeout):
+                    chunk = await fin.read(_CHUNK_SIZE)
+                await chunks.put(chunk)
+                if not chunk:
+                    return
+        except Exception as e:
+            await chunks.put(e)
+
+    reader = asyncio.create_task(read())
+    try:
+        while True:
+            chunk = await chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        reader.cancel()
+
+
+async def _write(fout: WritableFile, chunk: bytes, *, timeout: float | None) -> None:
+    async with asyncio.timeout(timeout):
+        await fout.write(chunk)
+
+
+async def _rewind(
+    fin: ReadableFile,
+    fout: WritableFile,
+    hashing: "_HashThread",
+    checkpoints: list[tuple[int, Hasher]],
+) -> tuple[int, Hasher]:
+    """Continue from the destination's offset, restoring the hasher for it."""
+    acknowledged = await fout.tell()
+    start, saved = max(
+        (_ for _ in checkpoints if _[0] <= acknowledged), key=lambda _: _[0]
+    )
+    hasher = await hashing.run(saved.copy())
+
+    # Bytes between the checkpoint and the acknowledged offset were already
+    # uploaded, so they only need hashing again.
+    await fin.seek(start)
+    position = start
+    while position < acknowledged:
+        chunk = await fin.read(min(_CHUNK_SIZE, acknowledged - position))
+        if not chunk:
+            break
+        await hashing.run(hasher.update(chunk))
+        position += len(chunk)
+
+    await fout.seek(position)
+    return position, hasher
+
+
+class _HashThread:
+    """Runs hasher coroutines on an event loop of their own thread.
+
+    Hashers do their work synchronously inside `update`, and the hash
+    functions release the GIL on large buffers, so this keeps the main
+    loop moving data while a chunk is hashed.
+    """
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def run[T](self, coro: Coroutine[Any, Any, T]) -> T:
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return await asyncio.wrap_future(future)
+
+
+def _is_resumable(error: Exception) -> bool:
+    return isinstance(error, (TimeoutError, ConnectionError)) or is_rate_limited(error)
@@ -0,0 +1,146 @@
+import sqlite3
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, closing
+from pathlib import Path
+
+from wcpan.drive.core.types import Node
+
+from ..lib import WINDOW, WriteBehind
+
+
+# Same layout as the legacy ./data/_migrated.sqlite, so it can be reused.
+_SQL_CREATE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS migrated (
+        id INTEGER PRIMARY KEY,
+        node_id TEXT NOT NULL UNIQUE,
+        size INTEGER NOT NULL,
+        created_at INTEGER NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_migrated_created_at ON migrated(created_at);",
+    # One row per completed copy, for throughput telemetry.
+    """
+    CREATE TABLE IF NOT EXISTS transfers (
+        id INTEGER PRIMARY KEY,
+        node_id TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        started_at REAL NOT NULL,
+        duration REAL NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_transfers_started_at ON transfers(started_at);",
+]
+
+_SQL_INSERT_MIGRATED = (
+    "INSERT OR IGNORE INTO migrated (node_id, size, created_at) VALUES (?, ?, ?);"
+)
+_SQL_INSERT_TRANSFER = (
+    "INSERT INTO transfers (node_id, size, started_at, duration) VALUES (?, ?, ?, ?);"
+)
+
+_MIN_RATE_PERIOD = 60.0
+
+
+class MigrationLedger:
+    """Destination files already copied and verified, keyed by node id.
+
+    Inserts are queued and written behind by one task, so concurrent
+    transfers share a transaction instead of committing a row each. The
+    bytes migrated over the last 24 hours are counted in memory.
+    """
+
+    def __init__(
+        self,
+        db: sqlite3.Connection,
+        *,
+        delay: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._db = db
+        self._clock = clock
+        self._writer = WriteBehind(db, delay=delay)
+        # Queued but not yet written, so lookups do not miss them.
+        self._pending: set[str] = set()
+
+        since = int(clock() - WINDOW.total_seconds())
+        with closing(db.cursor()) as query:
+            query.execute(
+                "SELECT created_at, size FROM migrated "
+                "WHERE created_at > ? ORDER BY created_at;",
+                (since,),
+            )
+            self._history = deque(query.fetchall())
+        self._size = sum(size for _at, size in self._history)
+
+    def is_migrated(self, node: Node) -> bool:
+        if node.id in self._pending:
+            return True
+        with closing(self._db.cursor()) as query:
+            query.execute("SELECT 1 FROM migrated WHERE node_id = ?;", (node.id,))
+            return query.fetchone() is not None
+
+    def set_migrated(self, node: Node) -> None:
+        if node.id in self._pending:
+            return
+        created_at = int(node.created_time.timestamp())
+        self._pending.add(node.id)
+        self._writer.put(
+            _SQL_INSERT_MIGRATED,
+            (node.id, node.size, created_at),
+            written=lambda: self._pending.discard(node.id),
+        )
+        if created_at > self._clock() - WINDOW.total_seconds():
+            self._history.append((created_at, node.size))
+            self._size += node.size
+
+    def record_transfer(
+        self, node: Node, *, started_at: float, duration: float
+    ) -> None:
+        """Log how long copying `node` took, `started_at` being a timestamp."""
+        self._writer.put(
+            _SQL_INSERT_TRANSFER, (node.id, node.size, started_at, duration)
+        )
+
+    def get_migrated_size(self) -> int:
+        """Bytes migrated within the last 24 hours."""
+        since = self._clock() - WINDOW.total_seconds()
+        while self._history and self._history[0][0] <= since:
+            _at, size = self._history.popleft()
+            self._size -= size
+        return self._size
+
+    def get_migrated_rate(self) -> float:
+        """Bytes per second since the first migration within the window."""
+        size = self.get_migrated_size()
+        if not self._history:
+            return 0.0
+        elapsed = self._clock() - self._history[0][0]
+        # A burst that just started is not a rate yet.
+        return size / max(elapsed, _MIN_RATE_PERIOD)
+
+    async def flush(self) -> None:
+        await self._writer.flush()
+
+    def write_behind(self) -> AbstractAsyncContextManager[None]:
+        return self._writer.running()
+
+
+@asynccontextmanager
+async def open_ledger(
+    path: Path, *, delay: float = 1.0
+) -> AsyncIterator[MigrationLedger]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(path)) as db:
+        db.execute("PRAGMA journal_mode = WAL;")
+        # WAL stays consistent without a sync per commit.
+        db.execute("PRAGMA synchronous = NORMAL;")
+        with db:
+            for sql in _SQL_CREATE_TABLES:
+                db.execute(sql)
+
+        ledger = MigrationLedger(db, delay=delay)
+        async with ledger.write_behind():
+            yield ledger
@@ -0,0 +1,211 @@
+import asyncio
+import sys
+import time
+from pathlib import Path, PurePath
+
+from wcpan.drive.cli.lib import create_drive_from_config
+from wcpan.drive.core.exceptions import NodeNotFoundError
+from wcpan.drive.core.types import Drive, Node
+
+from ..lib import (
+    UploadThrottle,
+    create_upload_throttle,
+    drain_queue,
+    humanize,
+    retry_rate_limited,
+)
+from ._copy import VerifyError, copy_file
+from ._ledger import MigrationLedger, open_ledger
+from ._types import FileWork, FolderWork, Summary, Work
+
+
+async def run(
+    paths: list[PurePath],
+    *,
+    src_config: Path,
+    dst_config: Path,
+    ledger_path: Path,
+    jobs: int,
+    quota: int,
+    timeout: float | None,
+) -> None:
+    async with (
+        create_drive_from_config(src_config) as src_drive,
+        create_drive_from_config(dst_config) as dst_drive,
+        open_ledger(ledger_path) as ledger,
+    ):
+        async for _change in src_drive.sync():
+            pass
+        async for _change in dst_drive.sync():
+            pass
+
+        throttle = create_upload_throttle(dst_drive, quota=quota)
+        print(f"uploaded {humanize(throttle.usage)} in the last 24h", file=sys.stderr)
+
+        started = time.monotonic()
+        summary = await migrate(
+            src_drive,
+            dst_drive,
+            paths,
+            jobs=jobs,
+            throttle=throttle,
+            ledger=ledger,
+            timeout=timeout,
+        )
+        elapsed = time.monotonic() - started
+        rate = summary.size / elapsed if elapsed > 0 else 0.0
+        print(
+            f"copied {summary.copied} files ({humanize(summary.size)}), "
+            f"skipped {summary.skipped}, failed {summary.failed} "
+            f"in {elapsed:.1f}s ({humanize(int(rate))}/s)",
+            file=sys.stderr,
+        )
+        print(
+            f"migrated {humanize(ledger.get_migrated_size())} in the last 24h",
+            file=sys.stderr,
+        )
+
+
+async def migrate(
+    src_drive: Drive,
+    dst_drive: Drive,
+    paths: list[PurePath],
+    *,
+    jobs: int,
+    throttle: UploadThrottle,
+    ledger: MigrationLedger,
+    timeout: float | None = None,
+) -> Summary:
+    """Copy trees to the same paths on another drive.
+
+    Folders and files from every tree share one queue, so `jobs` workers
+    stay busy across directory boundaries instead of waiting for the
+    slowest file of each folder. The throttle paces uploads against the
+    destination's daily quota.
+    """
+    pending: asyncio.Queue[Work] = asyncio.Queue()
+    summary = Summary()
+
+    for path in paths:
+        src = await src_drive.get_node_by_path(path)
+        if src.parent_id is None:
+            # The root itself has no name to recreate.
+            root = await dst_drive.get_root()
+            _put_children(pending, await src_drive.get_children(src), root)
+            continue
+        parent = await ensure_directory(dst_drive, path.parent)
+        _put_children(pending, [src], parent)
+
+    async def work(item: Work) -> None:
+        match item:
+            case FolderWork():
+                await _migrate_folder(
+                    item,
+                    src_drive=src_drive,
+                    dst_drive=dst_drive,
+                    queue=pending,
+                )
+            case FileWork():
+                await _migrate_file(
+                    item,
+                    src_drive=src_drive,
+                    dst_drive=dst_drive,
+                    throttle=throttle,
+                    ledger=ledger,
+                    summary=summary,
+                    timeout=timeout,
+                )
+
+    # Any error, such as a transfer out of resume attempts, fails one item.
+    def fail(item: Work, error: Exception) -> None:
+        summary.failed += 1
+        print(f"{item.src.name}: {error}", file=sys.stderr)
+
+    await drain_queue(pending, work, jobs=jobs, on_error=fail)
+    return summary
+
+
+async def ensure_directory(drive: Drive, path: PurePath) -> Node:
+    node = await drive.get_root()
+    for part in path.parts[1:]:
+        node = await _get_or_create_directory(drive, part, node)
+    return node
+
+
+async def _migrate_folder(
+    item: FolderWork,
+    /,
+    *,
+    src_drive: Drive,
+    dst_drive: Drive,
+    queue: asyncio.Queue[Work],
+) -> None:
+    folder = await _get_or_create_directory(dst_drive, item.src.name, item.dst_parent)
+    children = await src_drive.get_children(item.src)
+    _put_children(queue, children, folder)
+
+
+def _put_children(
+    queue: asyncio.Queue[Work], children: list[Node], parent: Node
+) -> None:
+    for child in children:
+        if child.is_trashed:
+            continue
+        if child.is_directory:
+            queue.put_nowait(FolderWork(src=child, dst_parent=parent))
+        else:
+            queue.put_nowait(FileWork(src=child, dst_parent=parent))
+
+
+async def _migrate_file(
+    item: FileWork,
+    /,
+    *,
+    src_drive: Drive,
+    dst_drive: Drive,
+    throttle: UploadThrottle,
+    ledger: MigrationLedger,
+    summary: Summary,
+    timeout: float | None,
+) -> None:
+    src = item.src
+    existing = await _get_child(dst_drive, src.name, item.dst_parent)
+    if existing is not None:
+        if ledger.is_migrated(existing):
+            summary.skipped += 1
+            return
+        if existing.size == src.size and existing.hash == src.hash:
+            ledger.set_migrated(existing)
+            summary.skipped += 1
+            return
+        raise VerifyError(f"exists with different content: {src.name}")
+
+    await throttle.acquire(src.size)
+    started_at = time.time()
+    started = time.monotonic()
+    # copy_file resumes after rate limits and dropped connections itself;
+    # retrying it here as well would multiply the attempts.
+    node = await copy_file(src_drive, src, dst_drive, item.dst_parent, timeout=timeout)
+    ledger.set_migrated(node)
+    ledger.record_transfer(
+        node, started_at=started_at, duration=time.monotonic() - started
+    )
+    summary.copied += 1
+    summary.size += src.size
+    print(f"copy: {src.name} ({humanize(src.size)})")
+
+
+async def _get_or_create_directory(drive: Drive, name: str, parent: Node) -> Node:
+    node = await _get_child(drive, name, parent)
+    if node is not None:
+        return node
+    return await retry_rate_limited(
+        lambda: drive.create_directory(name, parent, exist_ok=True)
+    )
+
+
+async def _get_child(drive: Drive, name: str, parent: Node) -> Node | None:
+    try:
+        return await drive.get_child_by_name(name, parent)
+    except NodeNotFoundError:
+        return None
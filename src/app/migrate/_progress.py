@@ -0,0 +1,68 @@
+import sqlite3
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path, PurePath
+
+from wcpan.drive.cli.lib import create_drive_from_config
+from wcpan.drive.core.exceptions import NodeNotFoundError
+from wcpan.drive.core.types import Drive
+
+from ..lib import get_subtree_sizes, humanize, iter_children, open_snapshot
+from ._ledger import open_ledger
+
+
+async def progress(
+    path: PurePath, *, src_config: Path, dst_config: Path, ledger_path: Path
+) -> None:
+    async with (
+        create_drive_from_config(src_config) as src_drive,
+        create_drive_from_config(dst_config) as dst_drive,
+        open_ledger(ledger_path) as ledger,
+    ):
+        src_sizes = await _get_sizes(src_drive, path)
+        dst_sizes = await _get_sizes(dst_drive, path)
+        rate = ledger.get_migrated_rate()
+
+    for name, total in sorted(src_sizes.items()):
+        done = min(dst_sizes[name], total)
+        print(f"{name}: {_percent(done, total)} ({humanize(total - done)} left)")
+
+    total = src_sizes.total()
+    done = sum(min(dst_sizes[_], size) for _, size in src_sizes.items())
+    left = total - done
+    eta = format_eta(left, rate)
+    print(
+        f"total: {_percent(done, total)} ({humanize(left)} left), "
+        f"ETA {eta} at {humanize(int(rate))}/s"
+    )
+
+
+async def _get_sizes(drive: Drive, path: PurePath) -> Counter[str]:
+    """Bytes under each child of the folder at `path`, keyed by name."""
+    try:
+        root = await drive.get_node_by_path(path)
+    except NodeNotFoundError:
+        return Counter()
+    with open_snapshot(drive) as db:
+        return _sum_by_name(db, root.id)
+
+
+def _sum_by_name(db: sqlite3.Connection, parent_id: str) -> Counter[str]:
+    sizes = get_subtree_sizes(db, parent_id)
+    by_name: Counter[str] = Counter()
+    for row in iter_children(db, parent_id):
+        # Siblings may share a name; the copy merges them into one.
+        by_name[row.name] += sizes.get(row.id, 0)
+    return by_name
+
+
+def format_eta(left: int, rate: float) -> str:
+    if left <= 0:
+        return "0:00:00"
+    if rate <= 0:
+        return "unknown"
+    return str(timedelta(seconds=int(left / rate)))
+
+
+def _percent(done: int, total: int) -> str:
+    return f"{done / total * 100:.2f}%" if total > 0 else "100.00%"
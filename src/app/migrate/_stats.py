@@ -0,0 +1,138 @@
+import asyncio
+import math
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+
+from ..lib import humanize
+
+
+class Bucket(NamedTuple):
+    start: float
+    count: int
+    size: int
+    duration: float
+
+
+# Every bucket of the period in one pass; empty ones are filled in later.
+_SQL_HISTOGRAM = """
+SELECT CAST(started_at / ? AS INTEGER), COUNT(*), SUM(size), SUM(duration)
+FROM transfers
+WHERE started_at >= ?
+GROUP BY 1
+ORDER BY 1;
+"""
+
+_PERCENTILES = (10, 50, 90)
+
+
+async def stats(
+    ledger_path: Path,
+    *,
+    period: timedelta,
+    bucket: timedelta,
+    follow: bool = False,
+    interval: float = 5.0,
+) -> None:
+    with open_ledger_snapshot(ledger_path) as db:
+        since = time.time() - period.total_seconds()
+        width = bucket.total_seconds()
+
+        total = 0
+        for row in get_histogram(db, since=since, width=width):
+            total += row.size
+            print(
+                f"{_format_time(row.start)}  {humanize(row.size):>9}  "
+                f"{row.count:5} files  {humanize(int(row.size / width)):>9}/s"
+            )
+        print(f"total: {humanize(total)}")
+
+        rates = get_throughput(db, since=since)
+        print(f"per-file throughput ({len(rates)} files): {_format_percentiles(rates)}")
+
+        if follow:
+            await _follow(db, interval=interval)
+
+
+@contextmanager
+def open_ledger_snapshot(path: Path) -> Iterator[sqlite3.Connection]:
+    """Open the ledger read-only, so it can be watched during a copy."""
+    uri = f"{path.resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as db:
+        yield db
+
+
+def get_histogram(
+    db: sqlite3.Connection, *, since: float, width: float, until: float | None = None
+) -> list[Bucket]:
+    """Transfers started since then, summed per `width` seconds."""
+    with closing(db.cursor()) as query:
+        query.execute(_SQL_HISTOGRAM, (width, since))
+        found = {
+            index: (count, size, duration) for index, count, size, duration in query
+        }
+
+    until = time.time() if until is None else until
+    first = math.floor(since / width)
+    last = math.floor(until / width)
+    return [
+        Bucket(index * width, *found.get(index, (0, 0, 0.0)))
+        for index in range(first, last + 1)
+    ]
+
+
+def get_throughput(db: sqlite3.Connection, *, since: float) -> list[float]:
+    """Bytes per second of each file copied since then, slowest first."""
+    with closing(db.cursor()) as query:
+        query.execute(
+            "SELECT size / duration FROM transfers "
+            "WHERE started_at >= ? AND size > 0 AND duration > 0 "
+            "ORDER BY 1;",
+            (since,),
+        )
+        return [rate for (rate,) in query]
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def _follow(db: sqlite3.Connection, *, interval: float) -> None:
+    with closing(db.cursor()) as query:
+        query.execute("SELECT COALESCE(MAX(id), 0) FROM transfers;")
+        (last_id,) = query.fetchone()
+
+    while True:
+        await asyncio.sleep(interval)
+        with closing(db.cursor()) as query:
+            query.execute(
+                "SELECT id, size, started_at, duration FROM transfers "
+                "WHERE id > ? ORDER BY id;",
+                (last_id,),
+            )
+            rows = query.fetchall()
+        for last_id, size, started_at, duration in rows:
+            rate = size / duration if duration > 0 else 0.0
+            print(
+                f"{_format_time(started_at)}  {humanize(size):>9}  "
+                f"{duration:8.1f}s  {humanize(int(rate)):>9}/s",
+                flush=True,
+            )
+
+
+def _format_percentiles(ordered: list[float]) -> str:
+    return " ".join(
+        f"p{_}={humanize(int(percentile(ordered, _)))}/s" for _ in _PERCENTILES
+    )
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+
+from wcpan.drive.core.types import Node
+
+
+@dataclass(frozen=True, kw_only=True)
+class FolderWork:
+    src: Node
+    dst_parent: Node
+
+
+@dataclass(frozen=True, kw_only=True)
+class FileWork:
+    src: Node
+    dst_parent: Node
+
+
+type Work = FolderWork | FileWork
+
+
+@dataclass(kw_only=True)
+class Summary:
+    copied: int = 0
+    skipped: int = 0
+    failed: int = 0
+    size: int = 0
@@ -0,0 +1,41 @@
+import sys
+import unicodedata
+from collections.abc import Iterator
+
+from wcpan.drive.core.types import Drive
+
+from ..lib import (
+    NodeRow,
+    create_default_drive,
+    iter_descendants,
+    open_snapshot,
+    open_yaml_list,
+)
+from ._types import ManifestEntry
+
+
+_FORM = "NFC"
+
+
+async def analyze() -> None:
+    async with create_default_drive() as drive:
+        root = await drive.get_root()
+        with open_yaml_list(sys.stdout) as writer:
+            for row in _iter_denormalized(drive, root.id):
+                entry: ManifestEntry = {
+                    "id": row.id,
+                    "name": row.name,
+                    "new_name": unicodedata.normalize(_FORM, row.name),
+                }
+                writer.write(entry)
+
+
+def _is_denormalized(name: str) -> bool:
+    return not unicodedata.is_normalized(_FORM, name)
+
+
+def _iter_denormalized(drive: Drive, root_id: str) -> Iterator[NodeRow]:
+    # One recursive query rather than a walk folder by folder. It leaves out
+    # trashed folders with everything under them, as the walk did.
+    with open_snapshot(drive) as db:
+        yield from iter_descendants(db, root_id, match=_is_denormalized)
@@ -0,0 +1,16 @@
+import sys
+import time
+
+import yaml
+
+from ..lib import create_default_drive, print_throughput, rename_nodes
+from ._types import ManifestEntry
+
+
+async def apply(*, jobs: int = 4) -> None:
+    entries: list[ManifestEntry] = yaml.safe_load(sys.stdin) or []
+
+    async with create_default_drive() as drive:
+        started = time.monotonic()
+        count = await rename_nodes(drive, entries, jobs=jobs)
+        print_throughput("renamed", count, len(entries), started)
@@ -0,0 +1,39 @@
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from typing import Literal
+
+from ._analyze import analyze
+from ._apply import apply
+
+
+type Action = Callable[[], Awaitable[None]]
+
+
+def parse_args(args: list[str]) -> Action:
+    parser = ArgumentParser("nu")
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    subparsers.add_parser(
+        "analyze", help="Find names that are not NFC and emit rename manifest"
+    )
+
+    apply_parser = subparsers.add_parser(
+        "apply", help="Apply renames from manifest on stdin"
+    )
+    apply_parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="Concurrent renames (default: 4)"
+    )
+
+    kwargs = parser.parse_args(args)
+    command: Literal["analyze", "apply"] | None = kwargs.command
+
+    match command:
+        case "analyze":
+            return analyze
+        case "apply":
+            if kwargs.jobs < 1:
+                parser.error("--jobs must be at least 1")
+            return lambda: apply(jobs=kwargs.jobs)
+        case _:
+            parser.print_help()
+            raise SystemExit(1)
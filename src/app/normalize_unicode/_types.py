@@ -0,0 +1,7 @@
+from typing import TypedDict
+
+
+class ManifestEntry(TypedDict):
+    id: str
+    name: str
+    new_name: str
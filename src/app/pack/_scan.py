@@ -7,11 +7,10 @@ import yaml
 
 
 _CONCURRENCY = 8
-_sem = asyncio.Semaphore(_CONCURRENCY)
 
 
-async def _detect_mime(path: Path) -> str:
-    async with _sem:
+async def _detect_mime(path: Path, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
         return await asyncio.to_thread(magic.from_file, str(path), mime=True)  # type: ignore
 
 
@@ -25,10 +24,12 @@ def _write_entry(entry: dict) -> None:
 
 
 async def scan(paths: list[Path]) -> None:
+    # Per call, as a semaphore is bound to the loop it first waits in.
+    semaphore = asyncio.Semaphore(_CONCURRENCY)
     for root_path in paths:
         for folder, subdirs, files in root_path.walk():
             mime_types = await asyncio.gather(
-                *[_detect_mime(folder / f) for f in files]
+                *[_detect_mime(folder / f, semaphore) for f in files]
             )
             type_counts: dict[str, int] = {}
             for mime in mime_types:
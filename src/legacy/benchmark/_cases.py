@@ -0,0 +1,153 @@
+"""Timed node-cache operations, through the drive's snapshot service and
+through the app.lib queries the tools use instead.
+"""
+
+import sqlite3
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import PurePath
+
+from wcpan.drive.core.types import SnapshotService
+
+from app.lib import iter_children, iter_descendants, iter_duplicates, iter_nodes
+
+from ._lib import Sandbox
+
+
+@dataclass(frozen=True, kw_only=True)
+class Result:
+    name: str
+    size: int
+    # What `count` counts: single lookups, or nodes returned or scanned.
+    unit: str
+    count: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.seconds if self.seconds > 0 else 0.0
+
+
+type Case = Callable[[Sandbox, SnapshotService, sqlite3.Connection], Awaitable[Result]]
+
+# Nodes visited per walk from the root, so large snapshots stay comparable.
+_WALK_BUDGET = 10_000
+
+_VIDEO_GLOB = "*.mp4"
+_VIDEO_REGEX = r"\.mp4$"
+
+
+async def children_service(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    for folder_id in sb.folder_ids:
+        await service.get_children_by_id(folder_id)
+    return _result("children/service", sb, "lookups", len(sb.folder_ids), started)
+
+
+async def children_lib(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    for folder_id in sb.folder_ids:
+        list(iter_children(db, folder_id))
+    return _result("children/lib", sb, "lookups", len(sb.folder_ids), started)
+
+
+async def resolve_service(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    for node_id in sb.node_ids:
+        await service.resolve_path_by_id(node_id)
+    return _result("resolve/service", sb, "lookups", len(sb.node_ids), started)
+
+
+async def path_service(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    # Paths are resolved up front, so only the lookup by path is timed.
+    paths: list[PurePath] = []
+    for node_id in sb.node_ids:
+        paths.append(await service.resolve_path_by_id(node_id))
+
+    started = time.perf_counter()
+    for path in paths:
+        await service.get_node_by_path(path)
+    return _result("path/service", sb, "lookups", len(paths), started)
+
+
+async def walk_service(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    # One listing per folder, as drive.walk() does.
+    started = time.perf_counter()
+    count = 0
+    pending = deque([sb.root.id])
+    while pending and count < _WALK_BUDGET:
+        children = await service.get_children_by_id(pending.popleft())
+        live = [_ for _ in children if not _.is_trashed]
+        count += len(live)
+        pending.extend(_.id for _ in live if _.is_directory)
+    return _result("walk/service", sb, "nodes", count, started)
+
+
+async def walk_lib(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    rows = iter_descendants(db, sb.root.id)
+    count = sum(1 for _ in islice(rows, _WALK_BUDGET))
+    return _result("walk/lib", sb, "nodes", count, started)
+
+
+async def regex_service(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    await service.find_nodes_by_regex(_VIDEO_REGEX)
+    return _result("regex/service", sb, "nodes", sb.size, started)
+
+
+async def glob_lib(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    list(iter_nodes(db, include_trashed=True, glob=_VIDEO_GLOB))
+    return _result("glob/lib", sb, "nodes", sb.size, started)
+
+
+async def duplicates_lib(
+    sb: Sandbox, service: SnapshotService, db: sqlite3.Connection
+) -> Result:
+    started = time.perf_counter()
+    for _group in iter_duplicates(db):
+        pass
+    return _result("duplicates/lib", sb, "nodes", sb.size, started)
+
+
+CASES: dict[str, Case] = {
+    "children/service": children_service,
+    "children/lib": children_lib,
+    "resolve/service": resolve_service,
+    "path/service": path_service,
+    "walk/service": walk_service,
+    "walk/lib": walk_lib,
+    "regex/service": regex_service,
+    "glob/lib": glob_lib,
+    "duplicates/lib": duplicates_lib,
+}
+
+
+def _result(name: str, sb: Sandbox, unit: str, count: int, started: float) -> Result:
+    return Result(
+        name=name,
+        size=sb.size,
+        unit=unit,
+        count=count,
+        seconds=time.perf_counter() - started,
+    )
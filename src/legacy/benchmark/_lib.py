@@ -1,30 +1,54 @@
 import random
-import string
-from contextlib import contextmanager
-from datetime import UTC, datetime
+import sqlite3
+from collections import deque
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 from wcpan.drive.core.types import Node
+from wcpan.drive.sqlite._outer import initialize, set_root
 
+from app.lib import write_nodes
 
-_STR_LIST = string.digits + string.ascii_letters
+
+# Hashes handed out lately, so some files share content.
+_recent_hashes: deque[str] = deque(maxlen=1024)
+
+_INSERT_BATCH = 10_000
 
 
 def random_bool() -> bool:
     return random.choice((True, False))
 
 
+def random_trashed() -> bool:
+    return random.random() < 0.05
+
+
 def random_int() -> int:
     return random.randint(0, 1024)
 
 
 def random_date() -> datetime:
-    return datetime.now(UTC).replace(microsecond=0)
+    now = datetime.now(UTC).replace(microsecond=0)
+    return now - timedelta(seconds=random.randint(0, 365 * 24 * 60 * 60))
 
 
 def random_str() -> str:
-    return "".join(random.choices(_STR_LIST, k=64))
+    # Hex of random bytes: one call per string, which matters at 10M nodes.
+    return random.randbytes(32).hex()
+
+
+def random_hash() -> str:
+    # One file in ten repeats a recent hash, so hash grouping has sets to find.
+    if _recent_hashes and random.random() < 0.1:
+        return random.choice(_recent_hashes)
+    hash_ = random_str()
+    _recent_hashes.append(hash_)
+    return hash_
 
 
 def random_private() -> dict[str, str]:
@@ -40,8 +64,9 @@ def random_root() -> Node:
         name="",
         is_directory=True,
         is_trashed=False,
-        ctime=random_date(),
-        mtime=random_date(),
+        created_time=random_date(),
+        modified_time=random_date(),
+        changed_time=random_date(),
         mime_type="",
         hash="",
         size=0,
@@ -60,9 +85,10 @@ def random_dir(parent_id: str) -> Node:
         parent_id=parent_id,
         name=random_str(),
         is_directory=True,
-        is_trashed=random_bool(),
-        ctime=random_date(),
-        mtime=random_date(),
+        is_trashed=random_trashed(),
+        created_time=random_date(),
+        modified_time=random_date(),
+        changed_time=random_date(),
         mime_type="",
         hash="",
         size=0,
@@ -79,13 +105,14 @@ def random_file(parent_id: str) -> Node:
     return Node(
         id=random_str(),
         parent_id=parent_id,
-        name=random_str(),
+        name=random_str() + ".bin",
         is_directory=False,
-        is_trashed=random_bool(),
-        ctime=random_date(),
-        mtime=random_date(),
+        is_trashed=random_trashed(),
+        created_time=random_date(),
+        modified_time=random_date(),
+        changed_time=random_date(),
         mime_type="application/octet-stream",
-        hash=random_str(),
+        hash=random_hash(),
         size=random_int(),
         is_image=False,
         is_video=False,
@@ -100,13 +127,14 @@ def random_image(parent_id: str):
     return Node(
         id=random_str(),
         parent_id=parent_id,
-        name=random_str(),
+        name=random_str() + ".svg",
         is_directory=False,
-        is_trashed=random_bool(),
-        ctime=random_date(),
-        mtime=random_date(),
+        is_trashed=random_trashed(),
+        created_time=random_date(),
+        modified_time=random_date(),
+        changed_time=random_date(),
         mime_type="image/svg+xml",
-        hash=random_str(),
+        hash=random_hash(),
         size=random_int(),
         is_image=True,
         is_video=False,
@@ -121,13 +149,14 @@ def random_video(parent_id: str) -> Node:
     return Node(
         id=random_str(),
         parent_id=parent_id,
-        name=random_str(),
+        name=random_str() + ".mp4",
         is_directory=False,
-        is_trashed=random_bool(),
-        ctime=random_date(),
-        mtime=random_date(),
+        is_trashed=random_trashed(),
+        created_time=random_date(),
+        modified_time=random_date(),
+        changed_time=random_date(),
         mime_type="video/mp4",
-        hash=random_str(),
+        hash=random_hash(),
         size=random_int(),
         is_image=False,
         is_video=True,
@@ -138,17 +167,102 @@ def random_video(parent_id: str) -> Node:
     )
 
 
+def random_child(parent_id: str) -> Node:
+    """A folder one time in four, otherwise a file, image or video."""
+    match random.randrange(8):
+        case 0 | 1:
+            return random_dir(parent_id)
+        case 2:
+            return random_image(parent_id)
+        case 3:
+            return random_video(parent_id)
+        case _:
+            return random_file(parent_id)
+
+
+@dataclass(frozen=True, kw_only=True)
+class Sandbox:
+    dsn: str
+    root: Node
+    size: int
+    # Sampled uniformly while populating, for per-lookup timings.
+    folder_ids: list[str]
+    node_ids: list[str]
+
+
 @contextmanager
-def sandbox():
+def sandbox(size: int, *, fanout: int = 32, samples: int = 100) -> Iterator[Sandbox]:
+    """A node cache of `size` random nodes in a temporary SQLite file."""
     with TemporaryDirectory() as tmp:
         tmp_path = Path(tmp)
         data_path = tmp_path / "sandbox.sqlite"
         dsn = str(data_path)
-        # initialize(dsn)
-        # root = random_root()
-        # set_root(dsn, root)
-        # with read_write(dsn) as query:
-        #     for _ in range(10000):
-        #         node = random_image(root.id)
-        #         inner_insert_node(query, node)
-        yield dsn
+        initialize(dsn)
+        root = random_root()
+        set_root(dsn, root)
+        folder_ids, node_ids = populate(dsn, root, size, fanout=fanout, samples=samples)
+        yield Sandbox(
+            dsn=dsn,
+            root=root,
+            size=size,
+            folder_ids=folder_ids,
+            node_ids=node_ids,
+        )
+
+
+def populate(
+    dsn: str, root: Node, size: int, *, fanout: int, samples: int
+) -> tuple[list[str], list[str]]:
+    """Grow a tree breadth first, `fanout` children per folder.
+
+    Rows go in through app.lib.write_nodes, a batch per transaction, so
+    millions of nodes take minutes rather than hours.
+    """
+    folders = deque([root.id])
+    folder_ids = _Reservoir(samples)
+    node_ids = _Reservoir(samples)
+    batch: list[Node] = []
+    with closing(sqlite3.connect(dsn)) as db:
+        # Build speed only; the benchmark never survives a crash.
+        db.execute("PRAGMA journal_mode = OFF;")
+        db.execute("PRAGMA synchronous = OFF;")
+        # Random ids land all over the indices; keep them in memory.
+        db.execute("PRAGMA cache_size = -1048576;")
+        created = 0
+        while created < size:
+            # Trees where every folder came out trashed still need to grow.
+            parent_id = folders.popleft() if folders else root.id
+            for _ in range(min(fanout, size - created)):
+                node = random_child(parent_id)
+                batch.append(node)
+                node_ids.add(node.id)
+                if node.is_directory:
+                    folder_ids.add(node.id)
+                    if not node.is_trashed:
+                        folders.append(node.id)
+                created += 1
+            if len(batch) >= _INSERT_BATCH:
+                with db:
+                    write_nodes(db, batch)
+                batch.clear()
+        with db:
+            write_nodes(db, batch)
+    return folder_ids.items, node_ids.items
+
+
+class _Reservoir:
+    """A uniform sample of a stream of unknown length."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._seen = 0
+        self.items: list[str] = []
+
+    def add(self, item: str) -> None:
+        self._seen += 1
+        if len(self.items) < self._size:
+            self.items.append(item)
+            return
+        index = random.randrange(self._seen)
+        if index < self._size:
+            self.items[index] = item
@@ -0,0 +1,126 @@
+"""Time node-cache operations over synthetic snapshots.
+
+Usage: PYTHONPATH=src python -m legacy.benchmark [--size N ...] [-o FILE]
+
+Prints one JSON document, so runs before and after a wcpan.drive.sqlite
+upgrade can be compared by case name and size.
+"""
+
+import asyncio
+import json
+import platform
+import random
+import sqlite3
+import sys
+import time
+from argparse import ArgumentParser
+from contextlib import closing
+from dataclasses import asdict
+from importlib.metadata import version
+from pathlib import Path
+from typing import NoReturn
+
+from wcpan.drive.sqlite import create_service
+
+from ._cases import CASES, Result
+from ._lib import sandbox
+
+
+_MIN_SIZE = 10_000
+_MAX_SIZE = 10_000_000
+
+
+async def _main(args: list[str]) -> int:
+    parser = ArgumentParser("benchmark")
+    parser.add_argument(
+        "--size",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Nodes per snapshot, one run each (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--case",
+        choices=sorted(CASES),
+        nargs="+",
+        default=list(CASES),
+        help="Operations to time (default: all)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=100,
+        help="Folders and nodes looked up per case (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=32,
+        help="Children per folder (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed (default: %(default)s)"
+    )
+    parser.add_argument("-o", "--output", type=str, help="Write JSON here, not stdout")
+    kwargs = parser.parse_args(args)
+
+    for size in kwargs.size:
+        if not _MIN_SIZE <= size <= _MAX_SIZE:
+            parser.error(f"--size must be between {_MIN_SIZE} and {_MAX_SIZE}")
+
+    random.seed(kwargs.seed)
+    results: list[Result] = []
+    for size in kwargs.size:
+        results.extend(
+            await _run(size, kwargs.case, samples=kwargs.samples, fanout=kwargs.fanout)
+        )
+
+    report = {
+        "environment": _get_environment(),
+        "results": [asdict(_) | {"rate": _.rate} for _ in results],
+    }
+    if kwargs.output:
+        with open(kwargs.output, "w") as fout:
+            json.dump(report, fout, indent=2)
+            fout.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+async def _run(
+    size: int, cases: list[str], *, samples: int, fanout: int
+) -> list[Result]:
+    started = time.perf_counter()
+    with sandbox(size, fanout=fanout, samples=samples) as sb:
+        print(
+            f"populated {size} nodes in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+        results: list[Result] = []
+        async with create_service(dsn=sb.dsn) as service:
+            uri = f"{Path(sb.dsn).as_uri()}?mode=ro"
+            with closing(sqlite3.connect(uri, uri=True)) as db:
+                for name in cases:
+                    result = await CASES[name](sb, service, db)
+                    print(
+                        f"{name}: {result.count} {result.unit} in "
+                        f"{result.seconds:.3f}s ({result.rate:.0f}/s)",
+                        file=sys.stderr,
+                    )
+                    results.append(result)
+        return results
+
+
+def _get_environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "wcpan.drive.sqlite": version("wcpan.drive.sqlite"),
+        "machine": platform.machine(),
+    }
+
+
+def run_as_module() -> NoReturn:
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,354 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, closing
+from dataclasses import replace
+from datetime import UTC, datetime
+from itertools import count
+from pathlib import Path, PurePath
+
+from wcpan.drive.core.exceptions import NodeExistsError, NodeNotFoundError
+from wcpan.drive.core.types import MediaInfo, Node
+from wcpan.drive.sqlite._inner import inner_insert_node
+from wcpan.drive.sqlite._sql import SQL_CREATE_TABLES
+
+
+# Bound early so tests can patch asyncio.sleep for backoff without
+# collapsing the simulated latency.
+_sleep = asyncio.sleep
+
+
+def make_node(
+    node_id: str,
+    name: str,
+    *,
+    parent_id: str | None,
+    is_directory: bool = False,
+    is_trashed: bool = False,
+    size: int = 0,
+    hash_: str = "",
+) -> Node:
+    now = datetime(2026, 1, 1, tzinfo=UTC)
+    return Node(
+        id=node_id,
+        parent_id=parent_id,
+        name=name,
+        is_directory=is_directory,
+        is_trashed=is_trashed,
+        created_time=now,
+        modified_time=now,
+        changed_time=now,
+        mime_type="" if is_directory else "application/octet-stream",
+        hash="" if is_directory else hash_,
+        size=0 if is_directory else size,
+        is_image=False,
+        is_video=False,
+        width=0,
+        height=0,
+        ms_duration=0,
+        private=None,
+    )
+
+
+class RateLimitedError(Exception):
+    status = 429
+
+
+class ServerError(Exception):
+    status = 500
+
+
+class FakeDrive:
+    """In-memory stand-in for the parts of `Drive` the tools use."""
+
+    def __init__(self, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.nodes: dict[str, Node] = {
+            "root": make_node("root", "", parent_id=None, is_directory=True)
+        }
+        self.failures: dict[str, list[Exception]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.dsn = ""
+        self.contents: dict[str, bytes] = {}
+        self.chunk_size = 4
+        # (offset, acknowledged) pairs: a write past the offset drops the
+        # connection, losing whatever came after the acknowledged offset.
+        self.write_failures: list[tuple[int, int]] = []
+        self.uploaded = 0
+        self.hash_threads: set[int] = set()
+        self._ids = count()
+
+    def add(self, node: Node) -> Node:
+        self.nodes[node.id] = node
+        return node
+
+    def add_directory(self, node_id: str, name: str, *, parent_id: str) -> Node:
+        return self.add(
+            make_node(node_id, name, parent_id=parent_id, is_directory=True)
+        )
+
+    def add_file(self, node_id: str, name: str, *, parent_id: str, **kwargs) -> Node:
+        return self.add(make_node(node_id, name, parent_id=parent_id, **kwargs))
+
+    def add_content(
+        self, node_id: str, name: str, content: bytes, *, parent_id: str
+    ) -> Node:
+        """Add a file whose hash and size match its content."""
+        self.contents[node_id] = content
+        return self.add_file(
+            node_id,
+            name,
+            parent_id=parent_id,
+            size=len(content),
+            hash_=hashlib.md5(content).hexdigest(),
+        )
+
+    def write_snapshot(self, path: Path) -> str:
+        """Dump the nodes into a node cache laid out like wcpan.drive.sqlite."""
+        with closing(sqlite3.connect(path)) as db, closing(db.cursor()) as query:
+            for sql in SQL_CREATE_TABLES:
+                query.execute(sql)
+            for node in self.nodes.values():
+                inner_insert_node(query, node)
+            db.commit()
+        self.dsn = str(path)
+        return self.dsn
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator["FakeDrive"]:
+        yield self
+
+    async def get_root(self) -> Node:
+        return self.nodes["root"]
+
+    async def get_node_by_id(self, node_id: str) -> Node:
+        try:
+            return self.nodes[node_id]
+        except KeyError:
+            raise NodeNotFoundError(node_id) from None
+
+    async def get_node_by_path(self, path: PurePath) -> Node:
+        node = self.nodes["root"]
+        for part in path.parts[1:]:
+            children = await self.get_children(node)
+            match = next((_ for _ in children if _.name == part), None)
+            if match is None:
+                raise NodeNotFoundError(str(path))
+            node = match
+        return node
+
+    async def resolve_path(self, node: Node) -> PurePath:
+        parts: list[str] = []
+        while node.parent_id is not None:
+            parts.insert(0, node.name)
+            node = self.nodes[node.parent_id]
+        return PurePath("/", *parts)
+
+    async def get_children(self, parent: Node) -> list[Node]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await _sleep(self.latency)
+            failures = self.failures.get(parent.id)
+            if failures:
+                raise failures.pop(0)
+            return [_ for _ in self.nodes.values() if _.parent_id == parent.id]
+        finally:
+            self.in_flight -= 1
+
+    async def get_child_by_name(self, name: str, parent: Node) -> Node:
+        for node in self.nodes.values():
+            if node.parent_id == parent.id and node.name == name:
+                return node
+        raise NodeNotFoundError(name)
+
+    async def create_directory(
+        self, name: str, parent: Node, *, exist_ok: bool = False
+    ) -> Node:
+        try:
+            node = await self.get_child_by_name(name, parent)
+        except NodeNotFoundError:
+            return self.add_directory(self._new_id(), name, parent_id=parent.id)
+        if not exist_ok:
+            raise NodeExistsError(node)
+        return node
+
+    async def get_hasher_factory(self, node: Node):
+        async def create_hasher() -> FakeHasher:
+            return FakeHasher(self.hash_threads)
+
+        return create_hasher
+
+    @asynccontextmanager
+    async def download_file(self, node: Node) -> AsyncIterator["FakeReadable"]:
+        failures = self.failures.get(node.id)
+        if failures:
+            raise failures.pop(0)
+        yield FakeReadable(self, node)
+
+    @asynccontextmanager
+    async def upload_file(
+        self,
+        name: str,
+        parent: Node,
+        *,
+        size: int | None = None,
+        mime_type: str | None = None,
+        media_info: MediaInfo | None = None,
+    ) -> AsyncIterator["FakeWritable"]:
+        yield FakeWritable(self, name, parent)
+
+    def _new_id(self) -> str:
+        return f"new-{next(self._ids)}"
+
+    async def walk(
+        self, node: Node, *, include_trashed: bool = False
+    ) -> AsyncIterator[tuple[Node, list[Node], list[Node]]]:
+        children = await self.get_children(node)
+        if not include_trashed:
+            children = [_ for _ in children if not _.is_trashed]
+        dirs = [_ for _ in children if _.is_directory]
+        files = [_ for _ in children if not _.is_directory]
+        yield node, dirs, files
+        for child in dirs:
+            async for item in self.walk(child, include_trashed=include_trashed):
+                yield item
+
+    async def move(
+        self,
+        node: Node,
+        *,
+        new_parent: Node | None = None,
+        new_name: str | None = None,
+    ) -> Node:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await _sleep(self.latency)
+            failures = self.failures.get(node.id)
+            if failures:
+                raise failures.pop(0)
+            if node.id not in self.nodes:
+                raise NodeNotFoundError(node.id)
+            moved = replace(
+                self.nodes[node.id],
+                parent_id=new_parent.id if new_parent else node.parent_id,
+                name=new_name if new_name is not None else node.name,
+            )
+            self.nodes[node.id] = moved
+            return moved
+        finally:
+            self.in_flight -= 1
+
+    async def delete(self, node: Node, *, permanent: bool = False) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await _sleep(self.latency)
+            failures = self.failures.get(node.id)
+            if failures:
+                raise failures.pop(0)
+            if permanent:
+                del self.nodes[node.id]
+            else:
+                self.nodes[node.id] = replace(self.nodes[node.id], is_trashed=True)
+        finally:
+            self.in_flight -= 1
+
+
+class FakeHasher:
+    def __init__(self, threads: set[int]) -> None:
+        self._hasher = hashlib.md5()
+        self._threads = threads
+
+    async def update(self, data: bytes) -> None:
+        self._threads.add(threading.get_ident())
+        self._hasher.update(data)
+
+    async def digest(self) -> bytes:
+        return self._hasher.digest()
+
+    async def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+    async def copy(self) -> "FakeHasher":
+        hasher = FakeHasher(self._threads)
+        hasher._hasher = self._hasher.copy()
+        return hasher
+
+
+class FakeReadable:
+    def __init__(self, drive: FakeDrive, node: Node) -> None:
+        self._drive = drive
+        self._node = node
+        self._offset = 0
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iter()
+
+    async def _iter(self) -> AsyncIterator[bytes]:
+        while chunk := await self.read(self._drive.chunk_size):
+            yield chunk
+
+    async def read(self, length: int) -> bytes:
+        await _sleep(self._drive.latency)
+        content = self._drive.contents[self._node.id]
+        length = min(length, self._drive.chunk_size)
+        chunk = content[self._offset : self._offset + length]
+        self._offset += len(chunk)
+        return chunk
+
+    async def seek(self, offset: int) -> int:
+        self._offset = offset
+        return offset
+
+    async def node(self) -> Node:
+        return self._node
+
+
+class FakeWritable:
+    def __init__(self, drive: FakeDrive, name: str, parent: Node) -> None:
+        self._drive = drive
+        self._name = name
+        self._parent = parent
+        self._buffer = bytearray()
+        self._node: Node | None = None
+
+    async def tell(self) -> int:
+        return len(self._buffer)
+
+    async def seek(self, offset: int) -> int:
+        del self._buffer[offset:]
+        return offset
+
+    async def write(self, chunk: bytes) -> int:
+        drive = self._drive
+        drive.in_flight += 1
+        drive.max_in_flight = max(drive.max_in_flight, drive.in_flight)
+        try:
+            await _sleep(drive.latency)
+            failures = drive.write_failures
+            if failures and len(self._buffer) + len(chunk) > failures[0][0]:
+                _offset, acknowledged = failures.pop(0)
+                del self._buffer[acknowledged:]
+                raise ConnectionResetError("connection reset")
+            self._buffer.extend(chunk)
+            drive.uploaded += len(chunk)
+            return len(chunk)
+        finally:
+            drive.in_flight -= 1
+
+    async def flush(self) -> None:
+        self._node = self._drive.add_content(
+            self._drive._new_id(),
+            self._name,
+            bytes(self._buffer),
+            parent_id=self._parent.id,
+        )
+
+    async def node(self) -> Node:
+        assert self._node is not None
+        return self._node
@@ -0,0 +1,280 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path, PurePath
+from unittest.mock import AsyncMock, patch
+
+import yaml
+from wcpan.drive.core.exceptions import DriveError
+
+from app.cg._analyze import analyze
+from app.cg._apply import apply
+from app.cg._rules import DEFAULT_RULES, Classifier, load_rules
+
+from ._fakes import FakeDrive, RateLimitedError
+
+
+def _run_apply(drive: FakeDrive, manifest: list[dict], **kwargs) -> tuple[str, str]:
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with (
+        patch("app.cg._apply.create_default_drive", drive.context),
+        patch("app.lib.asyncio.sleep", AsyncMock()),
+        patch("sys.stdin", io.StringIO(yaml.safe_dump(manifest, allow_unicode=True))),
+        redirect_stdout(stdout),
+        redirect_stderr(stderr),
+    ):
+        asyncio.run(
+            apply(
+                destinations={
+                    "comic": PurePath("/comic"),
+                    "original": PurePath("/original"),
+                },
+                **kwargs,
+            )
+        )
+    return stdout.getvalue(), stderr.getvalue()
+
+
+def _library(count: int, *, latency: float = 0.0) -> FakeDrive:
+    drive = FakeDrive(latency=latency)
+    drive.add_directory("comic", "comic", parent_id="root")
+    drive.add_directory("original", "original", parent_id="root")
+    drive.add_directory("inbox", "inbox", parent_id="root")
+    for index in range(count):
+        drive.add_file(f"book{index}", f"book{index}.zip", parent_id="inbox")
+    return drive
+
+
+def _write_rules(directory: str, text: str) -> Path:
+    path = Path(directory) / "cg.yaml"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _run_analyze(drive: FakeDrive, path: str, **kwargs) -> object:
+    stdout = io.StringIO()
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        patch("app.cg._analyze.create_default_drive", drive.context),
+        patch("app.lib._get_dsn", lambda _: drive.dsn),
+        redirect_stdout(stdout),
+    ):
+        drive.write_snapshot(Path(directory) / "nodes.sqlite")
+        asyncio.run(analyze(PurePath(path), **kwargs))
+    return yaml.safe_load(stdout.getvalue())
+
+
+class TestAnalyze(unittest.TestCase):
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.drive.add_directory("inbox", "inbox", parent_id="root")
+        self.drive.add_directory("nested", "nested", parent_id="inbox")
+        self.drive.add_file("c1", "(成年コミック) [Author] Book.zip", parent_id="inbox")
+        self.drive.add_file(
+            "o1", "(C99) [Circle] Title (オリジナル).zip", parent_id="inbox"
+        )
+        self.drive.add_file(
+            "x1", "(C99) [Circle] Title (Parody).zip", parent_id="inbox"
+        )
+        self.drive.add_file(
+            "t1",
+            "(成年コミック) [Author] Trashed.zip",
+            parent_id="inbox",
+            is_trashed=True,
+        )
+        self.drive.add_file(
+            "c2", "(成年コミック) [Author] Deep.zip", parent_id="nested"
+        )
+
+    def test_emits_one_list_of_direct_children(self):
+        self.assertEqual(
+            _run_analyze(self.drive, "/inbox"),
+            [
+                {
+                    "id": "c1",
+                    "name": "(成年コミック) [Author] Book.zip",
+                    "type": "comic",
+                },
+                {
+                    "id": "o1",
+                    "name": "(C99) [Circle] Title (オリジナル).zip",
+                    "type": "original",
+                },
+            ],
+        )
+
+    def test_walks_nested_folders_when_recursive(self):
+        result = _run_analyze(self.drive, "/inbox", recursive=True)
+
+        assert isinstance(result, list)
+        self.assertEqual(sorted(_["id"] for _ in result), ["c1", "c2", "o1"])
+
+    def test_emits_an_empty_list_without_matches(self):
+        self.drive.add_directory("empty", "empty", parent_id="root")
+
+        self.assertEqual(_run_analyze(self.drive, "/empty"), [])
+
+
+class TestClassifier(unittest.TestCase):
+    def test_default_rules_follow_publisher_then_last_tag(self):
+        classifier = Classifier(DEFAULT_RULES)
+        cases = {
+            "(成年コミック) [Author] Book (オリジナル).zip": "comic",
+            "(C99) [Circle] Title (オリジナル).zip": "original",
+            "(C99) [Circle] Title (オリジナル) [DL版].zip": "original",
+            "(C99) [Circle] Title (オリジナル) (Parody).zip": None,
+            "(C99) [Circle] Title (Parody) (オリジナル).zip": "original",
+            "(C99) [Circle] a(b (オリジナル).zip": None,
+            "(C99) [Circle] Title () (オリジナル) ().zip": "original",
+            "(C99) [Circle] Title (オリジナル) (unclosed.zip": "original",
+            "(オリジナル).zip": None,
+            "[Circle] Title (オリジナル).zip": None,
+            " (成年コミック) Book.zip": None,
+            "": None,
+        }
+        for name, expected in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(classifier.classify(name), expected)
+
+    def test_loads_rules_with_new_types_in_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = _write_rules(
+                directory,
+                "version: 1\n"
+                "rules:\n"
+                "  - type: anthology\n"
+                "    regex: 'アンソロジー'\n"
+                "  - type: comic\n"
+                "    publisher: 成年コミック\n"
+                "  - type: game\n"
+                "    last_tag: 東方Project\n",
+            )
+            classifier = Classifier(load_rules(path))
+
+        self.assertEqual(
+            classifier.classify("(成年コミック) アンソロジー.zip"), "anthology"
+        )
+        self.assertEqual(classifier.classify("(成年コミック) Book.zip"), "comic")
+        self.assertEqual(classifier.classify("(C99) [A] B (東方Project).zip"), "game")
+        self.assertEqual(classifier.classify("[A] アンソロジー.zip"), "anthology")
+        self.assertIsNone(classifier.classify("(C99) [A] B (オリジナル).zip"))
+
+    def test_falls_back_to_default_rules_without_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(
+                load_rules(Path(directory) / "missing.yaml"), DEFAULT_RULES
+            )
+
+    def test_rejects_invalid_rules(self):
+        documents = [
+            "- type: comic\n",
+            "version: 2\nrules: []\n",
+            "version: 1\nrules:\n  - publisher: X\n",
+            "version: 1\nrules:\n  - type: a\n    publisher: X\n    regex: Y\n",
+            "version: 1\nrules:\n  - type: a\n    regex: '('\n",
+        ]
+        for document in documents:
+            with self.subTest(document=document):
+                with tempfile.TemporaryDirectory() as directory:
+                    path = _write_rules(directory, document)
+                    with self.assertRaises(ValueError):
+                        load_rules(path)
+
+    def test_rejects_regexes_that_break_the_combined_pattern(self):
+        regexes = [
+            ("'(?i)foo'", "global flags"),
+            ("'(a)\\1'", "backreferences"),
+            ("'(?P<publisher>x)'", "redefinition"),
+            ("'(?P<n>x)'", "redefinition"),
+        ]
+        for regex, reason in regexes:
+            with self.subTest(regex=regex):
+                with tempfile.TemporaryDirectory() as directory:
+                    path = _write_rules(
+                        directory,
+                        "version: 1\n"
+                        "rules:\n"
+                        "  - type: a\n"
+                        "    regex: '(?P<n>y)'\n"
+                        "  - type: b\n"
+                        "    publisher: X\n"
+                        "  - type: c\n"
+                        f"    regex: {regex}\n",
+                    )
+                    with self.assertRaisesRegex(ValueError, f"^rule 2 .*{reason}"):
+                        load_rules(path)
+
+
+class TestApply(unittest.TestCase):
+    def test_moves_each_entry_to_its_destination(self):
+        drive = _library(3)
+        manifest = [
+            {"id": "book0", "name": "book0.zip", "type": "comic"},
+            {"id": "book1", "name": "book1.zip", "type": "original"},
+            {"id": "missing", "name": "missing.zip", "type": "comic"},
+        ]
+
+        stdout, stderr = _run_apply(drive, manifest)
+
+        self.assertEqual(drive.nodes["book0"].parent_id, "comic")
+        self.assertEqual(drive.nodes["book1"].parent_id, "original")
+        self.assertEqual(drive.nodes["book2"].parent_id, "inbox")
+        self.assertIn("move: book0.zip -> /comic", stdout)
+        self.assertIn("move: book1.zip -> /original", stdout)
+        self.assertIn("missing", stderr)
+        self.assertIn("moved 2 of 3", stderr)
+
+    def test_runs_moves_with_bounded_concurrency(self):
+        drive = _library(12, latency=0.01)
+        manifest = [
+            {"id": f"book{index}", "name": f"book{index}.zip", "type": "comic"}
+            for index in range(12)
+        ]
+
+        _stdout, stderr = _run_apply(drive, manifest, jobs=3)
+
+        self.assertEqual(drive.max_in_flight, 3)
+        self.assertTrue(
+            all(drive.nodes[f"book{i}"].parent_id == "comic" for i in range(12))
+        )
+        self.assertIn("moved 12 of 12", stderr)
+
+    def test_retries_rate_limited_moves(self):
+        drive = _library(2)
+        drive.failures["book0"] = [RateLimitedError(), RateLimitedError()]
+        drive.failures["book1"] = [DriveError("denied")]
+        manifest = [
+            {"id": "book0", "name": "book0.zip", "type": "comic"},
+            {"id": "book1", "name": "book1.zip", "type": "comic"},
+        ]
+
+        _stdout, stderr = _run_apply(drive, manifest)
+
+        self.assertEqual(drive.nodes["book0"].parent_id, "comic")
+        self.assertEqual(drive.nodes["book1"].parent_id, "inbox")
+        self.assertIn("denied", stderr)
+        self.assertIn("moved 1 of 2", stderr)
+
+    def test_moves_custom_types_to_their_destinations(self):
+        drive = _library(1)
+        drive.add_directory("anthology", "anthology", parent_id="root")
+        manifest = [{"id": "book0", "name": "book0.zip", "type": "anthology"}]
+        stdout = io.StringIO()
+
+        with (
+            patch("app.cg._apply.create_default_drive", drive.context),
+            patch("sys.stdin", io.StringIO(yaml.safe_dump(manifest))),
+            redirect_stdout(stdout),
+            redirect_stderr(io.StringIO()),
+        ):
+            asyncio.run(apply(destinations={"anthology": PurePath("/anthology")}))
+
+        self.assertEqual(drive.nodes["book0"].parent_id, "anthology")
+        self.assertIn("move: book0.zip -> /anthology", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
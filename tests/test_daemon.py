@@ -0,0 +1,139 @@
+import asyncio
+import io
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from app.daemon._client import run
+from app.daemon._server import serve
+
+from ._fakes import FakeDrive
+
+
+class _Daemon:
+    """Runs the daemon on its own loop in a background thread."""
+
+    def __init__(self, socket_path: Path) -> None:
+        self.socket_path = socket_path
+        self._loop = asyncio.new_event_loop()
+        self._task: asyncio.Task[None] | None = None
+        self._thread = threading.Thread(target=self._run)
+
+    def _run(self) -> None:
+        self._task = self._loop.create_task(serve(self.socket_path))
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def start(self) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + 5
+        while not self.socket_path.exists():
+            if time.monotonic() > deadline:
+                raise TimeoutError("daemon did not start")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        assert self._task is not None
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+
+
+def _call(socket_path: Path, tool: str, args: list[str], stdin: str = ""):
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    with (
+        patch("sys.stdin", io.TextIOWrapper(io.BytesIO(stdin.encode("utf-8")))),
+        patch("sys.stdout", stdout),
+        patch("sys.stderr", stderr),
+    ):
+        status = run(socket_path, tool, args)
+    return status, _read(stdout), _read(stderr)
+
+
+def _read(stream: io.TextIOWrapper) -> str:
+    stream.flush()
+    return stream.buffer.getvalue().decode("utf-8")  # type: ignore
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+        self.drive = FakeDrive()
+        self.drive.add_directory("inbox", "inbox", parent_id="root")
+        self.drive.add_file("c1", "(成年コミック) [A] Book.zip", parent_id="inbox")
+        self.drive.add_file("bad", "what?.zip", parent_id="inbox")
+        self.drive.write_snapshot(self.root / "nodes.sqlite")
+        self.opened = 0
+
+        for target in (
+            patch("app.daemon._server.create_default_drive", self._open_drive),
+            patch("app.lib._get_dsn", lambda _: self.drive.dsn),
+        ):
+            target.start()
+            self.addCleanup(target.stop)
+
+        self.socket_path = self.root / "daemon.sock"
+        self.daemon = _Daemon(self.socket_path)
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+
+    def _open_drive(self):
+        self.opened += 1
+        return self.drive.context()
+
+    def test_runs_tools_against_one_shared_drive(self):
+        status, stdout, _stderr = _call(self.socket_path, "cg", ["analyze", "/inbox"])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(
+            yaml.safe_load(stdout),
+            [{"id": "c1", "name": "(成年コミック) [A] Book.zip", "type": "comic"}],
+        )
+
+        manifest = [{"id": "bad", "name": "what?.zip", "new_name": "what？.zip"}]
+        status, stdout, stderr = _call(
+            self.socket_path,
+            "longname",
+            ["apply"],
+            stdin=yaml.safe_dump(manifest, allow_unicode=True),
+        )
+
+        self.assertEqual(status, 0)
+        self.assertIn("rename: what?.zip → what？.zip", stdout)
+        self.assertIn("renamed 1 of 1", stderr)
+        self.assertEqual(self.drive.nodes["bad"].name, "what？.zip")
+        self.assertEqual(self.opened, 1)
+
+    def test_reports_errors_as_exit_status(self):
+        status, _stdout, stderr = _call(self.socket_path, "nope", [])
+        self.assertEqual(status, 1)
+        self.assertIn("unknown tool: nope", stderr)
+
+        status, _stdout, stderr = _call(self.socket_path, "cg", ["bogus"])
+        self.assertEqual(status, 2)
+        self.assertIn("invalid choice", stderr)
+
+    def test_binds_an_owner_only_socket(self):
+        self.assertEqual(self.socket_path.stat().st_mode & 0o777, 0o600)
+
+    def test_fails_fast_without_a_daemon(self):
+        status, _stdout, stderr = _call(self.root / "missing.sock", "cg", [])
+
+        self.assertEqual(status, 1)
+        self.assertIn("daemon is not running", stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,16 +3,103 @@ import io
 import os
 import tempfile
 import unittest
-from contextlib import redirect_stdout
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, redirect_stdout
+from html import escape
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
 
 import yaml
+from aiohttp import web
+from bs4 import BeautifulSoup
 
+from app.eh._extract import AnchorExtractor, extract_anchors
 from app.eh._main import _main
 from app.eh._types import CrawledData
 
 
+_FIXTURES = Path(__file__).parent / "fixtures" / "eh"
+
+
+class _NyaaStub:
+    """Local stand-in for the nyaa search page, for offline runs."""
+
+    def __init__(
+        self, *, latency: dict[str, float] | None = None, charset: bool = True
+    ) -> None:
+        self.latency = latency or {}
+        self.charset = charset
+        self.queries: list[str] = []
+        self.revalidated: list[str] = []
+        self.peers: set[object] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        query = request.query["q"]
+        self.queries.append(query)
+        if request.transport:
+            self.peers.add(request.transport.get_extra_info("peername"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency.get(query, 0))
+        finally:
+            self.in_flight -= 1
+        etag = f'"{len(query)}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.revalidated.append(query)
+            return web.Response(status=304, headers={"ETag": etag})
+        if not self.charset:
+            return web.Response(
+                body=_search_page(query).encode("utf-8"),
+                content_type="text/html",
+                headers={"ETag": etag},
+            )
+        return web.Response(
+            text=_search_page(query),
+            content_type="text/html",
+            headers={"ETag": etag},
+        )
+
+    @asynccontextmanager
+    async def serve(self) -> AsyncIterator[str]:
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        try:
+            host, port = runner.addresses[0][:2]
+            yield f"http://{host}:{port}/"
+        finally:
+            await runner.cleanup()
+
+
+def _search_page(query: str) -> str:
+    title = escape(f"{query} result", quote=True)
+    return (
+        "<html><body><table><tbody><tr>"
+        '<td><a href="/?c=1_0">Category</a></td>'
+        f'<td><a href="/view/1" title="{title}">{title}</a></td>'
+        "</tr></tbody></table></body></html>"
+    )
+
+
+def _run_with_stub(stub: _NyaaStub, root: Path, *args: str) -> tuple[int, list[dict]]:
+    async def run() -> int:
+        async with stub.serve() as host:
+            return await _main(
+                [str(root), "--host", host, "--cache", str(root / "eh.sqlite"), *args]
+            )
+
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+        result = asyncio.run(run())
+    return result, yaml.safe_load(stdout.getvalue()) or []
+
+
 class TestMain(unittest.TestCase):
     def test_scans_immediate_entries_in_descending_item_id_order(self):
         with tempfile.TemporaryDirectory() as directory:
@@ -40,10 +127,11 @@ class TestMain(unittest.TestCase):
                     create=True,
                 ),
                 patch("app.eh._main.crawl", AsyncMock(return_value=[crawled])) as crawl,
-                patch("app.eh._main.asyncio.sleep", AsyncMock()) as sleep,
                 redirect_stdout(stdout),
             ):
-                result = asyncio.run(_main([str(root)]))
+                result = asyncio.run(
+                    _main([str(root), "--cache", str(root / "eh.sqlite")])
+                )
 
             self.assertEqual(result, 0)
             self.assertEqual(
@@ -73,7 +161,6 @@ class TestMain(unittest.TestCase):
                 [call.args[0].title for call in crawl.await_args_list],
                 ["Newest", "Oldest"],
             )
-            self.assertEqual(sleep.await_count, 2)
 
     def test_expands_user_path_and_omits_empty_crawl_results(self):
         with tempfile.TemporaryDirectory() as directory:
@@ -86,7 +173,6 @@ class TestMain(unittest.TestCase):
             with (
                 patch.dict(os.environ, {"HOME": directory}),
                 patch("app.eh._main.crawl", AsyncMock(return_value=[])) as crawl,
-                patch("app.eh._main.asyncio.sleep", AsyncMock()) as sleep,
                 redirect_stdout(stdout),
             ):
                 try:
@@ -97,7 +183,6 @@ class TestMain(unittest.TestCase):
             self.assertEqual(result, 0)
             self.assertEqual(stdout.getvalue(), "")
             crawl.assert_awaited_once()
-            sleep.assert_not_awaited()
 
     def test_rejects_missing_path(self):
         with tempfile.TemporaryDirectory() as directory:
@@ -115,5 +200,131 @@ class TestMain(unittest.TestCase):
                 asyncio.run(_main([str(file_path)]))
 
 
+class TestCrawlWithStub(unittest.TestCase):
+    def test_reuses_one_connection_for_the_whole_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            for item_id in range(1, 4):
+                (root / f"[Author] Title{item_id} [{item_id}].7z").write_text("")
+            stub = _NyaaStub()
+
+            result, output = _run_with_stub(stub, root, "--jobs", "1", "--rate", "0")
+
+        self.assertEqual(result, 0)
+        self.assertEqual(stub.queries, ["Title3", "Title2", "Title1"])
+        self.assertEqual(len(stub.peers), 1)
+        self.assertEqual(output[0]["nyaa"][0]["title"], "Title3 result")
+        self.assertTrue(output[0]["nyaa"][0]["url"].endswith("/view/1"))
+
+    def test_decodes_pages_without_a_charset_as_utf8(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "[作者] 題名 [1].7z").write_text("")
+            stub = _NyaaStub(charset=False)
+
+            result, output = _run_with_stub(stub, root, "--rate", "0")
+
+        self.assertEqual(result, 0)
+        self.assertEqual(output[0]["nyaa"][0]["title"], "題名 result")
+
+    def test_overlaps_requests_and_keeps_item_id_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            for item_id in range(1, 7):
+                (root / f"[Author] Title{item_id} [{item_id}].7z").write_text("")
+            # The newest item answers last, so completion order is reversed.
+            stub = _NyaaStub(
+                latency={f"Title{item_id}": item_id * 0.02 for item_id in range(1, 7)}
+            )
+
+            result, output = _run_with_stub(stub, root, "--jobs", "3", "--rate", "0")
+
+        self.assertEqual(result, 0)
+        self.assertEqual(
+            [entry["name"] for entry in output],
+            [f"[Author] Title{item_id} [{item_id}].7z" for item_id in range(6, 0, -1)],
+        )
+        self.assertEqual(stub.max_in_flight, 3)
+
+    def test_serves_fresh_cached_searches_without_requests(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "[Author] Cached [1].7z").write_text("")
+            stub = _NyaaStub()
+
+            _result, first = _run_with_stub(stub, root, "--rate", "0")
+            (root / "[Author] Added [2].7z").write_text("")
+            _result, second = _run_with_stub(stub, root, "--rate", "0", "--full")
+
+        self.assertEqual(stub.queries, ["Cached", "Added"])
+        self.assertEqual(second[1:], first)
+        self.assertEqual(second[0]["name"], "[Author] Added [2].7z")
+
+    def test_revalidates_stale_searches_with_conditional_requests(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "[Author] Stale [1].7z").write_text("")
+            stub = _NyaaStub()
+
+            _result, first = _run_with_stub(stub, root, "--rate", "0")
+            _result, second = _run_with_stub(
+                stub, root, "--rate", "0", "--max-age", "0", "--full"
+            )
+
+        self.assertEqual(stub.queries, ["Stale", "Stale"])
+        self.assertEqual(stub.revalidated, ["Stale"])
+        self.assertEqual(second, first)
+
+    def test_crawls_only_archives_above_the_last_watermark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            root = Path(directory)
+            (root / "[Author] Old [5].7z").write_text("")
+            (root / "[Author] Older [3].7z").write_text("")
+            stub = _NyaaStub()
+
+            _result, first = _run_with_stub(stub, root, "--rate", "0")
+            (root / "[Author] Backfill [4].7z").write_text("")
+            (root / "[Author] New [9].7z").write_text("")
+            _result, second = _run_with_stub(stub, root, "--rate", "0")
+            _result, third = _run_with_stub(stub, root, "--rate", "0")
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual([entry["name"] for entry in second], ["[Author] New [9].7z"])
+        self.assertEqual(third, [])
+        self.assertEqual(stub.queries, ["Old", "Older", "New"])
+
+
+class TestExtractAnchors(unittest.TestCase):
+    def test_matches_selector_on_fixture_pages(self):
+        for fixture in sorted(_FIXTURES.glob("*.html")):
+            with self.subTest(fixture=fixture.name):
+                html = fixture.read_text(encoding="utf-8")
+                self.assertEqual(extract_anchors(html), _select_anchors(html))
+
+    def test_chunk_boundaries_do_not_change_results(self):
+        html = (_FIXTURES / "search_results.html").read_text(encoding="utf-8")
+        expected = extract_anchors(html)
+        self.assertGreater(len(expected), 0)
+
+        for size in (1, 7, 4096):
+            with self.subTest(size=size):
+                parser = AnchorExtractor()
+                for offset in range(0, len(html), size):
+                    parser.feed(html[offset : offset + size])
+                parser.close()
+                self.assertEqual(parser.anchors, expected)
+
+
+def _select_anchors(html: str) -> list[tuple[str, str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    anchors = soup.select("tr > td:nth-child(2) > a:nth-child(1)")
+    pairs = ((a.get("title"), a.get("href")) for a in anchors)
+    return [
+        (title, href)
+        for title, href in pairs
+        if isinstance(title, str) and isinstance(href, str)
+    ]
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,159 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import yaml
+
+from app.finddup._analyze import analyze
+from app.finddup._apply import apply
+
+from ._fakes import FakeDrive, RateLimitedError
+
+
+def _make_drive() -> FakeDrive:
+    drive = FakeDrive()
+    drive.add_directory("a", "a", parent_id="root")
+    drive.add_directory("b", "b", parent_id="a")
+    drive.add_file("f1", "one.mkv", parent_id="a", size=100, hash_="h1")
+    drive.add_file("f2", "copy.mkv", parent_id="b", size=100, hash_="h1")
+    drive.add_file("f3", "one.mkv", parent_id="root", size=100, hash_="h1")
+    drive.add_file("f4", "same-hash.mkv", parent_id="root", size=99, hash_="h1")
+    drive.add_file(
+        "f5", "gone.mkv", parent_id="b", size=100, hash_="h1", is_trashed=True
+    )
+    drive.add_file("g1", "x.zip", parent_id="a", size=7, hash_="h2")
+    drive.add_file("g2", "y.zip", parent_id="root", size=7, hash_="h2")
+    drive.add_file("u1", "unique.zip", parent_id="root", size=7, hash_="h3")
+    return drive
+
+
+class TestAnalyze(unittest.TestCase):
+    def test_groups_copies_across_the_whole_drive(self):
+        drive = _make_drive()
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            drive.write_snapshot(Path(directory) / "nodes.sqlite")
+            with (
+                patch("app.finddup._analyze.create_default_drive", drive.context),
+                patch("app.lib._get_dsn", lambda _: drive.dsn),
+                redirect_stdout(stdout),
+                redirect_stderr(stderr),
+            ):
+                asyncio.run(analyze())
+
+        self.assertEqual(
+            yaml.safe_load(stdout.getvalue()),
+            [
+                {
+                    "hash": "h1",
+                    "size": 100,
+                    "keep": {"id": "f1", "path": "/a/one.mkv"},
+                    "trash": [
+                        {"id": "f2", "path": "/a/b/copy.mkv"},
+                        {"id": "f3", "path": "/one.mkv"},
+                    ],
+                },
+                {
+                    "hash": "h2",
+                    "size": 7,
+                    "keep": {"id": "g1", "path": "/a/x.zip"},
+                    "trash": [{"id": "g2", "path": "/y.zip"}],
+                },
+            ],
+        )
+        self.assertEqual(
+            stderr.getvalue(), "2 duplicate sets, 3 extra copies, 207B reclaimable\n"
+        )
+
+
+class TestApply(unittest.TestCase):
+    def _apply(self, drive: FakeDrive, manifest: list, *, jobs: int = 2) -> str:
+        stderr = io.StringIO()
+        with (
+            patch("app.finddup._apply.create_default_drive", drive.context),
+            patch("app.lib.asyncio.sleep", AsyncMock()),
+            patch("sys.stdin", io.StringIO(yaml.safe_dump(manifest))),
+            redirect_stdout(io.StringIO()),
+            redirect_stderr(stderr),
+        ):
+            asyncio.run(apply(jobs=jobs))
+        return stderr.getvalue()
+
+    def test_trashes_copies_with_bounded_concurrency(self):
+        drive = FakeDrive(latency=0.01)
+        drive.add_file("keep", "keep", parent_id="root", size=10, hash_="h")
+        for index in range(6):
+            drive.add_file(
+                f"c{index}", f"c{index}", parent_id="root", size=10, hash_="h"
+            )
+        manifest = [
+            {
+                "hash": "h",
+                "size": 10,
+                "keep": {"id": "keep", "path": "/keep"},
+                "trash": [{"id": f"c{_}", "path": f"/c{_}"} for _ in range(6)],
+            }
+        ]
+
+        stderr = self._apply(drive, manifest)
+
+        self.assertEqual(
+            sorted(_.id for _ in drive.nodes.values() if _.is_trashed),
+            [f"c{_}" for _ in range(6)],
+        )
+        self.assertFalse(drive.nodes["keep"].is_trashed)
+        self.assertEqual(drive.max_in_flight, 2)
+        self.assertIn("trashed 6 of 6 (60B)", stderr)
+
+    def test_never_trashes_the_keeper(self):
+        drive = FakeDrive()
+        drive.add_file("f1", "f1", parent_id="root", size=10, hash_="h")
+        manifest = [
+            {
+                "hash": "h",
+                "size": 10,
+                "keep": {"id": "f1", "path": "/a/f1"},
+                "trash": [{"id": "f1", "path": "/b/f1"}],
+            }
+        ]
+
+        stderr = self._apply(drive, manifest)
+
+        self.assertFalse(drive.nodes["f1"].is_trashed)
+        self.assertIn("keeper listed for trash, skipped: /b/f1", stderr)
+
+    def test_skips_sets_whose_files_changed(self):
+        drive = FakeDrive()
+        drive.add_file("k1", "k1", parent_id="root", size=10, hash_="new")
+        drive.add_file("c1", "c1", parent_id="root", size=10, hash_="h")
+        drive.add_file("k2", "k2", parent_id="root", size=10, hash_="h")
+        drive.add_file("c2", "c2", parent_id="root", size=10, hash_="other")
+        drive.add_file("c3", "c3", parent_id="root", size=10, hash_="h")
+        drive.failures["c3"] = [RateLimitedError()]
+        manifest = [
+            {
+                "hash": "h",
+                "size": 10,
+                "keep": {"id": "k1", "path": "/k1"},
+                "trash": [{"id": "c1", "path": "/c1"}],
+            },
+            {
+                "hash": "h",
+                "size": 10,
+                "keep": {"id": "k2", "path": "/k2"},
+                "trash": [{"id": "c2", "path": "/c2"}, {"id": "c3", "path": "/c3"}],
+            },
+        ]
+
+        stderr = self._apply(drive, manifest)
+
+        self.assertEqual([_.id for _ in drive.nodes.values() if _.is_trashed], ["c3"])
+        self.assertIn("keeper changed, skipped: /k1", stderr)
+        self.assertIn("changed, skipped: /c2", stderr)
+        self.assertIn("trashed 1 of 3", stderr)
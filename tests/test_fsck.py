@@ -0,0 +1,183 @@
+import asyncio
+import io
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing, redirect_stderr, redirect_stdout
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import patch
+
+from app.fsck._checkpoint import open_checkpoint
+from app.fsck._fsck import fsck
+from app.fsck._types import Report
+from app.lib import iter_nodes
+
+from ._fakes import FakeDrive, ServerError
+
+
+def _make_drive() -> FakeDrive:
+    drive = FakeDrive()
+    drive.add_directory("a", "a", parent_id="root")
+    drive.add_directory("b", "b", parent_id="a")
+    drive.add_file("f1", "one.mkv", parent_id="a", size=10, hash_="h1")
+    drive.add_file("f2", "two.mkv", parent_id="b", size=20, hash_="h2")
+    drive.add_file("f3", "three.mkv", parent_id="root", size=30, hash_="h3")
+    return drive
+
+
+def _fsck(
+    drive: FakeDrive,
+    remote: FakeDrive,
+    directory: str,
+    *,
+    jobs: int = 2,
+    repair: bool = True,
+) -> tuple[Report, str]:
+    async def run() -> Report:
+        path = Path(directory) / "fsck.sqlite"
+        async with open_checkpoint(path, delay=0) as checkpoint:
+            return await fsck(
+                drive,  # type: ignore
+                remote,  # type: ignore
+                remote.nodes["root"],
+                jobs=jobs,
+                checkpoint=checkpoint,
+                repair=repair,
+            )
+
+    stdout = io.StringIO()
+    with (
+        patch("app.lib._get_dsn", lambda _: drive.dsn),
+        redirect_stdout(stdout),
+        redirect_stderr(io.StringIO()),
+    ):
+        report = asyncio.run(run())
+    return report, stdout.getvalue()
+
+
+def _cached(drive: FakeDrive) -> set[tuple]:
+    with closing(sqlite3.connect(drive.dsn)) as db:
+        return {
+            (_.id, _.parent_id, _.name, _.is_trashed, _.size, _.hash)
+            for _ in iter_nodes(db, include_trashed=True)
+        }
+
+
+def _listed(drive: FakeDrive) -> set[tuple]:
+    return {
+        (
+            _.id,
+            _.parent_id,
+            _.name,
+            _.is_trashed,
+            None if _.is_directory else _.size,
+            None if _.is_directory else _.hash,
+        )
+        for _ in drive.nodes.values()
+    }
+
+
+class TestFsck(unittest.TestCase):
+    def _diverge(self) -> tuple[FakeDrive, FakeDrive]:
+        local = _make_drive()
+        remote = _make_drive()
+        # Uploaded where the cache never heard of it, with a new folder.
+        remote.add_directory("c", "c", parent_id="a")
+        remote.add_file("f4", "four.mkv", parent_id="c", size=40, hash_="h4")
+        # Replaced content and a rename.
+        remote.add(replace(remote.nodes["f1"], hash="h1b"))
+        remote.add(replace(remote.nodes["f3"], name="renamed.mkv"))
+        # Moved between folders, and deleted for good.
+        remote.add(replace(remote.nodes["f2"], parent_id="a"))
+        local.add_file("gone", "gone.mkv", parent_id="b", size=1, hash_="x")
+        return local, remote
+
+    def test_repairs_every_divergent_node(self):
+        local, remote = self._diverge()
+
+        with tempfile.TemporaryDirectory() as directory:
+            local.write_snapshot(Path(directory) / "nodes.sqlite")
+            report, stdout = _fsck(local, remote, directory)
+            cached = _cached(local)
+
+        self.assertEqual(cached, _listed(remote))
+        self.assertEqual(
+            sorted(stdout.splitlines()),
+            [
+                "changed: /a/one.mkv",
+                "changed: /renamed.mkv",
+                "missing: /a/c",
+                "missing: /a/c/four.mkv",
+                "missing: /a/two.mkv",
+                "moved: /a/b/two.mkv",
+                "removed: /a/b/gone.mkv",
+            ],
+        )
+        self.assertEqual(report.checked, 4)
+        self.assertEqual(report.diverged, 7)
+        self.assertEqual(report.repaired, 6)
+
+    def test_dry_run_leaves_the_cache_alone(self):
+        local, remote = self._diverge()
+
+        with tempfile.TemporaryDirectory() as directory:
+            local.write_snapshot(Path(directory) / "nodes.sqlite")
+            before = _cached(local)
+            report, _stdout = _fsck(local, remote, directory, repair=False)
+            after = _cached(local)
+            # Folders left divergent are not checkpointed.
+            again, _stdout = _fsck(local, remote, directory, repair=False)
+
+        self.assertEqual(before, after)
+        self.assertEqual(report.repaired, 0)
+        self.assertEqual((again.checked, again.skipped), (4, 0))
+
+    def test_fails_one_folder_on_any_error_and_checks_the_rest(self):
+        local, remote = self._diverge()
+        remote.failures["b"] = [ServerError("internal server error")]
+
+        with tempfile.TemporaryDirectory() as directory:
+            local.write_snapshot(Path(directory) / "nodes.sqlite")
+            report, stdout = _fsck(local, remote, directory)
+
+        self.assertEqual((report.checked, report.failed), (3, 1))
+        self.assertNotIn("moved: /a/b/two.mkv", stdout)
+        self.assertIn("missing: /a/c/four.mkv", stdout)
+
+    def test_resumes_from_checkpoint_without_listing(self):
+        local = FakeDrive()
+        remote = FakeDrive(latency=0.01)
+        for drive in (local, remote):
+            for index in range(12):
+                drive.add_directory(f"d{index}", f"d{index}", parent_id="root")
+                drive.add_file(
+                    f"f{index}", "file", parent_id=f"d{index}", size=1, hash_="h"
+                )
+
+        with tempfile.TemporaryDirectory() as directory:
+            local.write_snapshot(Path(directory) / "nodes.sqlite")
+            first, stdout = _fsck(local, remote, directory, jobs=3)
+            in_flight = remote.max_in_flight
+            remote.max_in_flight = 0
+            second, _stdout = _fsck(local, remote, directory, jobs=3)
+
+        self.assertEqual(stdout, "")
+        self.assertEqual((first.checked, first.skipped), (13, 0))
+        self.assertEqual(in_flight, 3)
+        self.assertEqual((second.checked, second.skipped), (0, 13))
+        self.assertEqual(remote.max_in_flight, 0)
+
+    def test_repairs_in_batches(self):
+        local, remote = self._diverge()
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            patch("app.fsck._fsck._REPAIR_BATCH", 1),
+        ):
+            local.write_snapshot(Path(directory) / "nodes.sqlite")
+            report, _stdout = _fsck(local, remote, directory, jobs=1)
+            cached = _cached(local)
+
+        self.assertEqual(cached, _listed(remote))
+        self.assertEqual(report.repaired, 6)
@@ -0,0 +1,272 @@
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from app.lib import (
+    NodeRow,
+    UploadThrottle,
+    create_upload_throttle,
+    get_subtree_sizes,
+    humanize,
+    iter_children,
+    iter_descendants,
+    iter_duplicates,
+    iter_nodes,
+)
+
+from ._fakes import FakeDrive, make_node
+
+
+class TestSnapshotQueries(unittest.TestCase):
+    def setUp(self):
+        drive = FakeDrive()
+        drive.add_directory("a", "a", parent_id="root")
+        drive.add_directory("b", "b", parent_id="a")
+        drive.add_file("f1", "one [1].7z", parent_id="a", size=10, hash_="h1")
+        drive.add_file("f2", "two.zip", parent_id="b", size=20, hash_="h2")
+        drive.add_file("f3", "gone [3].7z", parent_id="a", is_trashed=True)
+        drive.add(
+            make_node("t", "t", parent_id="a", is_directory=True, is_trashed=True)
+        )
+        drive.add_file("f4", "hidden.zip", parent_id="t")
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        dsn = drive.write_snapshot(Path(tmp.name) / "nodes.sqlite")
+        self.db = sqlite3.connect(dsn)
+        self.addCleanup(self.db.close)
+
+    def _ids(self, rows) -> list[str]:
+        return sorted(_.id for _ in rows)
+
+    def test_lists_children_as_rows(self):
+        rows = {_.id: _ for _ in iter_children(self.db, "a")}
+
+        self.assertEqual(sorted(rows), ["b", "f1"])
+        self.assertEqual(
+            rows["f1"],
+            NodeRow("f1", "a", "one [1].7z", False, False, 10, "h1"),
+        )
+        self.assertTrue(rows["b"].is_directory)
+        self.assertIsNone(rows["b"].size)
+
+    def test_filters_children_by_trash_glob_and_match(self):
+        self.assertEqual(
+            self._ids(iter_children(self.db, "a", include_trashed=True)),
+            ["b", "f1", "f3", "t"],
+        )
+        self.assertEqual(
+            self._ids(iter_children(self.db, "a", include_trashed=True, glob="*.7z")),
+            ["f1", "f3"],
+        )
+        self.assertEqual(
+            self._ids(iter_children(self.db, "a", match=lambda _: _ == "b")), ["b"]
+        )
+
+    def test_walks_descendants_without_trashed_folders(self):
+        self.assertEqual(self._ids(iter_descendants(self.db, "a")), ["b", "f1", "f2"])
+        self.assertEqual(
+            self._ids(iter_descendants(self.db, "a", include_trashed=True)),
+            ["b", "f1", "f2", "f3", "f4", "t"],
+        )
+        self.assertEqual(
+            self._ids(iter_descendants(self.db, "root", glob="*.zip")), ["f2"]
+        )
+
+    def test_nested_queries_keep_their_own_filters(self):
+        pairs = [
+            (outer.id, self._ids(iter_children(self.db, outer.id, match=str.isalpha)))
+            for outer in iter_descendants(self.db, "root", match=lambda _: len(_) == 1)
+        ]
+
+        self.assertEqual(sorted(pairs), [("a", ["b"]), ("b", [])])
+
+    def test_scans_every_node(self):
+        self.assertEqual(self._ids(iter_nodes(self.db, glob="*.zip")), ["f2", "f4"])
+        with closing(self.db.cursor()) as query:
+            query.execute("SELECT COUNT(*) FROM nodes WHERE trashed = 0;")
+            (live,) = query.fetchone()
+        self.assertEqual(len(list(iter_nodes(self.db))), live)
+
+    def test_scans_return_a_node_with_several_parents_once(self):
+        with closing(self.db.cursor()) as query:
+            query.execute("INSERT INTO parents VALUES ('f1', 'b');")
+
+        for rows in (iter_descendants(self.db, "root"), iter_nodes(self.db)):
+            with self.subTest(rows=rows):
+                self.assertEqual([_ for _ in rows if _.id == "f1"][0].parent_id, "a")
+        self.assertEqual(self._ids(iter_descendants(self.db, "a")), ["b", "f1", "f2"])
+        self.assertEqual(self._ids(iter_nodes(self.db, glob="*.7z")), ["f1"])
+
+    def test_registers_one_match_function_per_connection(self):
+        def count_functions() -> int:
+            with closing(self.db.cursor()) as query:
+                query.execute(
+                    "SELECT COUNT(*) FROM pragma_function_list WHERE name = '_match';"
+                )
+                return query.fetchone()[0]
+
+        for _ in range(3):
+            list(iter_children(self.db, "a", match=str.isalpha))
+            list(iter_nodes(self.db, match=str.isalpha))
+        self.assertEqual(count_functions(), 1)
+
+    def test_groups_live_files_by_hash_and_size(self):
+        with closing(self.db.cursor()) as query:
+            for node_id, hash_, size, created in [
+                ("d1", "h2", 20, 3),
+                ("d2", "h1", 10, 2),
+                ("d3", "h1", 99, 1),
+            ]:
+                query.execute(
+                    "INSERT INTO nodes VALUES (?, ?, 0, ?, 0, 0);",
+                    (node_id, node_id, 10**18 + created),
+                )
+                query.execute(
+                    "INSERT INTO files VALUES (?, '', ?, ?);", (node_id, hash_, size)
+                )
+                query.execute("INSERT INTO parents VALUES (?, 'b');", (node_id,))
+
+        groups = [[_.id for _ in group] for group in iter_duplicates(self.db)]
+
+        # f1 is older than d2; the trashed f3 and the other d3 size are left out.
+        self.assertEqual(groups, [["f1", "d2"], ["f2", "d1"]])
+        self.assertEqual(
+            next(iter_duplicates(self.db))[1],
+            NodeRow("d2", "b", "d2", False, False, 10, "h1"),
+        )
+
+    def test_counts_each_live_file_once_in_duplicates(self):
+        with closing(self.db.cursor()) as query:
+            # f1 also lives in b; d1 only sits in the trashed folder t.
+            query.execute("INSERT INTO parents VALUES ('f1', 'b');")
+            query.execute("INSERT INTO nodes VALUES ('d1', 'd1', 0, 0, 0, 0);")
+            query.execute("INSERT INTO files VALUES ('d1', '', 'h1', 10);")
+            query.execute("INSERT INTO parents VALUES ('d1', 't');")
+
+        self.assertEqual(list(iter_duplicates(self.db)), [])
+
+        with closing(self.db.cursor()) as query:
+            query.execute("INSERT INTO parents VALUES ('d1', 'b');")
+
+        self.assertEqual(
+            [
+                [(_.id, _.parent_id) for _ in group]
+                for group in iter_duplicates(self.db)
+            ],
+            [[("d1", "b"), ("f1", "a")]],
+        )
+
+    def test_sums_live_subtrees_per_child(self):
+        self.assertEqual(get_subtree_sizes(self.db, "root"), {"a": 30})
+        self.assertEqual(get_subtree_sizes(self.db, "a"), {"b": 20, "f1": 10})
+        self.assertEqual(get_subtree_sizes(self.db, "f1"), {})
+
+
+_DAY = 24 * 60 * 60
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _run_acquires(throttle: UploadThrottle, clock: _Clock, sizes: list[int]) -> None:
+    async def run() -> None:
+        for size in sizes:
+            await throttle.acquire(size)
+
+    with patch("app.lib._throttle.asyncio.sleep", clock.sleep):
+        asyncio.run(run())
+
+
+class TestUploadThrottle(unittest.TestCase):
+    def test_admits_the_burst_then_paces_at_quota_per_day(self):
+        clock = _Clock()
+        throttle = UploadThrottle(quota=_DAY * 100, burst=1000, clock=clock)
+
+        _run_acquires(throttle, clock, [1000, 500, 500])
+
+        # 100 bytes/s after the initial burst.
+        self.assertEqual(clock.slept, [5.0, 5.0])
+        self.assertEqual(throttle.usage, 2000)
+        self.assertEqual(throttle.rate, 2000 / 60)
+
+    def test_waits_for_earlier_uploads_to_leave_the_window(self):
+        clock = _Clock()
+        throttle = UploadThrottle(quota=1000, burst=1000, clock=clock)
+        _run_acquires(throttle, clock, [1000])
+        # The bucket has nearly refilled, but the window is still full.
+        clock.now += _DAY - 100
+
+        self.assertEqual(throttle.remaining, 0)
+        self.assertEqual(throttle.time_until_available(500), timedelta(seconds=100))
+
+        _run_acquires(throttle, clock, [500])
+
+        self.assertEqual(clock.slept, [100.0])
+        self.assertEqual(throttle.usage, 500)
+
+    def test_starts_with_the_quota_left_by_earlier_uploads(self):
+        clock = _Clock()
+        usage = [(clock.now - _DAY - 1, 900), (clock.now - 10, 600)]
+        throttle = UploadThrottle(quota=_DAY, burst=_DAY, usage=usage, clock=clock)
+
+        self.assertEqual(throttle.usage, 600)
+        self.assertEqual(throttle.time_until_available(_DAY - 600), timedelta(0))
+        # Beyond what is left, the recent upload has to leave the window.
+        self.assertEqual(
+            throttle.time_until_available(_DAY - 500), timedelta(seconds=_DAY - 10)
+        )
+
+    def test_lets_oversized_uploads_through_once_the_window_is_empty(self):
+        clock = _Clock()
+        usage = [(clock.now - 10, 50)]
+        throttle = UploadThrottle(quota=100, burst=100, usage=usage, clock=clock)
+
+        self.assertEqual(
+            throttle.time_until_available(500), timedelta(seconds=_DAY - 10)
+        )
+
+    def test_seeds_usage_from_the_node_cache(self):
+        now = datetime.now(UTC)
+        drive = FakeDrive()
+        recent = drive.add_file("recent", "recent.bin", parent_id="root", size=300)
+        drive.add(replace(recent, created_time=now - timedelta(hours=1)))
+        old = drive.add_file("old", "old.bin", parent_id="root", size=700)
+        drive.add(replace(old, created_time=now - timedelta(days=2)))
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            patch("app.lib._get_dsn", lambda _: drive.dsn),
+        ):
+            drive.write_snapshot(Path(directory) / "nodes.sqlite")
+            throttle = create_upload_throttle(drive, quota=1000)  # type: ignore
+
+        self.assertEqual(throttle.usage, 300)
+        self.assertEqual(throttle.remaining, 700)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestHumanize(unittest.TestCase):
+    def test_picks_a_binary_unit(self):
+        self.assertEqual(humanize(512), "512B")
+        self.assertEqual(humanize(1536), "1.5KiB")
+        self.assertEqual(humanize(3 * 1024**3), "3.0GiB")
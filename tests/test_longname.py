@@ -0,0 +1,273 @@
+import asyncio
+import io
+import random
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path, PurePath
+from unittest.mock import AsyncMock, patch
+
+import yaml
+
+from app.longname._analyze import analyze
+from app.longname._apply import apply
+from app.longname._plan import plan_renames
+from app.longname._rules import _SMB_ILLEGAL, _split_name, is_valid_name, suggest_name
+
+from ._fakes import FakeDrive, RateLimitedError, make_node
+
+
+_LONG_NAME = "長" * 100 + ".zip"
+
+
+def _library() -> FakeDrive:
+    drive = FakeDrive()
+    drive.add_directory("inbox", "inbox", parent_id="root")
+    drive.add_directory("bad_dir", "a:b", parent_id="inbox")
+    drive.add_file("ok", "fine.zip", parent_id="inbox")
+    drive.add_file("long", _LONG_NAME, parent_id="inbox")
+    drive.add_file("deep", "what?.txt", parent_id="bad_dir")
+    drive.add_file("trashed", "gone?.txt", parent_id="inbox", is_trashed=True)
+    drive.add(
+        make_node("old", "old", parent_id="inbox", is_directory=True, is_trashed=True)
+    )
+    drive.add_file("hidden", "under|old.txt", parent_id="old")
+    drive.add_file("outside", "no*pe.txt", parent_id="root")
+    return drive
+
+
+def _run_analyze(drive: FakeDrive, path: str, **kwargs) -> list[dict]:
+    stdout = io.StringIO()
+    with (
+        patch("app.longname._analyze.create_default_drive", drive.context),
+        patch("app.lib._get_dsn", lambda _: drive.dsn),
+        redirect_stdout(stdout),
+    ):
+        asyncio.run(analyze(PurePath(path), **kwargs))
+    return yaml.safe_load(stdout.getvalue())
+
+
+class TestAnalyze(unittest.TestCase):
+    def setUp(self):
+        self.drive = _library()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.drive.write_snapshot(Path(self._tmp.name) / "nodes.sqlite")
+
+    def _assert_entries(self, entries: list[dict]) -> None:
+        by_id = {_["id"]: _ for _ in entries}
+        self.assertEqual(sorted(by_id), ["bad_dir", "deep", "long"])
+        self.assertEqual(by_id["bad_dir"]["new_name"], "a：b")
+        self.assertEqual(by_id["deep"]["new_name"], "what？.txt")
+        self.assertEqual(by_id["long"]["name"], _LONG_NAME)
+        self.assertLessEqual(len(by_id["long"]["new_name"].encode("utf-8")), 255)
+
+    def test_queries_the_node_cache(self):
+        self._assert_entries(_run_analyze(self.drive, "/inbox"))
+
+    def test_walks_the_drive_concurrently(self):
+        self.drive.latency = 0.01
+        for index in range(6):
+            self.drive.add_directory(f"sub{index}", f"sub{index}", parent_id="inbox")
+
+        entries = _run_analyze(self.drive, "/inbox", walk=True, jobs=3)
+
+        self._assert_entries(entries)
+        self.assertEqual(self.drive.max_in_flight, 3)
+
+    def test_emits_an_empty_list_when_all_names_are_valid(self):
+        self.drive.add_directory("clean", "clean", parent_id="root")
+        self.drive.add_file("clean_file", "fine.zip", parent_id="clean")
+        self.drive.write_snapshot(Path(self._tmp.name) / "clean.sqlite")
+
+        self.assertEqual(_run_analyze(self.drive, "/clean"), [])
+
+    def test_disambiguates_against_siblings_in_both_modes(self):
+        self.drive.add_file("taken", "what？.txt", parent_id="bad_dir")
+        self.drive.add_file("twin", "what*.txt", parent_id="bad_dir")
+        self.drive.write_snapshot(Path(self._tmp.name) / "twins.sqlite")
+
+        for walk in (False, True):
+            with self.subTest(walk=walk):
+                entries = _run_analyze(self.drive, "/inbox/a:b", walk=walk)
+                self.assertEqual(
+                    entries,
+                    [
+                        {"id": "twin", "name": "what*.txt", "new_name": "what＊.txt"},
+                        {
+                            "id": "deep",
+                            "name": "what?.txt",
+                            "new_name": "what？ (2).txt",
+                        },
+                    ],
+                )
+
+
+class TestPlanRenames(unittest.TestCase):
+    def test_keeps_suggestions_without_collisions(self):
+        self.assertEqual(
+            plan_renames([("a", "x:y.txt")], ["x:y.txt", "other.txt"]),
+            [{"id": "a", "name": "x:y.txt", "new_name": "x：y.txt"}],
+        )
+
+    def test_disambiguates_between_suggestions_in_name_order(self):
+        invalid = [("c", "x?.txt"), ("b", "x?.txt"), ("a", "x?.txt")]
+        siblings = ["x?.txt", "x?.txt", "x?.txt"]
+
+        entries = plan_renames(invalid, siblings)
+
+        self.assertEqual(
+            [(_["id"], _["new_name"]) for _ in entries],
+            [("a", "x？.txt"), ("b", "x？ (2).txt"), ("c", "x？ (3).txt")],
+        )
+        self.assertEqual(plan_renames(reversed(invalid), siblings), entries)
+
+    def test_avoids_existing_names_case_insensitively(self):
+        entries = plan_renames(
+            [("a", "Dir:1")], ["Dir:1", "dir：1", "DIR：1 (2)", "dir：1 (3)x"]
+        )
+
+        self.assertEqual(entries[0]["new_name"], "Dir：1 (3)")
+
+    def test_keeps_disambiguated_long_names_valid(self):
+        name = "長" * 100 + ".zip"
+
+        entries = plan_renames([("a", name)], [name, suggest_name(name)])
+
+        new_name = entries[0]["new_name"]
+        self.assertTrue(new_name.endswith(" (2).zip"))
+        self.assertTrue(is_valid_name(new_name))
+
+
+class TestApply(unittest.TestCase):
+    def test_renames_with_bounded_concurrency_and_retries(self):
+        drive = FakeDrive(latency=0.01)
+        for index in range(8):
+            drive.add_file(f"n{index}", f"n{index}?.zip", parent_id="root")
+        drive.failures["n0"] = [RateLimitedError()]
+        manifest = [
+            {"id": f"n{index}", "name": f"n{index}?.zip", "new_name": f"n{index}.zip"}
+            for index in range(8)
+        ] + [{"id": "missing", "name": "gone?.zip", "new_name": "gone.zip"}]
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+
+        with (
+            patch("app.longname._apply.create_default_drive", drive.context),
+            patch("app.lib.asyncio.sleep", AsyncMock()),
+            patch("sys.stdin", io.StringIO(yaml.safe_dump(manifest))),
+            redirect_stdout(stdout),
+            redirect_stderr(stderr),
+        ):
+            asyncio.run(apply(jobs=3))
+
+        self.assertEqual(drive.max_in_flight, 3)
+        self.assertEqual(
+            sorted(_.name for _ in drive.nodes.values() if _.parent_id == "root"),
+            [f"n{index}.zip" for index in range(8)],
+        )
+        self.assertIn("renamed 8 of 9", stderr.getvalue())
+        self.assertIn("rename: n0?.zip → n0.zip", stdout.getvalue())
+
+
+# The straightforward versions the fast paths must agree with.
+def _reference_is_valid_name(name: str) -> bool:
+    if len(name.encode("utf-8")) > 255:
+        return False
+    if "\0" in name or "/" in name:
+        return False
+    if len(name.encode("utf-16-le")) // 2 > 255:
+        return False
+    for c in '\\/:*?"<>|':
+        if c in name:
+            return False
+    if name.endswith(".") or name.endswith(" "):
+        return False
+    stem, _ = _split_name(name)
+    return stem.upper() not in {
+        "CON",
+        "PRN",
+        "AUX",
+        "NUL",
+        *(f"COM{i}" for i in range(10)),
+        *(f"LPT{i}" for i in range(10)),
+    }
+
+
+def _reference_suggest_name(name: str) -> str:
+    stem, ext = _split_name(name)
+    stem = stem.translate(_SMB_ILLEGAL).rstrip(". ")
+    candidate = stem + ext
+    if _reference_is_valid_name(candidate):
+        return candidate
+    while stem:
+        stem = stem[:-1]
+        candidate = stem + "\u2026" + ext
+        if _reference_is_valid_name(candidate):
+            return candidate
+    return "\u2026" + ext
+
+
+_PIECES = [
+    "a",
+    "Z",
+    "0",
+    ".",
+    " ",
+    "長",
+    "é",
+    "😀",
+    "\0",
+    "/",
+    ":",
+    "?",
+    "|",
+    ".zip",
+    "CON",
+    "com1",
+]
+
+
+def _random_name(rng: random.Random) -> str:
+    size = rng.choice([rng.randint(0, 8), rng.randint(60, 140), rng.randint(200, 400)])
+    return "".join(rng.choices(_PIECES, k=size))
+
+
+class TestRules(unittest.TestCase):
+    def test_matches_the_reference_on_random_names(self):
+        rng = random.Random(0)
+        for _ in range(1000):
+            name = _random_name(rng)
+            with self.subTest(name=name):
+                self.assertEqual(is_valid_name(name), _reference_is_valid_name(name))
+                self.assertEqual(suggest_name(name), _reference_suggest_name(name))
+
+    def test_matches_the_reference_on_edge_cases(self):
+        names = [
+            "",
+            ".",
+            "..",
+            "con",
+            "CON.txt",
+            "LPT9 .zip",
+            "a" * 255,
+            "a" * 256,
+            "a" * 251 + ".zip",
+            "長" * 85,
+            "長" * 86,
+            "😀" * 127 + "a",
+            "😀" * 128,
+            "a" * 300 + ".b:c",
+            "a" * 300 + ".",
+            "a/b" + "長" * 100 + ".zip",
+            "." + "長" * 100,
+            "x" * 10 + "\0" + "長" * 100,
+        ]
+        for name in names:
+            with self.subTest(name=name):
+                self.assertEqual(is_valid_name(name), _reference_is_valid_name(name))
+                self.assertEqual(suggest_name(name), _reference_suggest_name(name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from app.lseh import main
+
+from ._fakes import FakeDrive
+
+
+def _make_drive() -> FakeDrive:
+    drive = FakeDrive()
+    drive.add_directory("eh", "eh", parent_id="root")
+    for node_id, name in [
+        ("a", "[Author] Two [20].7z"),
+        ("b", "[Author] Hundred [100].7z"),
+        ("c", "[Author] Three [3].7z"),
+        ("d", "[Author] Nine [9].7z"),
+        ("e", "[Author] Not an archive [5].zip"),
+        ("f", "[Author] No id.7z"),
+    ]:
+        drive.add_file(node_id, name, parent_id="eh")
+    drive.add_file("g", "[Author] Gone [50].7z", parent_id="eh", is_trashed=True)
+    drive.add_directory("n", "[Author] Nested", parent_id="eh")
+    drive.add_file("h", "[Author] Nested [70].7z", parent_id="n")
+    return drive
+
+
+class TestMain(unittest.TestCase):
+    def _main(self, *args: str) -> tuple[int, list[str]]:
+        drive = _make_drive()
+        stdout = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            drive.write_snapshot(Path(directory) / "nodes.sqlite")
+            with (
+                patch("app.lseh.create_default_drive", drive.context),
+                patch("app.lib._get_dsn", lambda _: drive.dsn),
+                redirect_stdout(stdout),
+            ):
+                status = asyncio.run(main(["/eh", *args]))
+        return status, stdout.getvalue().splitlines()
+
+    def test_lists_live_archives_newest_first(self):
+        status, names = self._main()
+
+        self.assertEqual(status, 0)
+        self.assertEqual(
+            names,
+            [
+                "[Author] Hundred [100].7z",
+                "[Author] Two [20].7z",
+                "[Author] Nine [9].7z",
+                "[Author] Three [3].7z",
+            ],
+        )
+
+    def test_limits_to_the_newest(self):
+        _status, names = self._main("--limit", "2")
+
+        self.assertEqual(names, ["[Author] Hundred [100].7z", "[Author] Two [20].7z"])
+
+    def test_rejects_limits_below_one(self):
+        for limit in ("0", "-1"):
+            with self.subTest(limit=limit):
+                with redirect_stderr(io.StringIO()) as stderr:
+                    with self.assertRaises(SystemExit) as raised:
+                        asyncio.run(main(["/eh", "--limit", limit]))
+                self.assertEqual(raised.exception.code, 2)
+                self.assertIn("--limit must be at least 1", stderr.getvalue())
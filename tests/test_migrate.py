@@ -0,0 +1,454 @@
+import asyncio
+import io
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import closing, redirect_stderr, redirect_stdout
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from pathlib import Path, PurePath
+from unittest.mock import AsyncMock, patch
+
+from app.lib import UploadThrottle
+from app.migrate._copy import copy_file
+from app.migrate._ledger import _SQL_CREATE_TABLES, MigrationLedger, open_ledger
+from app.migrate._migrate import migrate
+from app.migrate._progress import format_eta, progress
+from app.migrate._stats import get_histogram, get_throughput, percentile, stats
+
+from ._fakes import FakeDrive, ServerError, make_node
+
+
+def _run(
+    src: FakeDrive,
+    dst: FakeDrive,
+    *paths: str,
+    jobs: int = 2,
+    throttle: UploadThrottle | None = None,
+    ledger_path: Path | None = None,
+):
+    throttle = throttle or UploadThrottle(quota=1024**3)
+
+    async def run(ledger_path: Path):
+        async with open_ledger(ledger_path, delay=0) as ledger:
+            return await migrate(
+                src,  # type: ignore
+                dst,  # type: ignore
+                [PurePath(_) for _ in paths],
+                jobs=jobs,
+                throttle=throttle,
+                ledger=ledger,
+            )
+
+    stderr = io.StringIO()
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        redirect_stdout(io.StringIO()),
+        redirect_stderr(stderr),
+    ):
+        summary = asyncio.run(run(ledger_path or Path(directory) / "ledger.sqlite"))
+    return summary, stderr.getvalue()
+
+
+def _tree(drive: FakeDrive, node_id: str = "root") -> dict:
+    tree = {}
+    for node in drive.nodes.values():
+        if node.parent_id != node_id or node.is_trashed:
+            continue
+        if node.is_directory:
+            tree[node.name] = _tree(drive, node.id)
+        else:
+            tree[node.name] = drive.contents[node.id]
+    return tree
+
+
+class TestMigrate(unittest.TestCase):
+    def test_copies_tree_to_the_same_path(self):
+        src = FakeDrive()
+        src.add_directory("a", "a", parent_id="root")
+        src.add_directory("b", "b", parent_id="a")
+        src.add_content("f1", "one.txt", b"hello world", parent_id="b")
+        src.add_content("f2", "two.txt", b"", parent_id="b")
+        src.add_file("t", "trashed.txt", parent_id="b", is_trashed=True)
+        src.add_content("f3", "other.txt", b"not copied", parent_id="a")
+        dst = FakeDrive()
+
+        summary, stderr = _run(src, dst, "/a/b")
+
+        self.assertEqual(stderr, "")
+        self.assertEqual(
+            _tree(dst), {"a": {"b": {"one.txt": b"hello world", "two.txt": b""}}}
+        )
+        self.assertEqual((summary.copied, summary.size), (2, 11))
+
+    def test_copies_the_root_into_the_root(self):
+        src = FakeDrive()
+        src.add_directory("a", "a", parent_id="root")
+        src.add_content("f1", "one.txt", b"1", parent_id="a")
+        src.add_content("f2", "two.txt", b"2", parent_id="root")
+        dst = FakeDrive()
+
+        _run(src, dst, "/")
+
+        self.assertEqual(_tree(dst), {"a": {"one.txt": b"1"}, "two.txt": b"2"})
+
+    def test_skips_identical_files_and_reports_conflicts(self):
+        src = FakeDrive()
+        src.add_content("same", "same.txt", b"same", parent_id="root")
+        src.add_content("diff", "diff.txt", b"source", parent_id="root")
+        dst = FakeDrive()
+        dst.add_content("same", "same.txt", b"same", parent_id="root")
+        dst.add_content("diff", "diff.txt", b"target", parent_id="root")
+
+        summary, stderr = _run(src, dst, "/")
+
+        self.assertEqual((summary.copied, summary.skipped, summary.failed), (0, 1, 1))
+        self.assertIn("diff.txt", stderr)
+        self.assertEqual(dst.contents["diff"], b"target")
+
+    def test_fails_one_file_on_any_error_and_copies_the_rest(self):
+        src = FakeDrive()
+        src.add_content("bad", "bad.txt", b"bad", parent_id="root")
+        src.add_content("good", "good.txt", b"good", parent_id="root")
+        src.failures["bad"] = [ServerError("internal server error")]
+        dst = FakeDrive()
+
+        summary, stderr = _run(src, dst, "/")
+
+        self.assertEqual((summary.copied, summary.failed), (1, 1))
+        self.assertIn("bad.txt: internal server error", stderr)
+        self.assertEqual(_tree(dst), {"good.txt": b"good"})
+
+    def test_workers_are_shared_across_folders(self):
+        # One file per folder: a per-folder barrier would copy one at a time.
+        src = FakeDrive()
+        for index in range(6):
+            src.add_directory(f"d{index}", f"d{index}", parent_id="root")
+            src.add_content(f"f{index}", "file", b"x" * 64, parent_id=f"d{index}")
+        dst = FakeDrive(latency=0.01)
+
+        summary, _stderr = _run(src, dst, "/", jobs=3)
+
+        self.assertEqual(summary.copied, 6)
+        self.assertEqual(dst.max_in_flight, 3)
+
+    def test_counts_uploads_against_the_throttle(self):
+        src = FakeDrive()
+        src.add_content("f1", "one", b"a" * 100, parent_id="root")
+        src.add_content("f2", "two", b"b" * 50, parent_id="root")
+        dst = FakeDrive()
+        throttle = UploadThrottle(quota=1024**3, usage=[(0.0, 1)])
+
+        _run(src, dst, "/", throttle=throttle)
+
+        self.assertEqual(throttle.usage, 150)
+
+    def test_trusts_the_ledger_over_hashes(self):
+        # Providers may hash differently, so a rerun cannot compare hashes.
+        src = FakeDrive()
+        src.add_content("f1", "one", b"data", parent_id="root")
+        dst = FakeDrive()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "ledger.sqlite"
+            _run(src, dst, "/", ledger_path=path)
+            copied = dst.add(replace(next(iter(_files(dst))), hash="other"))
+            summary, stderr = _run(src, dst, "/", ledger_path=path)
+
+        self.assertEqual(stderr, "")
+        self.assertEqual((summary.copied, summary.skipped), (0, 1))
+        self.assertEqual(_files(dst), [copied])
+
+
+def _files(drive: FakeDrive):
+    return [_ for _ in drive.nodes.values() if not _.is_directory]
+
+
+def _ledger_db() -> sqlite3.Connection:
+    db = sqlite3.connect(":memory:")
+    for sql in _SQL_CREATE_TABLES:
+        db.execute(sql)
+    return db
+
+
+class _Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestMigrationLedger(unittest.TestCase):
+    def _node(self, node_id: str, size: int, created: datetime):
+        node = make_node(node_id, node_id, parent_id="root", size=size)
+        return replace(node, created_time=created)
+
+    def test_batches_inserts_into_one_commit(self):
+        commits: list[str] = []
+
+        async def run(path: Path):
+            async with open_ledger(path, delay=0) as ledger:
+                ledger._db.set_trace_callback(
+                    lambda sql: sql == "COMMIT" and commits.append(sql)
+                )
+                now = datetime.now(UTC)
+                for index in range(50):
+                    node = self._node(f"n{index}", 10, now)
+                    ledger.set_migrated(node)
+                    ledger.record_transfer(node, started_at=0.0, duration=1.0)
+                self.assertTrue(ledger.is_migrated(self._node("n0", 10, now)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "ledger.sqlite"
+            asyncio.run(run(path))
+            with closing(sqlite3.connect(path)) as db:
+                (count,) = db.execute("SELECT COUNT(*) FROM migrated;").fetchone()
+                (transfers,) = db.execute("SELECT COUNT(*) FROM transfers;").fetchone()
+                (mode,) = db.execute("PRAGMA journal_mode;").fetchone()
+
+        self.assertEqual((count, transfers), (50, 50))
+        self.assertEqual(commits, ["COMMIT"])
+        self.assertEqual(mode, "wal")
+
+    def test_counts_migrated_size_over_a_rolling_window(self):
+        start = datetime(2026, 1, 2, tzinfo=UTC)
+        clock = _Clock(start.timestamp())
+
+        async def run():
+            with closing(_ledger_db()) as db:
+                db.executemany(
+                    "INSERT INTO migrated (node_id, size, created_at) "
+                    "VALUES (?, ?, ?);",
+                    [
+                        ("old", 1000, int((start - timedelta(days=2)).timestamp())),
+                        ("recent", 100, int((start - timedelta(hours=12)).timestamp())),
+                    ],
+                )
+                ledger = MigrationLedger(db, delay=0, clock=clock)
+                sizes = [ledger.get_migrated_size()]
+                ledger.set_migrated(self._node("new", 10, start))
+                sizes.append(ledger.get_migrated_size())
+                clock.now += timedelta(hours=13).total_seconds()
+                sizes.append(ledger.get_migrated_size())
+                return sizes
+
+        self.assertEqual(asyncio.run(run()), [100, 110, 10])
+
+    def test_measures_rate_since_the_first_migration(self):
+        start = datetime(2026, 1, 2, tzinfo=UTC)
+        clock = _Clock(start.timestamp())
+
+        async def run():
+            with closing(_ledger_db()) as db:
+                ledger = MigrationLedger(db, delay=0, clock=clock)
+                rates = [ledger.get_migrated_rate()]
+                ledger.set_migrated(self._node("a", 6000, start))
+                rates.append(ledger.get_migrated_rate())
+                clock.now += 1000
+                ledger.set_migrated(self._node("b", 4000, start))
+                rates.append(ledger.get_migrated_rate())
+                return rates
+
+        self.assertEqual(asyncio.run(run()), [0.0, 100.0, 10.0])
+
+
+class TestCopyFile(unittest.TestCase):
+    def _copy(self, src: FakeDrive, dst: FakeDrive, **kwargs):
+        async def run():
+            root = await dst.get_root()
+            return await copy_file(src, src.nodes["f"], dst, root, **kwargs)  # type: ignore
+
+        stderr = io.StringIO()
+        with (
+            patch("app.migrate._copy._CHECKPOINT_SIZE", 16),
+            patch("app.migrate._copy.asyncio.sleep", AsyncMock()),
+            redirect_stderr(stderr),
+        ):
+            return asyncio.run(run()), stderr.getvalue()
+
+    def test_resumes_from_the_acknowledged_offset(self):
+        content = bytes(range(100))
+        src = FakeDrive()
+        src.add_content("f", "video.mkv", content, parent_id="root")
+        dst = FakeDrive()
+        # Lose the connection twice; the second time after a checkpoint, with
+        # the last bytes unacknowledged.
+        dst.write_failures = [(40, 40), (90, 70)]
+
+        node, stderr = self._copy(src, dst)
+
+        self.assertEqual(dst.contents[node.id], content)
+        self.assertEqual(stderr.count("resume"), 2)
+        # Only the bytes the destination lost (70 to 88) were sent again.
+        self.assertEqual(dst.uploaded, len(content) + 18)
+
+    def test_overlaps_download_and_upload(self):
+        content = b"x" * 80
+        src = FakeDrive(latency=0.02)
+        src.add_content("f", "video.mkv", content, parent_id="root")
+        dst = FakeDrive(latency=0.02)
+
+        started = time.monotonic()
+        node, _stderr = self._copy(src, dst)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(dst.contents[node.id], content)
+        # 20 reads and 20 writes would take 0.8s one after another.
+        self.assertLess(elapsed, 0.6)
+
+    def test_hashes_off_the_event_loop(self):
+        src = FakeDrive()
+        src.add_content("f", "video.mkv", b"x" * 32, parent_id="root")
+        dst = FakeDrive()
+
+        self._copy(src, dst)
+
+        self.assertTrue(dst.hash_threads)
+        self.assertNotIn(threading.get_ident(), dst.hash_threads)
+
+    def test_gives_up_without_progress(self):
+        src = FakeDrive()
+        src.add_content("f", "video.mkv", b"x" * 32, parent_id="root")
+        dst = FakeDrive()
+        dst.write_failures = [(8, 0)] * 3
+
+        with self.assertRaises(ConnectionResetError):
+            self._copy(src, dst, attempts=3)
+
+        self.assertEqual(_files(dst), [])
+
+
+class TestProgress(unittest.TestCase):
+    def test_compares_subtree_sizes_per_folder(self):
+        src = FakeDrive()
+        src.add_directory("m", "media", parent_id="root")
+        src.add_directory("a", "anime", parent_id="m")
+        src.add_directory("a1", "s1", parent_id="a")
+        src.add_file("f1", "e1.mkv", parent_id="a1", size=300)
+        src.add_file("f2", "e2.mkv", parent_id="a", size=100)
+        src.add_directory("b", "books", parent_id="m")
+        src.add_file("f3", "b.pdf", parent_id="b", size=50)
+        dst = FakeDrive()
+        dst.add_directory("m", "media", parent_id="root")
+        dst.add_directory("a", "anime", parent_id="m")
+        dst.add_directory("a1", "s1", parent_id="a")
+        dst.add_file("f1", "e1.mkv", parent_id="a1", size=300)
+        drives = {"src.yaml": src, "dst.yaml": dst}
+        stdout = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            src.write_snapshot(Path(directory) / "src.sqlite")
+            dst.write_snapshot(Path(directory) / "dst.sqlite")
+            with (
+                patch(
+                    "app.migrate._progress.create_drive_from_config",
+                    lambda path: drives[path.name].context(),
+                ),
+                patch("app.lib._get_dsn", lambda drive: drive.dsn),
+                redirect_stdout(stdout),
+            ):
+                asyncio.run(
+                    progress(
+                        PurePath("/media"),
+                        src_config=Path("src.yaml"),
+                        dst_config=Path("dst.yaml"),
+                        ledger_path=Path(directory) / "ledger.sqlite",
+                    )
+                )
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [
+                "anime: 75.00% (100B left)",
+                "books: 0.00% (50B left)",
+                "total: 66.67% (150B left), ETA unknown at 0B/s",
+            ],
+        )
+
+    def test_estimates_time_left(self):
+        self.assertEqual(format_eta(0, 0.0), "0:00:00")
+        self.assertEqual(format_eta(100, 0.0), "unknown")
+        self.assertEqual(format_eta(3600 * 1024, 1024.0), "1:00:00")
+
+
+class _Stop(Exception):
+    pass
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "ledger.sqlite"
+        self.db = sqlite3.connect(self.path)
+        self.addCleanup(self.db.close)
+        for sql in _SQL_CREATE_TABLES:
+            self.db.execute(sql)
+
+    def _record(self, *rows: tuple[int, float, float]):
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO transfers (node_id, size, started_at, duration) "
+                "VALUES ('n', ?, ?, ?);",
+                rows,
+            )
+
+    def test_groups_transfers_into_buckets(self):
+        self._record((100, 3600.0, 1.0), (50, 3700.0, 2.0), (10, 3.0 * 3600, 5.0))
+
+        buckets = get_histogram(self.db, since=3600.0, width=3600.0, until=3 * 3600.0)
+
+        self.assertEqual(
+            [(_.start, _.count, _.size) for _ in buckets],
+            [(3600.0, 2, 150), (7200.0, 0, 0), (10800.0, 1, 10)],
+        )
+
+    def test_reports_per_file_throughput_percentiles(self):
+        self._record(
+            *((size * 1024, 100.0, 1.0) for size in range(10, 0, -1)),
+            (0, 100.0, 1.0),
+        )
+
+        rates = get_throughput(self.db, since=0.0)
+
+        self.assertEqual(rates, [size * 1024.0 for size in range(1, 11)])
+        self.assertEqual(percentile(rates, 50), 5 * 1024.0)
+        self.assertEqual(percentile(rates, 90), 9 * 1024.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_follows_new_transfers(self):
+        now = time.time()
+        self._record((1024, now - 60, 1.0))
+        calls = 0
+
+        async def sleep(_delay: float):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                self._record((2048, now, 2.0))
+            else:
+                raise _Stop()
+
+        stdout = io.StringIO()
+        with (
+            patch("app.migrate._stats.asyncio.sleep", sleep),
+            redirect_stdout(stdout),
+            self.assertRaises(_Stop),
+        ):
+            asyncio.run(
+                stats(
+                    self.path,
+                    period=timedelta(hours=1),
+                    bucket=timedelta(minutes=30),
+                    follow=True,
+                )
+            )
+
+        lines = stdout.getvalue().splitlines()
+        self.assertIn("total: 1.0KiB", lines)
+        self.assertIn("per-file throughput (1 files): ", lines[-2])
+        self.assertTrue(lines[-1].endswith("1.0KiB/s"))
+        self.assertIn("2.0KiB", lines[-1])
@@ -0,0 +1,90 @@
+import asyncio
+import io
+import tempfile
+import unicodedata
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import yaml
+
+from app.normalize_unicode._analyze import analyze
+from app.normalize_unicode._apply import apply
+
+from ._fakes import FakeDrive, RateLimitedError, make_node
+
+
+_NFD = unicodedata.normalize("NFD", "ポケモン café")
+_NFC = unicodedata.normalize("NFC", _NFD)
+
+
+class TestAnalyze(unittest.TestCase):
+    def test_lists_live_names_that_are_not_nfc(self):
+        drive = FakeDrive()
+        drive.add_directory("dir", _NFD, parent_id="root")
+        drive.add_file("file", _NFD + ".zip", parent_id="dir")
+        drive.add_file("ok", _NFC + ".zip", parent_id="dir")
+        drive.add_file("trashed", _NFD + ".txt", parent_id="dir", is_trashed=True)
+        drive.add(
+            make_node(
+                "bin", "bin", parent_id="root", is_directory=True, is_trashed=True
+            )
+        )
+        drive.add_file("discarded", _NFD + ".7z", parent_id="bin")
+        stdout = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            drive.write_snapshot(Path(directory) / "nodes.sqlite")
+            with (
+                patch(
+                    "app.normalize_unicode._analyze.create_default_drive", drive.context
+                ),
+                patch("app.lib._get_dsn", lambda _: drive.dsn),
+                redirect_stdout(stdout),
+            ):
+                asyncio.run(analyze())
+
+        entries = yaml.safe_load(stdout.getvalue())
+        self.assertEqual(
+            sorted(entries, key=lambda _: _["id"]),
+            [
+                {"id": "dir", "name": _NFD, "new_name": _NFC},
+                {"id": "file", "name": _NFD + ".zip", "new_name": _NFC + ".zip"},
+            ],
+        )
+
+
+class TestApply(unittest.TestCase):
+    def test_renames_with_bounded_concurrency_and_retries(self):
+        drive = FakeDrive(latency=0.01)
+        for index in range(6):
+            drive.add_file(f"n{index}", f"{_NFD}{index}", parent_id="root")
+        drive.failures["n0"] = [RateLimitedError(), RateLimitedError()]
+        manifest = [
+            {"id": f"n{index}", "name": f"{_NFD}{index}", "new_name": f"{_NFC}{index}"}
+            for index in range(6)
+        ]
+        stderr = io.StringIO()
+
+        with (
+            patch("app.normalize_unicode._apply.create_default_drive", drive.context),
+            patch("app.lib.asyncio.sleep", AsyncMock()),
+            patch(
+                "sys.stdin", io.StringIO(yaml.safe_dump(manifest, allow_unicode=True))
+            ),
+            redirect_stdout(io.StringIO()),
+            redirect_stderr(stderr),
+        ):
+            asyncio.run(apply(jobs=2))
+
+        self.assertEqual(drive.max_in_flight, 2)
+        self.assertEqual(
+            [drive.nodes[f"n{index}"].name for index in range(6)],
+            [f"{_NFC}{index}" for index in range(6)],
+        )
+        self.assertIn("renamed 6 of 6", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()